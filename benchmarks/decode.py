@@ -0,0 +1,158 @@
+"""
+接口数据解码基准
+
+生成与 batch/check、已完成任务接口结构一致的大体量任务数组，比较两种解码路径：
+- 旧路径：json.loads 后逐个 Task(dict)（__dict__.update，无校验），再调用 preprocess_task_dates 解析时间字段
+- 新路径：Task.decode_many(原始字节)，按 Types 中声明的字段一次完成缺省值、类型修正和时间预解析
+
+用法:
+    python benchmarks/decode.py                  # 默认 50000 个任务，重复 5 次取最小值
+    python benchmarks/decode.py --tasks 200000   # 更大的响应
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import Types  # noqa: E402
+from Types import Task, parse_api_time  # noqa: E402
+
+
+class LegacyTask:
+    """
+    旧的任务模型：固定字段初始化为 None 后用接口字典覆盖
+    """
+    FIELDS = ['id', 'title', 'projectId', 'startDate', 'reminders', 'exDate', 'dueDate', 'priority',
+              'isAllDay', 'repeatFlag', 'progress', 'assignee', 'sortOrder', 'isFloating', 'status',
+              'kind', 'createdTime', 'modifiedTime', 'completedTime', 'tags', 'timeZone', 'content', 'desc']
+
+    def __init__(self, task_dict=None):
+        for name in self.FIELDS:
+            setattr(self, name, None)
+        self.items = []
+        self.childIds = []
+        self.parentId = ''
+        if task_dict:
+            self.__dict__.update(task_dict)
+
+
+def legacy_preprocess(task: LegacyTask):
+    """
+    旧的 preprocess_task_dates
+    """
+    if task.startDate:
+        setattr(task, '_processed_startDate', parse_api_time(task.startDate))
+    if task.dueDate:
+        dt = parse_api_time(task.dueDate)
+        if getattr(task, 'isAllDay', False) and task.startDate != task.dueDate and dt:
+            dt = dt - timedelta(days=1)
+        setattr(task, '_processed_dueDate', dt)
+    if task.completedTime:
+        setattr(task, '_processed_completedTime', parse_api_time(task.completedTime))
+
+
+def legacy_decode(raw: bytes) -> List[LegacyTask]:
+    tasks = []
+    for item in json.loads(raw):
+        task = LegacyTask(item)
+        legacy_preprocess(task)
+        # 旧代码在每个使用处再做 priority 的兜底
+        task.priority = task.priority if task.priority else 0
+        tasks.append(task)
+    return tasks
+
+
+def make_payload(count: int, seed: int = 0) -> bytes:
+    """
+    生成 count 个任务的 JSON 数组（部分字段缺失或为 null，模拟真实响应）
+    """
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def iso(dt: datetime) -> str:
+        return dt.strftime('%Y-%m-%dT%H:%M:%S.000+0000')
+
+    tasks = []
+    for i in range(count):
+        start = base + timedelta(minutes=rng.randrange(0, 525600))
+        task = {
+            'id': f"{i:024x}",
+            'projectId': f"{rng.randrange(40):024x}",
+            'title': f"任务 {i} " + '内容' * rng.randrange(1, 20),
+            'content': '描述' * rng.randrange(0, 50),
+            'status': rng.choice([0, 0, 2]),
+            'priority': rng.choice([0, 1, 3, 5, None]),
+            'isAllDay': rng.random() < 0.5,
+            'sortOrder': -rng.randrange(1 << 40),
+            'timeZone': 'Asia/Shanghai',
+            'tags': [f"tag{rng.randrange(10)}"] if rng.random() < 0.3 else [],
+            'createdTime': iso(start - timedelta(days=3)),
+            'modifiedTime': iso(start),
+            'items': [{'id': f"{i}-{j}", 'title': f"子项 {j}", 'status': 0} for j in range(rng.randrange(0, 4))],
+            'etag': f"{rng.randrange(1 << 32):08x}",
+            'columnId': f"{rng.randrange(8):024x}",
+        }
+        if rng.random() < 0.8:
+            task['startDate'] = iso(start)
+            task['dueDate'] = iso(start + timedelta(days=rng.randrange(0, 3)))
+        if task['status'] == 2:
+            task['completedTime'] = iso(start + timedelta(hours=5))
+        if rng.random() < 0.1:
+            del task['priority']
+        tasks.append(task)
+    return json.dumps(tasks, ensure_ascii=False).encode('utf-8')
+
+
+def bench(fn: Callable[[bytes], list], raw: bytes, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(raw)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def check_equivalent(raw: bytes):
+    """
+    确认两种路径解码出的字段一致
+    """
+    for old, new in zip(legacy_decode(raw), Task.decode_many(raw)):
+        for name in ('id', 'title', 'status', 'priority', 'startDate', 'dueDate', 'completedTime', 'columnId'):
+            assert getattr(old, name) == getattr(new, name), name
+        for name in ('_processed_startDate', '_processed_dueDate', '_processed_completedTime'):
+            assert getattr(old, name, None) == getattr(new, name), name
+
+
+def main():
+    parser = argparse.ArgumentParser(description="接口数据解码基准")
+    parser.add_argument('--tasks', type=int, default=50000, help="任务数量")
+    parser.add_argument('--repeat', type=int, default=5, help="重复次数（取最小值）")
+    args = parser.parse_args()
+
+    check_equivalent(make_payload(2000, seed=1))
+    raw = make_payload(args.tasks)
+    print(f"响应大小：{len(raw) / 1024 / 1024:.1f} MB，{args.tasks} 个任务\n")
+
+    results = [('旧路径（json + Task + preprocess_task_dates）', bench(legacy_decode, raw, args.repeat))]
+    orjson, Types.orjson = Types.orjson, None
+    results.append(('Task.decode_many（json）', bench(Task.decode_many, raw, args.repeat)))
+    Types.orjson = orjson
+    if orjson is not None:
+        results.append(('Task.decode_many（orjson）', bench(Task.decode_many, raw, args.repeat)))
+    else:
+        print("未安装 orjson，跳过 orjson 解码路径\n")
+
+    legacy = results[0][1]
+    for name, seconds in results:
+        print(f"  {name:<40} {seconds * 1000:8.1f} ms  {args.tasks / seconds / 1000:7.1f} k 个/秒  {legacy / seconds:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Memos API 格式回归检查
+
+在本地启动替身 Memos 服务器，分别以 v0（/api/v1/memo，limit/offset）和 v1（/api/v1/memos，pageSize/pageToken、filter）
+格式返回同一组 Memos，检查：
+- 只配置服务器地址时的版本检测，以及检测结果只在得到明确答复（返回版本号或 404）时缓存；
+- 两种格式的分页和按时间过滤参数（v1 在服务端过滤，v0 获取到起始时间为止）；
+- 增量导出、全量归档和按月重新归档的结果在两种格式下完全一致。
+
+需要安装 requirements.txt 中的依赖。
+
+用法:
+    python benchmarks/memos_api.py
+"""
+import os
+import re
+import sys
+import json
+import time
+import tempfile
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+TOKEN = 'tk'
+
+
+def rfc3339(timestamp: int) -> str:
+    # 与 Go 服务端一致，带纳秒精度
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.123456789Z')
+
+
+class StandInServer:
+    """
+    替身 Memos 服务器：以 v0 或 v1 格式返回同一组 Memos，记录每次请求的路径和参数
+
+    profile_status 不为空时 /api/v1/workspace/profile 返回该状态码（模拟暂时性故障）。
+    """
+
+    def __init__(self, memos: List[dict], version: str, profile_status: Optional[int] = None):
+        self.memos = memos
+        self.version = version
+        self.profile_status = profile_status
+        self.log: List[tuple] = []
+        self.sent = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, code: int, body, content_type: str = 'application/json'):
+                data = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+                server.log.append((parts.path, query))
+                if self.headers.get('Authorization') != f'Bearer {TOKEN}':
+                    return self.reply(401, {'error': 'unauthorized'})
+                ordered = sorted(server.memos, key=lambda memo: (not memo.get('pinned'), -memo['createdTs']))
+                if parts.path == '/api/v1/workspace/profile':
+                    if server.profile_status:
+                        return self.reply(server.profile_status, {'error': 'unavailable'})
+                    if server.version == 'v1':
+                        return self.reply(200, {'version': '0.24.0'})
+                    return self.reply(404, {'error': 'not found'})
+                if parts.path == '/api/v1/memo' and server.version == 'v0':
+                    limit, offset = int(query['limit']), int(query['offset'])
+                    assert query.get('rowStatus') == 'NORMAL', query
+                    page = ordered[offset:offset + limit]
+                    server.sent += len(page)
+                    return self.reply(200, [server.v0_memo(memo) for memo in page])
+                if parts.path == '/api/v1/memos' and server.version == 'v1':
+                    assert query.get('state') == 'NORMAL', query
+                    if 'filter' in query:
+                        match = re.fullmatch(r'created_ts >= (\d+)', query['filter'])
+                        assert match, query['filter']
+                        ordered = [memo for memo in ordered if memo['createdTs'] >= int(match.group(1))]
+                    size, start = int(query['pageSize']), int(query.get('pageToken') or 0)
+                    page = ordered[start:start + size]
+                    server.sent += len(page)
+                    next_token = str(start + size) if start + size < len(ordered) else ''
+                    return self.reply(200, {'memos': [server.v1_memo(memo) for memo in page], 'nextPageToken': next_token})
+                for memo in server.memos:
+                    for resource in memo.get('resources', []):
+                        if parts.path in (f"/o/r/{resource['uid']}",
+                                          f"/file/attachments/{resource['uid']}/{resource['filename']}"):
+                            return self.reply(200, resource['blob'], 'image/png')
+                self.reply(404, {'error': 'not found'})
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.origin = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    @staticmethod
+    def v0_memo(memo: dict) -> dict:
+        data = {key: value for key, value in memo.items() if key != 'resources'}
+        data['resourceList'] = [{'id': i, 'uid': resource['uid'], 'filename': resource['filename'],
+                                 'size': len(resource['blob'])} for i, resource in enumerate(memo.get('resources', []))]
+        return data
+
+    @staticmethod
+    def v1_memo(memo: dict) -> dict:
+        return {
+            'name': f"memos/{memo['id']}",
+            'uid': f"u{memo['id']}",
+            'state': 'NORMAL',
+            'pinned': bool(memo.get('pinned')),
+            'createTime': rfc3339(memo['createdTs']),
+            'updateTime': rfc3339(memo['updatedTs']),
+            'displayTime': rfc3339(memo['createdTs']),
+            'content': memo['content'],
+            'attachments': [{'name': f"attachments/{resource['uid']}", 'filename': resource['filename'],
+                             'type': 'image/png', 'size': str(len(resource['blob']))}
+                            for resource in memo.get('resources', [])],
+        }
+
+    def paths(self) -> List[str]:
+        return [path for path, _ in self.log]
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def sample_memos(now: int) -> List[dict]:
+    memos = [{'id': i, 'content': f"m{i} #t{i % 3}", 'createdTs': now - i * 40000, 'updatedTs': now - i * 40000 + 5,
+              'rowStatus': 'NORMAL'} for i in range(1, 120)]
+    memos[3]['pinned'] = True
+    memos[0]['resources'] = [{'uid': 'abc', 'filename': 'p.png', 'blob': b'PNGDATA' * 10}]
+    return memos
+
+
+def rendered(output_dir: str) -> Dict[str, bytes]:
+    files = {}
+    for root, _, names in os.walk(os.path.join(output_dir, 'Memos')):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, output_dir)] = f.read()
+    return files
+
+
+def check_detection(memos: List[dict]):
+    from MemosApi import MemosApi
+
+    def cached(state_dir: str) -> bool:
+        return os.path.exists(os.path.join(state_dir, 'memos_api.json'))
+
+    for version in ('v0', 'v1'):
+        server = StandInServer(memos, version)
+        state_dir = tempfile.mkdtemp()
+        assert MemosApi(server.origin, TOKEN, state_dir=state_dir).version == version
+        assert cached(state_dir), f"{version} 的检测结果没有缓存"
+        server.log.clear()
+        assert MemosApi(server.origin, TOKEN, state_dir=state_dir).version == version
+        assert not server.log, "检测结果缓存后仍然请求了 profile"
+        server.shutdown()
+
+    # 暂时性故障：按 v0 处理，但不缓存，下次运行重新检测
+    server = StandInServer(memos, 'v1', profile_status=502)
+    state_dir = tempfile.mkdtemp()
+    assert MemosApi(server.origin, TOKEN, state_dir=state_dir).version == 'v0'
+    assert not cached(state_dir), "502 的检测结果被缓存"
+    server.profile_status = None
+    assert MemosApi(server.origin, TOKEN, state_dir=state_dir).version == 'v1'
+    assert cached(state_dir)
+    server.shutdown()
+
+    # 网络错误：不抛出异常，也不缓存
+    state_dir = tempfile.mkdtemp()
+    assert MemosApi(server.origin, TOKEN, state_dir=state_dir).version == 'v0'
+    assert not cached(state_dir), "网络错误的检测结果被缓存"
+    print("版本检测：明确结果缓存，502 和网络错误不缓存")
+
+
+def check_exports(memos: List[dict], now: int):
+    import MemosExporter
+    from Snapshot import Snapshot
+    from StateStore import get_state_dir
+
+    results = {}
+    for version in ('v0', 'v1'):
+        server = StandInServer(memos, version)
+        output_dir = tempfile.mkdtemp()
+        os.environ.update(OUTPUT_DIR=output_dir, MEMOS_API=server.origin)
+        MemosExporter.main(force=True)
+        assert '/api/v1/workspace/profile' in server.paths()
+        assert f'/api/v1/memo{"s" if version == "v1" else ""}' in server.paths(), server.paths()
+
+        # 快照中保存的是该格式的原始响应，回放时按响应结构解码
+        snapshot = Snapshot.latest(get_state_dir(output_dir), 'memos')
+        replayed = MemosExporter.fetch_data(MemosExporter.get_config(), None, snapshot=snapshot)[0]
+        assert [memo.createdTs for memo in replayed[1:3]] == [memos[0]['createdTs'], memos[1]['createdTs']]
+
+        # 全量归档：逐页获取全部历史
+        server.sent = 0
+        server.log.clear()
+        MemosExporter.main(archive=True)
+        assert server.sent == len(memos), server.sent
+        pages = [query for path, query in server.log if path.startswith('/api/v1/memo')]
+        assert len(pages) > 1, "归档没有分页"
+        full = rendered(output_dir)
+
+        # 按月重新归档：只传输这段时间的 Memos，结果与全量归档一致
+        server.sent = 0
+        server.log.clear()
+        since = time.strftime('%Y-%m', time.localtime(now - 40 * 86400))
+        MemosExporter.main(archive=True, since=since)
+        pages = [query for path, query in server.log if path.startswith('/api/v1/memo')]
+        if version == 'v1':
+            assert all(query.get('filter', '').startswith('created_ts >= ') for query in pages), pages
+        else:
+            assert all('filter' not in query for query in pages), pages
+        assert server.sent < len(memos), server.sent
+        results[version] = rendered(output_dir)
+        assert results[version] == full, set(full) ^ set(results[version])
+        print(f"{version}：全量归档 {len(memos)} 条，按月重新归档传输 {server.sent} 条")
+        server.shutdown()
+
+    v0, v1 = results['v0'], results['v1']
+    assert v0.keys() == v1.keys(), set(v0) ^ set(v1)
+    different = [path for path in v0 if v0[path] != v1[path]]
+    assert not different, different
+    print(f"两种格式渲染结果一致（{len(v0)} 个文件）")
+
+
+def main():
+    os.environ.update(MEMOS_ARCHIVE_PAGE_SIZE='10', PROBE_ENABLED='false', MEMOS_TOKEN=TOKEN, SNAPSHOT_ENABLED='true')
+    now = int(time.time())
+    memos = sample_memos(now)
+    check_detection(memos)
+    check_exports(memos, now)
+    print("全部通过")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+推送通道帧解析回归检查
+
+在本地启动一个替身 WebSocket 服务器，把帧拆成小段、每段之间停顿超过客户端读超时后再发送，
+检查 PushListener.WebSocketClient 在帧头、扩展长度、掩码、负载和分片消息之间的任意位置超时后都能继续解析，
+并检查断线重连时重新生成握手请求头（登录 Token 过期后使用新的 Cookie）。
+
+用法:
+    python benchmarks/push_frames.py
+"""
+import os
+import sys
+import time
+import base64
+import socket
+import struct
+import hashlib
+import threading
+from typing import List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from PushListener import WebSocketClient, PushListener, _WS_GUID, OP_TEXT, OP_BINARY, OP_PING, OP_PONG, OP_CLOSE
+
+# 客户端读超时（秒），替身服务器每段之间停顿更久
+TIMEOUT = 0.1
+PAUSE = 0.25
+
+
+def frame(opcode: int, payload: bytes, fin: bool = True, mask: Optional[bytes] = None) -> bytes:
+    """
+    构造一帧（服务器发送的帧通常不加掩码，mask 用于覆盖带掩码的情况）
+    """
+    header = bytes([(0x80 if fin else 0) | opcode])
+    flag = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header += bytes([flag | length])
+    elif length < 1 << 16:
+        header += bytes([flag | 126]) + struct.pack('!H', length)
+    else:
+        header += bytes([flag | 127]) + struct.pack('!Q', length)
+    if mask:
+        header += mask
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return header + payload
+
+
+class StandInServer:
+    """
+    替身 WebSocket 服务器：每个连接完成握手后按给定的分段依次发送，记录每次握手的请求头
+    """
+
+    def __init__(self, connections: List[List[bytes]]):
+        self.connections = connections
+        self.requests: List[bytes] = []
+        self.received: List[bytes] = []
+        self.sock = socket.socket()
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(4)
+        self.url = f"ws://127.0.0.1:{self.sock.getsockname()[1]}/web"
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        for parts in self.connections:
+            conn, _ = self.sock.accept()
+            request = b''
+            while b'\r\n\r\n' not in request:
+                request += conn.recv(1024)
+            self.requests.append(request)
+            key = [line.split(b': ', 1)[1] for line in request.split(b'\r\n')
+                   if line.lower().startswith(b'sec-websocket-key')][0]
+            accept = base64.b64encode(hashlib.sha1(key + _WS_GUID.encode()).digest())
+            conn.sendall(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                         b'Sec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+            threading.Thread(target=self._drain, args=(conn,), daemon=True).start()
+            for part in parts:
+                time.sleep(PAUSE)
+                conn.sendall(part)
+            time.sleep(PAUSE)
+            conn.close()
+
+    def _drain(self, conn: socket.socket):
+        try:
+            while True:
+                data = conn.recv(4096)
+                if not data:
+                    return
+                self.received.append(data)
+        except OSError:
+            return
+
+
+def split(data: bytes, *cuts: int) -> List[bytes]:
+    bounds = [0, *cuts, len(data)]
+    return [data[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def receive(client: WebSocketClient, count: int) -> list:
+    """
+    接收 count 条消息，超时时像 PushListener 一样发送心跳后继续
+    """
+    messages = []
+    timeouts = 0
+    while len(messages) < count:
+        try:
+            messages.append(client.recv())
+        except socket.timeout:
+            timeouts += 1
+            client.send(b'', OP_PING)
+    return messages, timeouts
+
+
+def check_frames():
+    medium = os.urandom(300)
+    large = os.urandom(70000)
+    stream = [
+        *split(frame(OP_TEXT, b'hello'), 1),                                   # 两字节帧头中间
+        *split(frame(OP_BINARY, medium), 2, 3),                                # 16 位扩展长度中间
+        *split(frame(OP_BINARY, large), 5, 10, 40000),                         # 64 位扩展长度和负载中间
+        *split(frame(OP_TEXT, b'masked', mask=b'\x01\x02\x03\x04'), 3),        # 掩码中间
+        # 分片消息：分片之间超时并插入 ping，续帧也从中间切开
+        frame(OP_TEXT, b'{"a', fin=False),
+        frame(OP_PING, b'p'),
+        *split(frame(0x0, b'":1', fin=False), 1),
+        frame(0x0, b'}'),
+    ]
+    server = StandInServer([stream])
+    client = WebSocketClient(server.url, timeout=TIMEOUT)
+    client.connect()
+    messages, timeouts = receive(client, 5)
+    client.close()
+    expected = [(OP_TEXT, b'hello'), (OP_BINARY, medium), (OP_BINARY, large), (OP_TEXT, b'masked'), (OP_TEXT, b'{"a":1}')]
+    assert messages == expected, [(opcode, payload[:20], len(payload)) for opcode, payload in messages]
+    assert timeouts >= len(stream) - 1, timeouts
+    pongs = b''.join(server.received)
+    assert bytes([0x80 | OP_PONG]) in pongs, "没有回复 ping"
+    print(f"帧解析：{len(expected)} 条消息在 {timeouts} 次读超时后完整收到")
+
+
+def check_reconnect_headers():
+    server = StandInServer([[frame(OP_CLOSE, b'')], [frame(OP_TEXT, b'changed')]])
+    tokens = iter(['t=old', 't=new'])
+    listener = PushListener(server.url, ping_interval=TIMEOUT, debounce_seconds=0,
+                            headers_factory=lambda: {"Cookie": next(tokens)})
+    listener.start()
+    assert listener.wait_for_change(10), "重连后没有收到通知"
+    listener.stop()
+    cookies = [[line for line in request.split(b'\r\n') if line.startswith(b'Cookie')][0] for request in server.requests]
+    assert cookies == [b'Cookie: t=old', b'Cookie: t=new'], cookies
+    print("重连：每次握手都重新生成请求头")
+
+
+def main():
+    check_frames()
+    check_reconnect_headers()
+    print("全部通过")
+
+
+if __name__ == '__main__':
+    main()
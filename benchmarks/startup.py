@@ -0,0 +1,142 @@
+"""
+启动耗时基准
+
+对每个命令行入口分别启动新的解释器，使用 python -X importtime 统计各模块的导入耗时，
+并模拟一次「未到探测时间」的空跑（python src/main.py），检查空跑路径没有加载 requests 等重量级模块。
+
+用法:
+    python benchmarks/startup.py                 # 默认重复 5 次取最小值
+    python benchmarks/startup.py --top 15        # 显示导入最慢的 15 个模块
+    python benchmarks/startup.py --budget-ms 50  # 空跑耗时超过预算时返回非零退出码
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+ENTRY_MODULES = ['main', 'Dida365Exporter', 'MemosExporter', 'Daemon']
+# 空跑路径不应加载的模块
+HEAVY_MODULES = ['requests', 'urllib3', 'sqlite3', 'asyncio', 'aiohttp', 'ssl']
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    解析 -X importtime 的输出
+
+    返回:
+        (模块名, 自身耗时 us, 累计耗时 us, 嵌套层级) 的列表
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), level))
+    return rows
+
+
+def entry_rows(rows: List[Tuple[str, int, int, int]], module: str) -> List[Tuple[str, int, int, int]]:
+    """
+    取出由入口模块触发的导入（-X importtime 先输出子模块，最后输出顶层模块本身）
+    """
+    block = []
+    for row in rows:
+        block.append(row)
+        if row[3] == 0:
+            if row[0] == module:
+                return block
+            block = []
+    return []
+
+
+def run_python(args: List[str], env: Dict[str, str]) -> Tuple[float, str]:
+    """
+    启动新的解释器执行命令，返回 (耗时 ms, stderr)
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=SRC_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"执行失败: {' '.join(args)}\n{result.stderr}")
+    return elapsed, result.stderr
+
+
+def bench_imports(module: str, repeat: int, env: Dict[str, str]) -> Tuple[float, List[Tuple[str, int, int, int]]]:
+    """
+    多次导入入口模块，返回最快一次的进程耗时和导入明细
+    """
+    best = None
+    for _ in range(repeat):
+        elapsed, stderr = run_python(['-X', 'importtime', '-c', f'import {module}'], env)
+        if best is None or elapsed < best[0]:
+            best = (elapsed, parse_importtime(stderr))
+    return best
+
+
+def prepare_noop_output(output_dir: str):
+    """
+    在临时输出目录中写入「下次探测时间在一小时后」的探测状态，使 main.py 直接跳过所有导出
+    """
+    state_dir = os.path.join(output_dir, '.dida365')
+    os.makedirs(state_dir, exist_ok=True)
+    now = datetime.now()
+    state = {
+        'last_full_run': now.isoformat(),
+        'next_probe_at': (now + timedelta(hours=1)).isoformat(),
+        'interval_minutes': 60,
+        'markers': {'checkPoint': 1},
+    }
+    for name in ('dida365', 'memos'):
+        with open(os.path.join(state_dir, f'probe_{name}.json'), 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="入口模块启动耗时基准")
+    parser.add_argument('--repeat', type=int, default=5, help="重复次数（取最小值）")
+    parser.add_argument('--top', type=int, default=10, help="显示导入最慢的模块数量")
+    parser.add_argument('--budget-ms', type=float, default=None, help="空跑耗时预算（毫秒）")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    baseline, _ = min(run_python(['-c', 'pass'], env) for _ in range(args.repeat))
+    print(f"解释器启动（python -c pass）：{baseline:.1f} ms\n")
+
+    for module in ENTRY_MODULES:
+        elapsed, rows = bench_imports(module, args.repeat, env)
+        rows = entry_rows(rows, module)
+        total = rows[-1][2] if rows else 0
+        print(f"== {module}：进程 {elapsed:.1f} ms，导入 {total / 1000:.1f} ms")
+        for name, self_us, cumulative_us, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+            print(f"  {name:<32} 自身 {self_us / 1000:6.2f} ms  累计 {cumulative_us / 1000:6.2f} ms")
+        print()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        prepare_noop_output(output_dir)
+        noop_env = dict(env, OUTPUT_DIR=output_dir, PROBE_ENABLED='true', MEMOS_API=env.get('MEMOS_API') or 'http://127.0.0.1:9')
+        best = None
+        for _ in range(args.repeat):
+            elapsed, stderr = run_python(['-X', 'importtime', 'main.py'], noop_env)
+            if best is None or elapsed < best[0]:
+                best = (elapsed, stderr)
+        elapsed, stderr = best
+    loaded = {name for name, _, _, _ in parse_importtime(stderr)}
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    print(f"空跑（未到探测时间）：{elapsed:.1f} ms，扣除解释器启动后 {elapsed - baseline:.1f} ms")
+    print(f"空跑加载的重量级模块：{', '.join(heavy) if heavy else '无'}")
+
+    if args.budget_ms is not None and elapsed - baseline > args.budget_ms:
+        print(f"超出预算 {args.budget_ms:g} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+import os
+import json
+import time
+import weakref
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+from StateStore import get_state_dir
+
+
+class Account:
+    """
+    多账号配置中的一个账号
+
+    每个账号有独立的输出目录（状态目录、运行锁、登录 Token 都保存在其中），
+    可以只配置滴答清单或只配置 Memos。
+    """
+
+    def __init__(self, name: str, output_dir: str, dida365: Optional[dict] = None, memos: Optional[dict] = None,
+                 rate_limit: Optional[float] = None, burst: Optional[int] = None):
+        """
+        参数:
+            name: 账号名称（用于日志和公平调度）
+            output_dir: 输出目录
+            dida365: 滴答清单账号 {"username": ..., "password": ...}
+            memos: Memos 配置 {"api": ..., "token": ...}
+            rate_limit: 每秒最多发起的请求数，默认读取环境变量 ACCOUNT_RATE_LIMIT（默认 5，0 表示不限速）
+            burst: 允许的突发请求数，默认与 rate_limit 相同（至少为 1）
+        """
+        self.name = name
+        self.output_dir = output_dir
+        dida365 = dida365 or {}
+        memos = memos or {}
+        self.username: Optional[str] = dida365.get('username')
+        self.password: Optional[str] = dida365.get('password')
+        self.memos_api: Optional[str] = memos.get('api')
+        self.memos_token: Optional[str] = memos.get('token')
+        self.rate_limit = float(rate_limit if rate_limit is not None else os.getenv('ACCOUNT_RATE_LIMIT', '5'))
+        self.burst = burst
+
+    @property
+    def has_dida365(self) -> bool:
+        return bool(self.username and self.password)
+
+    @property
+    def token_file(self) -> str:
+        """
+        该账号的滴答清单登录 Token 文件（位于账号自己的状态目录，账号之间互不共享，也不写入 .env）
+        """
+        return os.path.join(get_state_dir(self.output_dir), 'dida365_token.json')
+
+
+def _expand(value):
+    """
+    展开配置值中的环境变量引用（如 "${ALICE_PASSWORD}"），避免在配置文件中直接写入密码
+    """
+    if isinstance(value, str):
+        return os.path.expandvars(value)
+    if isinstance(value, dict):
+        return {key: _expand(item) for key, item in value.items()}
+    return value
+
+
+def load_accounts(path: str) -> dict:
+    """
+    读取多账号配置文件（JSON，格式见 accounts.example.json）
+
+    参数:
+        path: 配置文件路径
+
+    返回:
+        包含 accounts（Account 列表）、max_connections（共享连接池大小）、concurrency（同时导出的账号数）的字典
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    accounts = []
+    output_dirs = set()
+    for index, item in enumerate(data.get('accounts', [])):
+        item = _expand(item)
+        name = item.get('name') or f"account{index + 1}"
+        output_dir = item.get('output_dir')
+        if not output_dir:
+            raise ValueError(f"账号 {name} 没有配置 output_dir")
+        output_dir = os.path.abspath(output_dir)
+        # 状态目录、运行锁和 Token 都在输出目录中，不能被多个账号共用
+        if output_dir in output_dirs:
+            raise ValueError(f"账号 {name} 的 output_dir 与其他账号重复: {output_dir}")
+        output_dirs.add(output_dir)
+        accounts.append(Account(name, output_dir, item.get('dida365'), item.get('memos'),
+                                item.get('rate_limit'), item.get('burst')))
+    max_connections = int(data.get('max_connections') or os.getenv('ACCOUNTS_MAX_CONNECTIONS', '16'))
+    concurrency = int(data.get('concurrency') or os.getenv('ACCOUNTS_CONCURRENCY', '0')) or len(accounts)
+    return {
+        'accounts': accounts,
+        'max_connections': max(max_connections, 1),
+        'concurrency': max(min(concurrency, len(accounts)), 1),
+    }
+
+
+class RateLimiter:
+    """
+    令牌桶限速器（线程安全）
+
+    每秒补充 rate 个令牌，最多积累 burst 个；令牌不足时按预约的顺序等待，不会因并发请求而超速。
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst or max(rate, 1))
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        取得一个令牌，必要时等待
+        """
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class FairScheduler:
+    """
+    在多个账号之间公平分配有限的并发请求数
+
+    空闲名额不足时，请求按账号排队，释放的名额按账号轮流分配（每轮每个账号一个），
+    因此请求很多的大账号不会占满连接池而让其他账号一直等待。
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._busy = 0
+        self._cond = threading.Condition()
+        # 账号名称 -> 等待中的请求（每个请求是一个 [是否已分配] 的标记）
+        self._queues: Dict[str, deque] = {}
+        # 有请求在等待的账号，按轮转顺序排列
+        self._ring: deque = deque()
+
+    def _dispatch(self):
+        while self._busy < self.slots and self._ring:
+            name = self._ring.popleft()
+            queue = self._queues[name]
+            queue.popleft()[0] = True
+            self._busy += 1
+            if queue:
+                self._ring.append(name)
+            else:
+                del self._queues[name]
+        self._cond.notify_all()
+
+    def acquire(self, name: str):
+        """
+        占用一个并发名额，名额不足时按账号轮流等待（必须与 release 成对调用）
+
+        参数:
+            name: 账号名称
+        """
+        with self._cond:
+            if self._busy < self.slots and not self._ring:
+                self._busy += 1
+            else:
+                ticket = [False]
+                if name not in self._queues:
+                    self._queues[name] = deque()
+                    self._ring.append(name)
+                self._queues[name].append(ticket)
+                self._cond.wait_for(lambda: ticket[0])
+
+    def release(self):
+        """
+        释放一个并发名额并分配给下一个等待的账号
+        """
+        with self._cond:
+            self._busy -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, name: str):
+        """
+        占用一个并发名额，退出时释放
+
+        参数:
+            name: 账号名称
+        """
+        self.acquire(name)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class AccountSession:
+    """
+    某个账号使用的 HTTP 会话：先按账号限速，再通过公平调度占用共享连接池的名额
+
+    提供与 requests 模块相同的 request / get 接口，可直接传给 Dida365Client 和 MemosExporter。
+    流式请求（stream=True）在读取响应体期间仍占用名额，响应关闭（或被回收）时才释放。
+    """
+
+    def __init__(self, pool: "SharedHttpPool", name: str, limiter: RateLimiter):
+        self.pool = pool
+        self.name = name
+        self.limiter = limiter
+
+    def request(self, method: str, url: str, **kwargs):
+        self.limiter.acquire()
+        scheduler = self.pool.scheduler
+        scheduler.acquire(self.name)
+        try:
+            response = self.pool.session.request(method, url, **kwargs)
+        except BaseException:
+            scheduler.release()
+            raise
+        if not kwargs.get('stream'):
+            scheduler.release()
+            return response
+        # 响应体还没有下载：关闭响应时释放名额；调用方忘记关闭时在响应被回收时释放，finalize 保证只释放一次
+        release = weakref.finalize(response, scheduler.release)
+        close = response.close
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                release()
+
+        response.close = close_and_release
+        return response
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+
+class SharedHttpPool:
+    """
+    所有账号共享的 HTTP 连接池
+
+    使用同一个 requests.Session 复用连接，每个主机最多 max_connections 个连接（用满时阻塞等待）；
+    会话不保存任何 Cookie，各账号的登录凭据只通过各自的请求头传递，互不串用。
+    """
+
+    def __init__(self, max_connections: int = 16):
+        import requests  # 延迟导入：只在真正发起请求时加载
+        from http.cookiejar import DefaultCookiePolicy
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_maxsize=max_connections, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.scheduler = FairScheduler(max_connections)
+
+    def for_account(self, account: Account) -> AccountSession:
+        """
+        返回账号专用的会话（独立限速，共享连接池）
+        """
+        return AccountSession(self, account.name, RateLimiter(account.rate_limit, account.burst))
+
+    def close(self):
+        self.session.close()
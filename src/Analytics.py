@@ -0,0 +1,290 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，未安装时不导出任务统计
+    np = None
+
+
+def analytics_available() -> bool:
+    """
+    是否可以导出任务统计（已安装 numpy）
+    """
+    return np is not None
+
+
+# 优先级取值及显示名称（与任务笔记中的优先级标记一致）
+PRIORITY_LABELS = [(5, '⏫ 高'), (3, '🔼 中'), (1, '🔽 低'), (0, '⏬ 无')]
+
+
+def _utc_text(value: Any) -> str:
+    """
+    把接口返回的 ISO 8601 时间字符串转换为 numpy 可直接解析的 UTC 时间文本
+    """
+    if not value:
+        return 'NaT'
+    # 接口返回的时间几乎都是 UTC（+0000），直接截取，避免逐个构造 datetime
+    if value.endswith('+0000') or value.endswith('Z'):
+        return value[:19]
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo:
+        dt = dt.astimezone(timezone.utc)
+    return dt.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def _times(values: Iterable[Any]) -> "np.ndarray":
+    """
+    把时间字符串序列转换为北京时间的 datetime64[s] 数组，空值为 NaT
+    """
+    utc = np.array([_utc_text(value) for value in values], dtype='datetime64[s]')
+    return utc + np.timedelta64(8, 'h')
+
+
+def _round(value: float) -> float:
+    return round(float(value), 2)
+
+
+class TaskColumns:
+    """
+    任务的列式视图
+
+    一次性把所有任务记录（通常是数据集中积累的全部历史任务）转换为 numpy 数组，
+    之后每个统计周期只做向量化的掩码和分组计数，多年的已完成任务也能在毫秒级完成统计。
+
+    每个任务有一个归属时间（anchor）：有截止时间时为截止时间，否则已完成的任务为完成时间，其余为创建时间；
+    任务按归属时间计入统计周期和周期内的周/月。
+    """
+
+    def __init__(self, records: Iterable[dict]):
+        """
+        参数:
+            records: 任务记录（Dataset 中的字典或 Task.to_dict() 的结果）
+        """
+        records = list(records)
+        self.size = len(records)
+        project_codes: Dict[str, int] = {}
+        self.project = np.array(
+            [project_codes.setdefault(r.get('projectId') or '', len(project_codes)) for r in records],
+            dtype=np.int32)
+        self.project_ids: List[str] = list(project_codes)
+        self.status = np.array([r.get('status') or 0 for r in records], dtype=np.int8)
+        self.priority = np.clip(np.array([r.get('priority') or 0 for r in records], dtype=np.int8), 0, 5)
+        all_day = np.array([bool(r.get('isAllDay')) for r in records], dtype=bool)
+        self.created = _times(r.get('createdTime') for r in records)
+        self.completed = _times(r.get('completedTime') for r in records)
+        start = _times(r.get('startDate') for r in records)
+        due = _times(r.get('dueDate') for r in records)
+
+        # 与 Types.Task 的 _processed_dueDate 一致：跨天的全天任务 dueDate 为结束日期的次日零点，需要减去一天；
+        # 全天任务的截止期限为截止日期当天结束
+        one_day = np.timedelta64(1, 'D')
+        due = np.where(all_day & (start != due), due - one_day, due)
+        self.deadline = np.where(all_day, due + one_day, due)
+        self.done = self.status == 2
+        self.anchor = np.where(np.isnat(due), np.where(self.done & ~np.isnat(self.completed), self.completed, self.created), due)
+
+        # 标签展开为 (任务下标, 标签编号) 两列
+        tag_codes: Dict[str, int] = {}
+        tag_task, tag_code = [], []
+        for index, record in enumerate(records):
+            for tag in record.get('tags') or []:
+                tag_task.append(index)
+                tag_code.append(tag_codes.setdefault(tag, len(tag_codes)))
+        self.tag_names = list(tag_codes)
+        self.tag_task = np.array(tag_task, dtype=np.int64)
+        self.tag_code = np.array(tag_code, dtype=np.int64)
+
+    def periods(self) -> Iterator[Tuple[str, str, datetime, datetime, str]]:
+        """
+        遍历有任务的统计周期（每月、每年各一个）
+
+        返回:
+            (标签, 标题, 开始时间, 结束时间（不含）, 分组粒度) 的迭代器，
+            月统计按周分组（week），年统计按月分组（month）
+        """
+        times = np.concatenate([self.anchor, self.completed])
+        months = np.unique(times[~np.isnat(times)].astype('datetime64[M]'))
+        for month in months:
+            start = month.astype(datetime)
+            end = (month + 1).astype(datetime)
+            label = start.strftime('%Y-%m')
+            yield label, f"{label} 任务统计", datetime(start.year, start.month, 1), datetime(end.year, end.month, 1), 'week'
+        for year in np.unique(months.astype('datetime64[Y]')):
+            start = year.astype(datetime)
+            yield str(start.year), f"{start.year} 年任务统计", datetime(start.year, 1, 1), datetime(start.year + 1, 1, 1), 'month'
+
+    def _buckets(self, start: datetime, end: datetime, bucket: str, index: "np.ndarray") -> Tuple[List[str], "np.ndarray"]:
+        """
+        计算周期内的分组标签和指定任务所在的分组下标
+        """
+        anchor = self.anchor[index]
+        if bucket == 'week':
+            first = np.datetime64(start, 'D') - np.timedelta64(start.weekday(), 'D')
+            count = int((np.datetime64(end, 'D') - first - np.timedelta64(1, 'D')) // np.timedelta64(7, 'D')) + 1
+            labels = []
+            for i in range(count):
+                week_start = (first + np.timedelta64(7 * i, 'D')).astype(datetime)
+                labels.append(f"第 {week_start.isocalendar()[1]} 周")
+            return labels, ((anchor - first) // np.timedelta64(7, 'D')).astype(np.int64)
+        first = np.datetime64(start, 'M')
+        count = int(np.datetime64(end, 'M') - first)
+        labels = [f"{(first + i).astype(datetime).month} 月" for i in range(count)]
+        return labels, (anchor.astype('datetime64[M]') - first).astype(np.int64)
+
+    def period_stats(self, start: datetime, end: datetime, now: datetime, bucket: str = 'week') -> Dict[str, Any]:
+        """
+        计算一个统计周期的各项指标
+
+        参数:
+            start: 周期开始时间
+            end: 周期结束时间（不含）
+            now: 当前时间，用于判断未完成任务是否已逾期
+            bucket: 完成率的分组粒度，week 或 month
+
+        返回:
+            可 JSON 序列化的统计结果（也用于判断统计页是否需要重写）
+        """
+        s, e = np.datetime64(start, 's'), np.datetime64(end, 's')
+        projects = len(self.project_ids)
+        in_period = (self.anchor >= s) & (self.anchor < e)
+        done_in_period = in_period & self.done
+
+        # 各项目按周（或月）的完成率
+        index = np.nonzero(in_period)[0]
+        labels, groups = self._buckets(start, end, bucket, index)
+        cells = self.project[index].astype(np.int64) * len(labels) + groups
+        size = projects * len(labels)
+        total_grid = np.bincount(cells, minlength=size).reshape(projects, len(labels))
+        done_grid = np.bincount(cells, weights=self.done[index], minlength=size).astype(np.int64).reshape(projects, len(labels))
+        rows = []
+        for code in np.argsort(-total_grid.sum(axis=1), kind='stable'):
+            if total_grid[code].sum() == 0:
+                break
+            rows.append({'project': self.project_ids[code],
+                         'total': total_grid[code].tolist(), 'done': done_grid[code].tolist()})
+
+        # 前置时间：周期内完成的任务从创建到完成的天数
+        completed = self.done & (self.completed >= s) & (self.completed < e) & ~np.isnat(self.created)
+        lead = np.maximum((self.completed[completed] - self.created[completed]) / np.timedelta64(1, 'D'), 0)
+        lead_projects = []
+        if lead.size:
+            codes = self.project[completed]
+            order = np.argsort(codes, kind='stable')
+            unique, first = np.unique(codes[order], return_index=True)
+            for code, values in zip(unique, np.split(lead[order], first[1:])):
+                lead_projects.append(self._lead_summary(values, project=self.project_ids[code]))
+            lead_projects.sort(key=lambda item: -item['count'])
+
+        # 逾期：截止期限在周期内的任务
+        due = (self.deadline >= s) & (self.deadline < e)
+        on_time = due & self.done & (self.completed <= self.deadline)
+        late = due & self.done & (self.completed > self.deadline)
+        overdue_open = due & (self.status == 0) & (self.deadline < np.datetime64(now, 's'))
+        overdue = []
+        counts = [np.bincount(self.project[mask], minlength=projects) for mask in (due, on_time, late, overdue_open)]
+        for code in np.nonzero(counts[0])[0]:
+            overdue.append({'project': self.project_ids[code], 'due': int(counts[0][code]), 'on_time': int(counts[1][code]),
+                            'late': int(counts[2][code]), 'open': int(counts[3][code])})
+        overdue.sort(key=lambda item: -item['due'])
+
+        # 优先级和标签分布
+        priority_total = np.bincount(self.priority[in_period], minlength=6)
+        priority_done = np.bincount(self.priority[done_in_period], minlength=6)
+        tag_mask = in_period[self.tag_task]
+        tag_total = np.bincount(self.tag_code[tag_mask], minlength=len(self.tag_names))
+        tag_done = np.bincount(self.tag_code[tag_mask & self.done[self.tag_task]], minlength=len(self.tag_names))
+        tags = [{'tag': self.tag_names[code], 'total': int(tag_total[code]), 'done': int(tag_done[code])}
+                for code in np.argsort(-tag_total, kind='stable') if tag_total[code]]
+
+        return {
+            'total': int(in_period.sum()),
+            'done': int(done_in_period.sum()),
+            'buckets': labels,
+            'projects': rows,
+            'lead': self._lead_summary(lead),
+            'lead_projects': lead_projects,
+            'overdue': {'due': int(due.sum()), 'on_time': int(on_time.sum()), 'late': int(late.sum()), 'open': int(overdue_open.sum())},
+            'overdue_projects': overdue,
+            'priority': [{'priority': value, 'total': int(priority_total[value]), 'done': int(priority_done[value])}
+                         for value, _ in PRIORITY_LABELS],
+            'tags': tags,
+        }
+
+    @staticmethod
+    def _lead_summary(values: "np.ndarray", **extra) -> Dict[str, Any]:
+        if not values.size:
+            return dict(extra, count=0)
+        return dict(extra, count=int(values.size), mean=_round(values.mean()),
+                    median=_round(np.median(values)), p90=_round(np.percentile(values, 90)))
+
+
+def _rate(done: int, total: int) -> str:
+    return f"{done}/{total}（{done / total:.0%}）" if total else "-"
+
+
+def _days(summary: Dict[str, Any], key: str) -> str:
+    return f"{summary[key]:.1f}" if summary.get('count') else "-"
+
+
+def render_stats(title: str, stats: Dict[str, Any], project_names: Dict[str, str]) -> str:
+    """
+    把统计结果渲染为 Markdown（不含 Front Matter）
+
+    参数:
+        title: 页面标题
+        stats: TaskColumns.period_stats 的返回值
+        project_names: 项目 ID -> 项目名称
+
+    返回:
+        Markdown 文本
+    """
+    def name(project_id: str) -> str:
+        return project_names.get(project_id) or project_id or '未知清单'
+
+    lead = stats['lead']
+    overdue = stats['overdue']
+    content = f"# {title}\n\n"
+    content += "## 概览\n\n| 指标 | 数值 |\n| --- | --- |\n"
+    content += f"| 任务数 | {stats['total']} |\n"
+    content += f"| 完成率 | {_rate(stats['done'], stats['total'])} |\n"
+    content += f"| 前置时间（天，平均 / 中位数 / P90） | {_days(lead, 'mean')} / {_days(lead, 'median')} / {_days(lead, 'p90')} |\n"
+    content += f"| 到期任务 | {overdue['due']} |\n"
+    content += f"| 逾期完成 | {overdue['late']} |\n"
+    content += f"| 逾期未完成 | {overdue['open']} |\n\n"
+
+    if stats['projects']:
+        content += "## 各清单完成率\n\n"
+        content += "| 清单 | " + " | ".join(stats['buckets']) + " | 合计 |\n"
+        content += "| --- |" + " --- |" * (len(stats['buckets']) + 1) + "\n"
+        for row in stats['projects']:
+            cells = [_rate(done, total) for done, total in zip(row['done'], row['total'])]
+            cells.append(_rate(sum(row['done']), sum(row['total'])))
+            content += f"| {name(row['project'])} | " + " | ".join(cells) + " |\n"
+        content += "\n"
+
+    if stats['lead_projects']:
+        content += "## 前置时间（创建 → 完成，天）\n\n| 清单 | 完成数 | 平均 | 中位数 | P90 |\n| --- | --- | --- | --- | --- |\n"
+        for row in stats['lead_projects']:
+            content += f"| {name(row['project'])} | {row['count']} | {_days(row, 'mean')} | {_days(row, 'median')} | {_days(row, 'p90')} |\n"
+        content += "\n"
+
+    if stats['overdue_projects']:
+        content += "## 截止日期\n\n| 清单 | 到期 | 按期完成 | 逾期完成 | 逾期未完成 |\n| --- | --- | --- | --- | --- |\n"
+        for row in stats['overdue_projects']:
+            content += f"| {name(row['project'])} | {row['due']} | {row['on_time']} | {row['late']} | {row['open']} |\n"
+        content += "\n"
+
+    if stats['total']:
+        labels = dict(PRIORITY_LABELS)
+        content += "## 优先级分布\n\n| 优先级 | 任务数 | 完成率 |\n| --- | --- | --- |\n"
+        for row in stats['priority']:
+            content += f"| {labels[row['priority']]} | {row['total']} | {_rate(row['done'], row['total'])} |\n"
+        content += "\n"
+
+    if stats['tags']:
+        content += "## 标签分布\n\n| 标签 | 任务数 | 完成率 |\n| --- | --- | --- |\n"
+        for row in stats['tags']:
+            content += f"| {row['tag']} | {row['total']} | {_rate(row['done'], row['total'])} |\n"
+        content += "\n"
+    return content
@@ -0,0 +1,291 @@
+import os
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+from Dida365Client import DEFAULT_HEADERS, Dida365Client
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖，未安装时只能使用同步客户端
+    aiohttp = None
+
+
+def async_available() -> bool:
+    """
+    是否可以使用异步客户端（已安装 aiohttp）
+    """
+    return aiohttp is not None
+
+
+class AsyncHttpPool:
+    """
+    异步 HTTP 连接池
+
+    同一事件循环中的所有异步客户端（滴答清单、Memos）共享一个 aiohttp 会话和连接池，
+    并用信号量限制同时进行中的请求数（环境变量 ASYNC_CONCURRENCY，默认 32）。
+
+    用法:
+        async with AsyncHttpPool() as pool:
+            client = AsyncDida365Client(pool=pool)
+            ...
+    """
+
+    def __init__(self, concurrency: Optional[int] = None):
+        """
+        初始化连接池
+
+        参数:
+            concurrency: 最大并发请求数，默认读取环境变量 ASYNC_CONCURRENCY
+        """
+        if aiohttp is None:
+            raise RuntimeError("异步客户端需要安装 aiohttp：pip install aiohttp")
+        self.concurrency = concurrency or int(os.getenv('ASYNC_CONCURRENCY', '32'))
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.session: Optional["aiohttp.ClientSession"] = None
+
+    async def __aenter__(self) -> "AsyncHttpPool":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self.session = aiohttp.ClientSession(connector=connector)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def request_json(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                           params: Optional[dict] = None, data: Any = None) -> Any:
+        """
+        发送请求并解析 JSON 响应
+
+        参数:
+            method: 请求方法
+            url: 完整地址
+            headers: 请求头
+            params: 查询参数（值为 None 的参数会被忽略）
+            data: JSON 请求体
+
+        返回:
+            解析后的 JSON 数据
+        """
+        await self.open()
+        if params:
+            # aiohttp 不接受 None 和 bool 类型的查询参数
+            params = {k: str(v).lower() if isinstance(v, bool) else str(v) for k, v in params.items() if v is not None}
+        async with self._semaphore:
+            async with self.session.request(method, url, headers=headers, params=params, json=data) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+
+class AsyncDida365Client:
+    """
+    基于 asyncio 的滴答清单客户端
+
+    方法与 Dida365Client 一一对应（均为协程），登录状态同样保存在 .env（或多账号模式下账号的 Token 文件）中，两种客户端可以共用 token。
+    适合评论、按项目获取已完成任务、回溯历史窗口等需要大量并发请求的场景：
+
+        async with AsyncHttpPool() as pool:
+            client = AsyncDida365Client(pool=pool)
+            await client.ensure_login()
+            comments = await asyncio.gather(*(client.get_task_comments(p, t) for p, t in pairs))
+    """
+
+    # 与同步客户端共用 token 的读取和保存逻辑
+    _load_token_from_env = Dida365Client._load_token_from_env
+    _load_token_from_file = Dida365Client._load_token_from_file
+    _save_token = Dida365Client._save_token
+    _save_token_to_env = Dida365Client._save_token_to_env
+
+    def __init__(self, username: Optional[str] = None, password: Optional[str] = None,
+                 pool: Optional[AsyncHttpPool] = None, token_file: Optional[str] = None):
+        """
+        初始化异步滴答清单客户端（不会立即登录，首次请求前调用 ensure_login）
+
+        参数:
+            username: 用户名/邮箱，如果不提供则从环境变量 DIDA365_USERNAME 读取
+            password: 密码，如果不提供则从环境变量 DIDA365_PASSWORD 读取
+            pool: 共享的连接池，默认新建一个
+            token_file: 保存登录 Token 的 JSON 文件（多账号时每个账号一个），默认读写 .env 中的 DIDA365_TOKEN
+        """
+        self.username = username or os.getenv('DIDA365_USERNAME')
+        self.password = password or os.getenv('DIDA365_PASSWORD')
+        self.pool = pool or AsyncHttpPool()
+        self.base_url = "https://api.dida365.com/api/v2"
+        self.headers = dict(DEFAULT_HEADERS)
+        self.token: Optional[str] = None
+        self.inbox_id: Optional[str] = None
+        self.last_login_time: Optional[datetime] = None
+        self.token_file = token_file
+        if token_file:
+            self._load_token_from_file()
+        else:
+            self._load_token_from_env()
+
+    @classmethod
+    def from_client(cls, client: Dida365Client, pool: Optional[AsyncHttpPool] = None) -> "AsyncDida365Client":
+        """
+        复用已登录的同步客户端的账号、token 和请求头创建异步客户端
+        """
+        async_client = cls(client.username, client.password, pool, client.token_file)
+        async_client.headers = dict(client.headers)
+        async_client.token = client.token
+        async_client.inbox_id = client.inbox_id
+        async_client.last_login_time = client.last_login_time
+        return async_client
+
+    async def ensure_login(self):
+        """
+        没有 token 或 token 超过一天时重新登录
+        """
+        if not self.token or (self.last_login_time and (datetime.now() - self.last_login_time) > timedelta(days=1)):
+            await self.login()
+        else:
+            self.headers["Cookie"] = f"t={self.token}"
+
+    async def login(self):
+        """登录获取token并更新登录时间"""
+        if not self.username or not self.password:
+            raise ValueError("请提供账号信息：DIDA365_USERNAME、DIDA365_PASSWORD")
+        print("登录获取Token")
+        data = await self.pool.request_json(
+            "POST",
+            f"{self.base_url}/user/signon?wc=true&remember=true",
+            headers=self.headers,
+            data={"password": self.password, "username": self.username}
+        )
+        self.token = data["token"]
+        self.inbox_id = data["inboxId"]
+        self.headers["Cookie"] = f"t={self.token}"
+        self.last_login_time = datetime.now()
+        self._save_token()
+
+    async def _make_request(self, method: str, endpoint: str, params=None, data=None) -> Any:
+        """通用的请求方法"""
+        url = f"{self.base_url}/{endpoint}"
+        # 处理URL中的路径变量
+        url = url.replace("${projectId}", params.get("projectId", "")) if params else url
+        url = url.replace("${taskId}", params.get("taskId", "")) if params else url
+        return await self.pool.request_json(method, url, headers=self.headers, params=params, data=data)
+
+    async def get_projects(self) -> Dict:
+        """获取所有的项目列表"""
+        return await self._make_request("GET", "projects")
+
+    async def get_all_data(self) -> Dict:
+        """获取项目列表、任务列表、标签列表"""
+        return await self._make_request("GET", "batch/check/0")
+
+    async def get_sync_changes(self, checkpoint: int) -> Dict:
+        """获取指定同步检查点之后的增量变化"""
+        return await self._make_request("GET", f"batch/check/{checkpoint}")
+
+    async def get_project_tasks(self, project_id: str, to_date: str, limit: int = 50) -> Dict:
+        """获取项目中的任务列表"""
+        params = {"from": "", "to": to_date, "limit": limit}
+        return await self._make_request("GET", f"project/{project_id}/completed/", params=params)
+
+    async def get_task(self, task_id: str) -> Dict:
+        """获取任务信息"""
+        return await self._make_request("GET", f"task/{task_id}")
+
+    async def get_completed_tasks(self, from_date: str, to_date: str, limit: int = 50) -> Dict:
+        """获取已完成任务列表"""
+        params = {"from": from_date, "to": to_date, "limit": limit}
+        return await self._make_request("GET", "project/all/completed", params=params)
+
+    async def get_abandoned_tasks(self, status: str = "Abandoned", limit: int = 10) -> Dict:
+        """获取已放弃任务列表"""
+        params = {"from": "", "to": "", "status": status, "limit": limit}
+        return await self._make_request("GET", "project/all/closed", params=params)
+
+    async def get_task_comments(self, project_id: str, task_id: str) -> Dict:
+        """获取任务的评论内容"""
+        params = {"projectId": project_id, "taskId": task_id}
+        return await self._make_request("GET", "project/${projectId}/task/${taskId}/comments", params=params)
+
+    async def get_trash_tasks(self) -> Dict:
+        """获取垃圾箱内的任务列表"""
+        return await self._make_request("GET", "project/all/trash/pagination")
+
+    async def get_habits(self) -> Dict:
+        """获取习惯列表"""
+        return await self._make_request("GET", "habits")
+
+    async def get_habits_checkins(self, after_stamp: str, habitIds: List) -> Dict:
+        """获取习惯打卡列表"""
+        data = {"afterStamp": after_stamp, "habitIds": habitIds}
+        return await self._make_request("POST", "habitCheckins/query", data=data)
+
+    async def get_many_task_comments(self, pairs: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        并发获取多个任务的评论，单个任务失败不影响其他任务
+
+        参数:
+            pairs: (projectId, taskId) 的可迭代对象
+
+        返回:
+            taskId -> 评论列表；获取失败的任务不包含在结果中
+        """
+        pairs = list(pairs)
+        results = await asyncio.gather(
+            *(self.get_task_comments(project_id, task_id) for project_id, task_id in pairs),
+            return_exceptions=True
+        )
+        comments = {}
+        for (_, task_id), result in zip(pairs, results):
+            if isinstance(result, Exception):
+                print(f"获取任务评论失败: {task_id} ({result})")
+            else:
+                comments[task_id] = result
+        return comments
+
+
+def fetch_task_comments(client: Dida365Client, pairs: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    在同步代码中并发获取多个任务的评论（复用同步客户端的登录状态）
+
+    客户端设置了会话（多账号模式的 Accounts.AccountSession）时，不另开异步连接池，
+    而是在线程中通过该会话并发请求，每个请求都受账号限速和共享连接池公平调度的约束。
+
+    参数:
+        client: 已登录的 Dida365Client
+        pairs: (projectId, taskId) 的可迭代对象
+
+    返回:
+        taskId -> 评论列表
+    """
+    if client.session is not None:
+        return _fetch_comments_with_session(client, list(pairs))
+
+    async def run():
+        async with AsyncHttpPool() as pool:
+            return await AsyncDida365Client.from_client(client, pool).get_many_task_comments(pairs)
+    return asyncio.run(run())
+
+
+def _fetch_comments_with_session(client: Dida365Client, pairs: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    在线程池中通过同步客户端的会话并发获取评论（并发数 ASYNC_CONCURRENCY，实际并发受会话的调度限制）
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    if not pairs:
+        return {}
+    workers = min(len(pairs), int(os.getenv('ASYNC_CONCURRENCY', '32')))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [(task_id, executor.submit(client.get_task_comments, project_id, task_id))
+                   for project_id, task_id in pairs]
+    comments = {}
+    for task_id, future in futures:
+        try:
+            comments[task_id] = future.result()
+        except Exception as e:
+            print(f"获取任务评论失败: {task_id} ({e})")
+    return comments
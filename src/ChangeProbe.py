@@ -0,0 +1,111 @@
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from StateStore import load_json, save_json
+
+
+class ChangeProbe:
+    """
+    变化探测与自适应轮询
+
+    在执行完整导出前先用很小的请求判断数据是否有变化（如滴答清单的同步检查点和当天打卡、Memos 最近一页的标记），
+    没有变化时直接退出。轮询间隔在数据空闲时逐步加倍，有变化时恢复到最小间隔：
+
+    - POLL_MIN_MINUTES：最小轮询间隔（分钟，默认 5）
+    - POLL_MAX_MINUTES：最大轮询间隔（分钟，默认 60）
+    - PROBE_FULL_RUN_MINUTES：距上次完整导出超过该时间或跨天时，不经探测直接完整导出（默认 60），
+      用于覆盖探测无法发现的变化（如补打更早日期的卡）
+
+    状态保存在状态目录下的 probe_<name>.json 中。
+    """
+
+    def __init__(self, state_dir: str, name: str):
+        """
+        初始化变化探测器
+
+        参数:
+            state_dir: 状态目录
+            name: 数据源名称（如 dida365、memos），每个数据源独立调度
+        """
+        self.path = os.path.join(state_dir, f"probe_{name}.json")
+        self.state: Dict[str, Any] = load_json(self.path, {}) or {}
+        self.min_minutes = float(os.getenv('POLL_MIN_MINUTES', '5'))
+        self.max_minutes = float(os.getenv('POLL_MAX_MINUTES', '60'))
+        self.full_run_minutes = float(os.getenv('PROBE_FULL_RUN_MINUTES', '60'))
+
+    @staticmethod
+    def enabled() -> bool:
+        """
+        是否启用变化探测（环境变量 PROBE_ENABLED，默认启用）
+        """
+        return os.getenv('PROBE_ENABLED', 'true').lower() == 'true'
+
+    def _get_time(self, key: str) -> Optional[datetime]:
+        value = self.state.get(key)
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+
+    @property
+    def markers(self) -> Dict[str, Any]:
+        """
+        上次完整导出时记录的变化标记（如检查点、etag）
+        """
+        return self.state.setdefault('markers', {})
+
+    @property
+    def next_probe_at(self) -> Optional[datetime]:
+        return self._get_time('next_probe_at')
+
+    def due(self, now: datetime) -> bool:
+        """
+        是否到了下次探测的时间
+        """
+        next_probe_at = self.next_probe_at
+        return next_probe_at is None or now >= next_probe_at
+
+    def needs_full_run(self, now: datetime) -> bool:
+        """
+        是否需要不经探测直接完整导出（从未导出、跨天或距上次完整导出过久）
+        """
+        last_full_run = self._get_time('last_full_run')
+        if last_full_run is None or not self.markers:
+            return True
+        if last_full_run.date() != now.date():
+            return True
+        return now - last_full_run >= timedelta(minutes=self.full_run_minutes)
+
+    def record_idle(self, now: datetime):
+        """
+        记录一次没有变化的探测，轮询间隔加倍（不超过最大间隔）
+        """
+        interval = float(self.state.get('interval_minutes') or self.min_minutes)
+        interval = min(interval * 2, self.max_minutes)
+        self._schedule(now, interval)
+        print(f"没有变化，下次探测间隔 {interval:g} 分钟")
+
+    def record_full_run(self, now: datetime, changed: bool = True, **markers):
+        """
+        记录一次完整导出及新的变化标记
+
+        参数:
+            now: 当前时间
+            changed: 本次导出是否发现了变化，有变化时轮询间隔恢复到最小值
+            markers: 新的变化标记
+        """
+        self.markers.update(markers)
+        self.state['last_full_run'] = now.isoformat()
+        if changed:
+            interval = self.min_minutes
+        else:
+            interval = float(self.state.get('interval_minutes') or self.min_minutes)
+        self._schedule(now, interval)
+
+    def _schedule(self, now: datetime, interval: float):
+        self.state['interval_minutes'] = interval
+        # 预留 30 秒余量，避免 cron 的触发时间抖动导致错过本应执行的探测
+        self.state['next_probe_at'] = (now + timedelta(minutes=interval, seconds=-30)).isoformat()
+        save_json(self.path, self.state)
@@ -0,0 +1,110 @@
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional
+from StateStore import load_json, save_json
+
+
+def iter_months(start: datetime, end: datetime):
+    """
+    按月遍历时间范围，产出每个月的 (月初 00:00:00, 月末 23:59:59)
+    """
+    current = datetime(start.year, start.month, 1)
+    while current <= end:
+        if current.month == 12:
+            next_month = datetime(current.year + 1, 1, 1)
+        else:
+            next_month = datetime(current.year, current.month + 1, 1)
+        yield current, next_month - timedelta(seconds=1)
+        current = next_month
+
+
+class CompletedTaskCache:
+    """
+    已完成任务的按月缓存
+
+    已经结束的月份几乎不会再变化，因此每个月的已完成任务在该月结束后获取一次，
+    之后视为不可变，直接从本地缓存读取；只有仍未结束的月份会在每次运行时重新获取。
+    可通过 COMPLETED_CACHE_REVALIDATE_DAYS 设置已结束月份的重新校验间隔（天，默认 0 表示永不重新获取）。
+
+    已结束月份中之后被删除或重新打开的任务不会再出现在该月的获取结果里，
+    因此读取缓存时会剔除调用方给出的这些任务 ID，并同时从缓存文件中移除。
+
+    缓存保存在状态目录下的 completed/<YYYY-MM>.json 中。
+    """
+
+    def __init__(self, state_dir: str):
+        """
+        初始化已完成任务缓存
+
+        参数:
+            state_dir: 状态目录
+        """
+        self.cache_dir = os.path.join(state_dir, 'completed')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.revalidate_days = float(os.getenv('COMPLETED_CACHE_REVALIDATE_DAYS', '0'))
+
+    @staticmethod
+    def enabled() -> bool:
+        """
+        是否启用已完成任务缓存（环境变量 COMPLETED_CACHE_ENABLED，默认启用）
+        """
+        return os.getenv('COMPLETED_CACHE_ENABLED', 'true').lower() == 'true'
+
+    def _path(self, month_start: datetime) -> str:
+        return os.path.join(self.cache_dir, f"{month_start.strftime('%Y-%m')}.json")
+
+    def _is_fresh(self, cached: Optional[dict], now: datetime) -> bool:
+        """
+        缓存是否可以直接使用：已在月份结束后获取，且未超过重新校验间隔
+        """
+        if not cached or not cached.get('closed'):
+            return False
+        if self.revalidate_days <= 0:
+            return True
+        try:
+            fetched_at = datetime.fromisoformat(cached.get('fetched_at', ''))
+        except ValueError:
+            return False
+        return now - fetched_at < timedelta(days=self.revalidate_days)
+
+    def get_range(self, start: datetime, end: datetime,
+                  fetch: Callable[[datetime, datetime], List[dict]],
+                  now: Optional[datetime] = None,
+                  evict_ids: Iterable[str] = ()) -> List[dict]:
+        """
+        获取时间范围内（按整月）的已完成任务
+
+        参数:
+            start: 开始时间
+            end: 结束时间
+            fetch: 获取某个月份已完成任务的函数 fetch(month_start, month_end)
+            now: 当前时间，默认 datetime.now()
+            evict_ids: 已被删除或重新打开的任务 ID，从已缓存的月份中剔除
+
+        返回:
+            已完成任务的原始字典列表（覆盖 start 和 end 所在的整月）
+        """
+        now = now or datetime.now()
+        evict_ids = set(evict_ids)
+        tasks: List[dict] = []
+        for month_start, month_end in iter_months(start, end):
+            path = self._path(month_start)
+            cached = load_json(path)
+            if self._is_fresh(cached, now):
+                print(f"使用已完成任务缓存: {month_start.strftime('%Y-%m')}")
+                month_tasks = cached.get('tasks', [])
+                kept = [task for task in month_tasks if not task or task.get('id') not in evict_ids]
+                if len(kept) != len(month_tasks):
+                    print(f"从已完成任务缓存中移除 {len(month_tasks) - len(kept)} 个已删除或重新打开的任务")
+                    save_json(path, {**cached, 'tasks': kept})
+                tasks.extend(kept)
+                continue
+            month_tasks = fetch(month_start, month_end)
+            save_json(path, {
+                'fetched_at': now.isoformat(),
+                # 只有在月份结束后获取的结果才视为不可变
+                'closed': now > month_end,
+                'tasks': month_tasks,
+            })
+            tasks.extend(month_tasks)
+        return tasks
@@ -0,0 +1,103 @@
+import os
+import time
+import traceback
+from datetime import datetime
+from typing import TYPE_CHECKING
+from dotenv import load_dotenv
+
+from ChangeProbe import ChangeProbe
+from StateStore import get_output_dir, get_state_dir
+
+if TYPE_CHECKING:
+    from PushListener import PushListener
+
+# 加载 .env 文件
+load_dotenv()
+
+
+def run_dida(force: bool = False):
+    import Dida365Exporter  # 延迟导入：只在真正执行导出时加载
+    try:
+        Dida365Exporter.main(force=force)
+    except Exception:
+        print("滴答清单导出失败：")
+        traceback.print_exc()
+
+
+def run_memos():
+    if not os.getenv('MEMOS_API'):
+        return
+    import MemosExporter  # 延迟导入：只在真正执行导出时加载
+    try:
+        MemosExporter.main()
+    except Exception:
+        print("Memos 导出失败：")
+        traceback.print_exc()
+
+
+def run_once():
+    """
+    执行一轮导出；每个导出器根据自己的变化探测状态决定是否真正执行
+    """
+    run_dida()
+    run_memos()
+
+
+def push_headers() -> dict:
+    """
+    推送通道的握手请求头（使用已登录客户端的 Cookie 和设备信息）
+
+    每次重连时调用：新建的客户端会读取最新保存的 Token，过期时重新登录。
+    """
+    from Dida365Client import Dida365Client
+    client = Dida365Client()
+    return {
+        "Cookie": client.headers.get("Cookie", ""),
+        "User-Agent": client.headers["user-agent"],
+        "Origin": "https://dida365.com",
+    }
+
+
+def start_push_listener() -> "PushListener":
+    """
+    启动滴答清单推送监听器
+    """
+    from PushListener import PushListener
+    url = os.getenv('DIDA365_WS_URL', 'wss://wss.dida365.com/web')
+    listener = PushListener(url, headers_factory=push_headers)
+    listener.start()
+    return listener
+
+
+def main():
+    """
+    守护进程模式：常驻运行，按自适应间隔轮询
+
+    每隔 DAEMON_TICK_SECONDS 秒（默认 30）检查一次，是否真正发起请求由各导出器的变化探测决定：
+    数据空闲时探测间隔逐步加倍，有变化时恢复到 POLL_MIN_MINUTES。
+
+    设置 DIDA365_PUSH=true 时额外连接滴答清单的 WebSocket 推送通道：
+    连接期间收到变化通知后立即执行增量导出，不再定时探测（仍按 PROBE_FULL_RUN_MINUTES 定期完整导出）；
+    连接断开时自动退回轮询。
+    """
+    tick = float(os.getenv('DAEMON_TICK_SECONDS', '30'))
+    listener = None
+    if os.getenv('DIDA365_PUSH', 'false').lower() == 'true':
+        listener = start_push_listener()
+    state_dir = get_state_dir(get_output_dir())
+    print(f"守护进程已启动，检查间隔 {tick:g} 秒")
+    while True:
+        if listener and listener.connected:
+            if listener.wait_for_change(tick):
+                print("收到推送通知，开始增量导出")
+                run_dida(force=True)
+            elif ChangeProbe(state_dir, 'dida365').needs_full_run(datetime.now()):
+                run_dida(force=True)
+            run_memos()
+        else:
+            run_once()
+            time.sleep(tick)
+
+
+if __name__ == "__main__":
+    main()
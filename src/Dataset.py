@@ -0,0 +1,284 @@
+import os
+import json
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set
+
+
+# 每个数据表在 SQLite 中额外展开的查询列（其余字段保存在 data 列的 JSON 中）
+TABLE_COLUMNS: Dict[str, List[str]] = {
+    'tasks': ['projectId', 'parentId', 'title', 'status', 'priority', 'startDate', 'dueDate',
+              'completedTime', 'createdTime', 'modifiedTime'],
+    'projects': ['name', 'closed', 'sortOrder', 'modifiedTime'],
+    'habits': ['name', 'status', 'totalCheckIns', 'modifiedTime'],
+    'checkins': ['habitId', 'checkinStamp', 'status', 'checkinTime'],
+    'memos': ['rowStatus', 'createdTs', 'updatedTs', 'content'],
+}
+
+
+def to_record(obj) -> dict:
+    """
+    将数据模型对象转换为可序列化的记录，去掉以下划线开头的预处理字段
+
+    参数:
+        obj: Task、Project、Habit、MemosRecord 等数据模型对象或字典
+
+    返回:
+        字典记录
+    """
+    data = obj if isinstance(obj, dict) else obj.to_dict()
+    return {key: value for key, value in data.items() if not key.startswith('_')}
+
+
+def record_id(table: str, record: dict) -> Optional[str]:
+    """
+    获取记录的主键
+
+    参数:
+        table: 数据表名
+        record: 记录
+
+    返回:
+        主键字符串，无法确定时返回 None
+    """
+    if table == 'checkins' and not record.get('id'):
+        if record.get('habitId') and record.get('checkinStamp'):
+            return f"{record['habitId']}:{record['checkinStamp']}"
+        return None
+    value = record.get('id') or record.get('name')
+    return str(value) if value is not None else None
+
+
+class Dataset:
+    """
+    机器可读的任务/Memos 数据集
+
+    与 Markdown 一同导出，每个数据表一个 JSON Lines 文件（tasks、projects、habits、checkins、memos），
+    可选同时写入一个 SQLite 文件，便于仪表盘和脚本直接查询，而不必扫描整个 Obsidian 仓库。
+
+    数据集按主键增量更新：变化的记录和删除标记（{"id": 主键, "_deleted": true}）追加到 JSONL 文件末尾，
+    读取时同一主键以最后一行为准；被覆盖或删除的行超过一半时才重写（压缩）整个文件。
+    SQLite 中只写入变化和删除的行。
+    """
+
+    def __init__(self, output_dir: str):
+        """
+        初始化数据集
+
+        参数:
+            output_dir: 输出目录，数据集位于其下的 DATASET_DIR（默认 Dataset）目录
+        """
+        self.dataset_dir = os.path.join(output_dir, os.getenv('DATASET_DIR', 'Dataset'))
+        os.makedirs(self.dataset_dir, exist_ok=True)
+        self.sqlite_path = os.path.join(self.dataset_dir, 'dataset.sqlite')
+        self.sqlite_enabled = os.getenv('DATASET_SQLITE', 'false').lower() == 'true'
+        # 数据表名 -> {主键: 记录}
+        self._tables: Dict[str, Dict[str, dict]] = {}
+        # 数据表名 -> 变化的主键 / 删除的主键
+        self._upserts: Dict[str, Set[str]] = {}
+        self._deletes: Dict[str, Set[str]] = {}
+        # 数据表名 -> JSONL 文件中的行数（包括已被覆盖的行和删除标记）
+        self._lines: Dict[str, int] = {}
+
+    def _jsonl_path(self, table: str) -> str:
+        return os.path.join(self.dataset_dir, f"{table}.jsonl")
+
+    def _load(self, table: str) -> Dict[str, dict]:
+        """
+        读取数据表（每次运行只读取一次）
+        """
+        if table in self._tables:
+            return self._tables[table]
+        records: Dict[str, dict] = {}
+        lines = 0
+        path = self._jsonl_path(table)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    key = record_id(table, record)
+                    if not key:
+                        continue
+                    # 后出现的行覆盖先出现的行，删除标记移除记录
+                    if record.get('_deleted'):
+                        records.pop(key, None)
+                    else:
+                        records[key] = record
+        self._tables[table] = records
+        self._lines[table] = lines
+        self._upserts.setdefault(table, set())
+        self._deletes.setdefault(table, set())
+        return records
+
+    def records(self, table: str) -> List[dict]:
+        """
+        返回数据表中的全部记录
+
+        参数:
+            table: 数据表名
+
+        返回:
+            记录列表
+        """
+        return list(self._load(table).values())
+
+    def upsert(self, table: str, items: Iterable) -> int:
+        """
+        插入或更新记录
+
+        参数:
+            table: 数据表名
+            items: 数据模型对象或字典
+
+        返回:
+            实际发生变化的记录数
+        """
+        records = self._load(table)
+        changed = 0
+        for item in items:
+            record = to_record(item)
+            key = record_id(table, record)
+            if not key or records.get(key) == record:
+                continue
+            records[key] = record
+            self._upserts[table].add(key)
+            self._deletes[table].discard(key)
+            changed += 1
+        return changed
+
+    def delete(self, table: str, ids: Iterable[str]) -> int:
+        """
+        删除记录
+
+        参数:
+            table: 数据表名
+            ids: 要删除的主键
+
+        返回:
+            实际删除的记录数
+        """
+        records = self._load(table)
+        deleted = 0
+        for key in ids:
+            key = str(key)
+            if records.pop(key, None) is not None:
+                self._deletes[table].add(key)
+                self._upserts[table].discard(key)
+                deleted += 1
+        return deleted
+
+    def replace(self, table: str, items: Iterable) -> int:
+        """
+        用完整的记录集合替换数据表（不在集合中的记录会被删除）
+
+        参数:
+            table: 数据表名
+            items: 数据模型对象或字典
+
+        返回:
+            发生变化的记录数（包括删除）
+        """
+        records = [to_record(item) for item in items]
+        keys = {record_id(table, record) for record in records}
+        stale = [key for key in self._load(table) if key not in keys]
+        return self.upsert(table, records) + self.delete(table, stale)
+
+    def save(self):
+        """
+        将变化追加到 JSONL（必要时压缩，见类说明），并写入可选的 SQLite
+        """
+        for table, records in self._tables.items():
+            upserts = self._upserts.get(table, set())
+            deletes = self._deletes.get(table, set())
+            path = self._jsonl_path(table)
+            if not upserts and not deletes and os.path.exists(path):
+                continue
+            lines = self._lines.get(table, 0) + len(upserts) + len(deletes)
+            if not os.path.exists(path) or lines - len(records) > len(records):
+                note = "，已压缩" if os.path.exists(path) else ""
+                self._compact(table)
+            else:
+                self._append(table, upserts, deletes)
+                self._lines[table] = lines
+                note = ""
+            print(f"已更新数据集 {table}.jsonl：变化 {len(upserts)} 条，删除 {len(deletes)} 条{note}")
+        if self.sqlite_enabled:
+            self._save_sqlite()
+        for table in self._tables:
+            self._upserts[table] = set()
+            self._deletes[table] = set()
+
+    @staticmethod
+    def _dumps(record: dict) -> str:
+        return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+
+    def _append(self, table: str, upserts: Set[str], deletes: Set[str]):
+        """
+        把变化的记录和删除标记追加到 JSONL 文件末尾
+        """
+        path = self._jsonl_path(table)
+        records = self._tables[table]
+        with open(path, 'rb+') as f:
+            # 上次写入中途被打断时最后一行可能不完整，先补上换行，避免与新追加的行连在一起
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            chunk = "".join(self._dumps(records[key]) for key in sorted(upserts))
+            chunk += "".join(self._dumps({'id': key, '_deleted': True}) for key in sorted(deletes))
+            f.write(chunk.encode('utf-8'))
+
+    def _compact(self, table: str):
+        """
+        重写整个 JSONL 文件，只保留每个主键的最新记录
+        """
+        path = self._jsonl_path(table)
+        records = self._tables[table]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key in sorted(records):
+                f.write(self._dumps(records[key]))
+        os.replace(tmp_path, path)
+        self._lines[table] = len(records)
+
+    def _save_sqlite(self):
+        """
+        将变化写入 SQLite（表不存在或为空时写入全部记录）
+        """
+        conn = sqlite3.connect(self.sqlite_path)
+        try:
+            for table, records in self._tables.items():
+                columns = TABLE_COLUMNS.get(table, [])
+                column_defs = ''.join(f', "{column}"' for column in columns)
+                conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (id TEXT PRIMARY KEY{column_defs}, data TEXT NOT NULL)')
+                row_count = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                upserts = set(records) if row_count == 0 else self._upserts.get(table, set())
+                deletes = self._deletes.get(table, set())
+                if deletes:
+                    conn.executemany(f'DELETE FROM "{table}" WHERE id = ?', [(key,) for key in deletes])
+                if upserts:
+                    placeholders = ', '.join('?' for _ in range(len(columns) + 2))
+                    rows = []
+                    for key in upserts:
+                        record = records[key]
+                        values = [self._sqlite_value(record.get(column)) for column in columns]
+                        rows.append([key] + values + [json.dumps(record, ensure_ascii=False)])
+                    conn.executemany(f'INSERT OR REPLACE INTO "{table}" VALUES ({placeholders})', rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _sqlite_value(value):
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, ensure_ascii=False)
+        if isinstance(value, bool):
+            return int(value)
+        return value
@@ -1,23 +1,49 @@
-import requests
 import json
 import os
-from typing import List, Dict, Optional
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 from dotenv import load_dotenv, set_key
 from datetime import datetime, timedelta  # 新增：用于时间处理
+from JsonStream import Targets, iter_json_paths
+from StateStore import load_json, save_json
 
 # 加载 .env 文件
 load_dotenv()
 
 ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".env")
 
+# 模拟网页版的请求头（同步和异步客户端共用）
+DEFAULT_HEADERS = {
+    "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
+    "x-device": "{\"platform\":\"web\",\"os\":\"Windows 10\",\"device\":\"Chrome 136.0.0.0\",\"name\":\"\",\"version\":6246,\"id\":\"66c5c4f4efae8477e84eb688\",\"channel\":\"website\",\"campaign\":\"\",\"websocket\":\"67e7de9bf92b296c741567e0\"}"
+}
+
+# batch/check 响应中需要流式解析的字段
+ALL_DATA_TARGETS: Targets = {
+    ("projectProfiles",): "items",
+    ("syncTaskBean", "update"): "items",
+    ("syncTaskBean", "delete"): "items",
+    ("checkPoint",): "value",
+}
+
+def _tee(chunks: Iterator[bytes], sink) -> Iterator[bytes]:
+    """
+    产出数据块的同时写入 sink（用于在流式解析时保存原始响应）
+    """
+    for chunk in chunks:
+        sink.write(chunk)
+        yield chunk
+
 class Dida365Client:
-    def __init__(self, username: Optional[str] = None, password: Optional[str] = None):
+    def __init__(self, username: Optional[str] = None, password: Optional[str] = None,
+                 session=None, token_file: Optional[str] = None):
         """
         初始化滴答清单客户端
         
         参数:
             username: 用户名/邮箱，如果不提供则从环境变量 DIDA365_USERNAME 读取
             password: 密码，如果不提供则从环境变量 DIDA365_PASSWORD 读取
+            session: 发起请求使用的会话（需提供 request 方法，如 Accounts.AccountSession），默认直接使用 requests
+            token_file: 保存登录 Token 的 JSON 文件（多账号时每个账号一个），默认读写 .env 中的 DIDA365_TOKEN
         """
         # 从环境变量或参数获取账号信息
         self.username = username or os.getenv('DIDA365_USERNAME')
@@ -32,15 +58,20 @@ class Dida365Client:
             )
         
         self.base_url = "https://api.dida365.com/api/v2"
-        self.headers = {
-            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36",
-            "x-device": "{\"platform\":\"web\",\"os\":\"Windows 10\",\"device\":\"Chrome 136.0.0.0\",\"name\":\"\",\"version\":6246,\"id\":\"66c5c4f4efae8477e84eb688\",\"channel\":\"website\",\"campaign\":\"\",\"websocket\":\"67e7de9bf92b296c741567e0\"}"
-        }
+        # 请求头会在登录后加入 Cookie，每个客户端使用自己的副本
+        self.headers = dict(DEFAULT_HEADERS)
         self.token: Optional[str] = None
         self.inbox_id: Optional[str] = None
         self.last_login_time: Optional[datetime] = None  # 新增：存储上次登录时间
-        # 优先尝试从 .env 读取 token 和上次登录时间
-        self._load_token_from_env()
+        # 原始响应快照写入器（Snapshot.SnapshotRecorder），设置后指定的响应会原样保存一份
+        self.recorder = None
+        self.session = session
+        self.token_file = token_file
+        # 优先尝试从 Token 文件或 .env 读取 token 和上次登录时间
+        if token_file:
+            self._load_token_from_file()
+        else:
+            self._load_token_from_env()
         if not self.token:
             self.login()
         else:
@@ -67,6 +98,27 @@ class Dida365Client:
             except ValueError:
                 pass
 
+    def _load_token_from_file(self):
+        data = load_json(self.token_file, {}) or {}
+        self.token = data.get('token')
+        self.inbox_id = data.get('inbox_id')
+        if data.get('last_login_time'):
+            try:
+                self.last_login_time = datetime.fromisoformat(data['last_login_time'])
+            except ValueError:
+                pass
+
+    def _save_token(self):
+        """保存 token 和上次登录时间（指定了 token_file 时写入该文件，否则写入 .env）"""
+        if not self.token_file:
+            self._save_token_to_env()
+            return
+        save_json(self.token_file, {
+            'token': self.token,
+            'inbox_id': self.inbox_id,
+            'last_login_time': datetime.now().isoformat(),
+        })
+
     def _save_token_to_env(self):
         # 更新 .env 文件中的 DIDA365_TOKEN 和上次登录时间
         assert self.token is not None, "Token不能为空"
@@ -86,7 +138,7 @@ class Dida365Client:
             "password": self.password,
             "username": self.username
         }
-        response = requests.request(
+        response = self._request(
             "POST",
             url,
             headers=self.headers,
@@ -99,15 +151,22 @@ class Dida365Client:
         # 在后续请求中设置Cookie
         self.headers["Cookie"] = f"t={self.token}"
         self.last_login_time = datetime.now()  # 更新登录时间
-        self._save_token_to_env()
+        self._save_token()
 
-    def _make_request(self, method: str, endpoint: str, params=None, data=None) -> Dict:
-        """通用的请求方法"""
+    def _request(self, method: str, url: str, **kwargs):
+        """发起 HTTP 请求：设置了 session 时通过它发起（共享连接池、限速），否则直接使用 requests"""
+        if self.session is not None:
+            return self.session.request(method, url, **kwargs)
+        import requests  # 延迟导入：只在真正发起请求时加载，加快探测和空跑的启动速度
+        return requests.request(method, url, **kwargs)
+
+    def _make_request(self, method: str, endpoint: str, params=None, data=None, record_as: Optional[str] = None) -> Dict:
+        """通用的请求方法（设置了 recorder 且指定 record_as 时保存原始响应）"""
         url = f"{self.base_url}/{endpoint}"
         # 处理URL中的路径变量
         url = url.replace("${projectId}", params.get("projectId", "")) if params else url
         url = url.replace("${taskId}", params.get("taskId", "")) if params else url
-        response = requests.request(
+        response = self._request(
             method,
             url,
             headers=self.headers,
@@ -115,15 +174,54 @@ class Dida365Client:
             json=data
         )
         response.raise_for_status()
+        if record_as and self.recorder:
+            self.recorder.write_bytes(record_as, response.content)
         return response.json()
 
+    def _stream_request(self, method: str, endpoint: str, targets: Targets, params=None, data=None, record_as: Optional[str] = None) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+        """
+        流式请求：边下载边解析响应，逐个产出目标路径上的值，内存占用与响应大小无关
+
+        参数:
+            targets: 路径 -> 'items' / 'value'，参见 JsonStream.iter_json_paths
+            record_as: 设置了 recorder 时，把原始响应边下载边写入该名称的快照
+        """
+        url = f"{self.base_url}/{endpoint}"
+        response = self._request(
+            method,
+            url,
+            headers=self.headers,
+            params=params,
+            json=data,
+            stream=True
+        )
+        record = self.recorder.open_stream(record_as) if record_as and self.recorder else None
+        try:
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size=65536)
+            if record:
+                chunks = _tee(chunks, record)
+            yield from iter_json_paths(chunks, targets)
+        finally:
+            response.close()
+            if record:
+                record.close()
+
     def get_projects(self) -> Dict:
         """获取所有的项目列表"""
         return self._make_request("GET", "projects")
     
     def get_all_data(self) -> Dict:
         """获取项目列表、任务列表、标签列表"""
-        return self._make_request("GET", "batch/check/0")
+        return self._make_request("GET", "batch/check/0", record_as="batch_check")
+
+    def get_sync_changes(self, checkpoint: int) -> Dict:
+        """获取指定同步检查点之后的增量变化（用于低成本地探测是否有变化）"""
+        return self._make_request("GET", f"batch/check/{checkpoint}")
+
+    def iter_all_data(self) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+        """流式获取项目列表和任务列表，逐个产出 (路径, 数据)，路径见 ALL_DATA_TARGETS"""
+        return self._stream_request("GET", "batch/check/0", ALL_DATA_TARGETS, record_as="batch_check")
     
     def get_project_tasks(self, project_id: str, to_date: str, limit: int = 50) -> Dict:
         """获取项目中的任务列表"""
@@ -171,7 +269,7 @@ class Dida365Client:
     
     def get_habits(self) -> Dict:
         """获取习惯列表"""
-        return self._make_request("GET", "habits")
+        return self._make_request("GET", "habits", record_as="habits")
 
     def get_habits_checkins(self, after_stamp: str, habitIds: List) -> Dict:
         """获取习惯打卡列表"""
@@ -179,7 +277,7 @@ class Dida365Client:
             "afterStamp": after_stamp,
             "habitIds": habitIds
         }
-        return self._make_request("POST", "habitCheckins/query", data=data) 
+        return self._make_request("POST", "habitCheckins/query", data=data, record_as="checkins") 
 
 # 使用示例
 if __name__ == "__main__":
@@ -1,8 +1,19 @@
 import os
-from Dida365Client import Dida365Client
+from Dida365Client import Dida365Client, ALL_DATA_TARGETS
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
-from Types import Task, Project, Habit
+from typing import Callable, List, Optional, Dict, Set, Tuple
+from Types import Task, Project, Habit, parse_api_time
+from StateStore import get_output_dir, get_state_dir, fingerprint
+from SummaryIndex import SummaryIndex, task_fingerprint, task_summary_keys, daily_key, weekly_key, monthly_key, parse_key
+from TaskHierarchy import TaskHierarchy
+from Recurrence import OccurrenceCache
+from JsonStream import iter_object_paths
+from ChangeProbe import ChangeProbe
+from CompletedCache import CompletedTaskCache
+from RunCheckpoint import RunCheckpoint
+from RunLock import RunLock
+from ExportRegistry import ExportRegistry, orphan_policy
+from TaskLayout import TaskLayout, safe_name
 from dotenv import load_dotenv
 
 # 加载 .env 文件
@@ -10,20 +21,19 @@ load_dotenv()
 
 class Exporter:
     
-    def __init__(self, projects, todo_tasks, completed_tasks, output_dir: Optional[str] = None):
+    def __init__(self, projects, todo_tasks, completed_tasks, output_dir: Optional[str] = None, window: Optional[Tuple[datetime, datetime]] = None, rebuild: bool = False, deleted_ids: Optional[Set[str]] = None):
         """
         初始化导出器
         
         参数:
             output_dir: 输出目录，如果不提供则从环境变量 OUTPUT_DIR 获取，如果都没有则使用当前目录
+            window: 已完成任务的获取窗口，默认为当月
+            rebuild: 是否忽略增量状态，重新渲染全部任务笔记、项目索引和窗口内的摘要（从快照回放、修改模板后重新生成）；
+                     此时只渲染，不保存摘要依赖索引和已导出文件登记表，也不处理孤立笔记，旧快照不会影响之后的增量导出
+            deleted_ids: 同步结果中被删除的任务 ID（syncTaskBean.delete），其笔记按 ORPHAN_POLICY 处理
         """
         # 确定输出目录：参数 > 环境变量 > 当前目录
-        if output_dir:
-            self.output_dir = output_dir
-        elif os.getenv('OUTPUT_DIR'):
-            self.output_dir = os.getenv('OUTPUT_DIR')
-        else:
-            self.output_dir = os.path.dirname(os.path.abspath(__file__))
+        self.output_dir = output_dir or get_output_dir()
         
         assert self.output_dir is not None, "输出目录不能为空"
 
@@ -44,11 +54,39 @@ class Exporter:
         tasks_inbox_dir = os.getenv('TASKS_INBOX_PATH', 'Inbox')
         self.tasks_inbox_dir = os.path.join(self.output_dir, tasks_inbox_dir)
         self.tasks_inbox_path = os.path.join(self.tasks_inbox_dir, 'TasksInbox.md')
+        # 项目索引方式：single 为单个 TasksInbox.md，project 为每个清单一个索引笔记加顶层索引
+        self.index_mode = 'project' if os.getenv('TASKS_INDEX_MODE', 'single').lower() == 'project' else 'single'
+        self.projects_dir = os.path.join(self.output_dir, os.getenv('PROJECTS_DIR', 'Projects'))
+        # 已删除任务的笔记归档目录
+        self.tasks_archive_dir = os.path.join(self.output_dir, os.getenv('TASKS_ARCHIVE_DIR', 'Archive/Tasks'))
         
         # 确保所有目录存在
         for dir_path in [self.calendar_dir, self.daily_dir, self.weekly_dir, self.monthly_dir, self.tasks_dir, self.tasks_inbox_dir]:
             self._ensure_dir(dir_path)
 
+        # 增量导出状态：记录任务参与的摘要文件，用于只重新渲染受影响的文件
+        self.state_dir = get_state_dir(self.output_dir)
+        self.summary_index = SummaryIndex(self.state_dir)
+        self.window = window or get_month_range(datetime.now())
+        self._affected_keys: Optional[set] = None
+        self._dirty_ids: Set[str] = set()
+        self.rebuild = rebuild
+        # 运行检查点：中途被杀时下次运行从中断处继续
+        self.checkpoint = RunCheckpoint(self.state_dir, 'dida365-replay' if rebuild else 'dida365')
+        # 已导出的任务笔记位置：清理孤立笔记时按登记的路径定位，不遍历任务目录
+        self.export_registry = ExportRegistry(self.state_dir, self.output_dir)
+        # 任务笔记的目录布局（TASKS_SHARDING）
+        self.layout = TaskLayout(self.tasks_dir, {project.id: project.name for project in self.projects})
+        self._shard_dirs: Set[str] = {self.tasks_dir}
+        self.deleted_ids: Set[str] = set(deleted_ids or ())
+        # 本次运行更新过的数据集（任务统计复用其中积累的历史任务）
+        self.dataset = None
+        # 重复任务在窗口内的实例（每个任务每次运行只展开一次）
+        self.occurrences = OccurrenceCache(self.window)
+
+        # 任务层级索引：每次运行构建一次，用于渲染父子任务和传播变化
+        self.hierarchy = TaskHierarchy(self.todo_tasks + self.completed_tasks)
+
     def _format_time(self, time_str: Optional[str], time_format: str = "%Y-%m-%d %H:%M:%S") -> Optional[str]:
         """
         将时间字符串格式化为北京时间
@@ -71,7 +109,7 @@ class Exporter:
         except (ValueError, AttributeError):
             return None
 
-    def _format_task_time_range(self, task: Task) -> str:
+    def _format_task_time_range(self, task: Task, within: Optional[Tuple[datetime, datetime]] = None) -> str:
         """
         格式化任务的时间范围为易读的字符串格式
         
@@ -83,40 +121,32 @@ class Exporter:
         - 没有时间信息：空字符串
         
         参数:
-            task: Task 对象，包含 startDate 和 dueDate 属性（可能是 datetime 对象或字符串）
+            task: Task 对象，解码时已预解析 _processed_startDate 和 _processed_dueDate
+            within: 摘要的时间范围；重复任务在范围内有实例时显示该实例的时间（以 🔁 标记）
             
         返回:
             格式化后的时间范围字符串
         """
-        start_date = None
-        end_date = None
-        
-        # 优先使用处理后的时间，如果没有则使用原始时间
-        start_time = getattr(task, '_processed_startDate', None) or task.startDate
-        end_time = getattr(task, '_processed_dueDate', None) or task.dueDate
-        
-        # 处理 startDate（可能是 datetime 对象或字符串）
-        if start_time:
-            if isinstance(start_time, datetime):
-                start_date = start_time.strftime("%Y-%m-%d")
-            else:
-                start_date = self._format_time(start_time, "%Y-%m-%d")
-        
-        # 处理 dueDate（可能是 datetime 对象或字符串）
-        if end_time:
-            if isinstance(end_time, datetime):
-                end_date = end_time.strftime("%Y-%m-%d")
-            else:
-                end_date = self._format_time(end_time, "%Y-%m-%d")
+        # 使用解码时预解析的时间（见 Types.Task）
+        start_time = task._processed_startDate
+        end_time = task._processed_dueDate
+        prefix = ""
+        occurrences = self.occurrences.get(task, *within) if within else None
+        if occurrences:
+            start_time, end_time = occurrences[0]
+            start_time = start_time if task._processed_startDate else None
+            prefix = "🔁 "
+        start_date = start_time.strftime("%Y-%m-%d") if start_time else None
+        end_date = end_time.strftime("%Y-%m-%d") if end_time else None
         
         if start_date and end_date:
             if start_date == end_date:
-                return f"📅 {end_date}"
-            return f"🛫 {start_date} ~ 📅 {end_date}"
+                return f"{prefix}📅 {end_date}"
+            return f"{prefix}🛫 {start_date} ~ 📅 {end_date}"
         elif start_date:
-            return f"🛫 {start_date}"
+            return f"{prefix}🛫 {start_date}"
         elif end_date:
-            return f"📅 {end_date}"
+            return f"{prefix}📅 {end_date}"
         return ""
 
     def _get_priority_mark(self, priority: int) -> str:
@@ -148,51 +178,50 @@ class Exporter:
         if not os.path.exists(dir_path):
             os.makedirs(dir_path) 
 
-    def _create_task_markdown(self, task: Task, task_dict: Dict[str, Task]):
+    def _create_task_markdown(self, task: Task, force: bool = False):
         """
         为单个任务创建或更新 Markdown 文件
         
         该方法会根据任务信息创建或更新对应的 Markdown 文件，包括：
-        1. 检查文件是否存在，如存在则检查是否需要更新
+        1. 检查文件是否存在，如存在且任务及其父子任务均未变化则跳过
         2. 生成包含任务详细信息的 Front Matter
         3. 添加任务描述内容
         4. 添加任务列表（如果有）
         5. 添加子任务列表（如果有）
         6. 添加父任务信息（如果有）
+        7. 添加任务层级（子任务还有子任务时）
         
         参数:
             task: Task 对象，包含任务的所有信息
-            task_dict: 所有任务的 id->Task 映射，用于查找父任务和子任务
+            force: 是否强制重新渲染（任务自身、父子任务或后代任务发生变化时）
         """
-        # 构建文件名
+        # 构建文件名（所在子目录由 TASKS_SHARDING 决定）
         filename = f"{task.id}.md"
-        filepath = os.path.join(self.tasks_dir, filename)
-        
-        # 检查文件是否存在
-        file_exists = os.path.exists(filepath)
-        
-        # 如果文件存在，检查是否需要更新
-        if file_exists:
-            # 读取现有文件的 Front Matter 中的 modified_time
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # 查找 Front Matter 中的 modified_time
-                import re
-                match = re.search(r'modified_time:\s*(.*?)(?:\n|$)', content)
-                if match:
-                    file_modified_time = match.group(1).strip()
-                    # 如果文件中的修改时间与任务修改时间相同，则跳过
-                    if file_modified_time == self._format_time(task.modifiedTime):
-                        print(f"任务文件已是最新: {filename}")
-                        return
+        filepath = self.layout.task_path(task)
+        shard_dir = os.path.dirname(filepath)
+        if shard_dir not in self._shard_dirs:
+            self._ensure_dir(shard_dir)
+            self._shard_dirs.add(shard_dir)
+
+        # 任务移动到其他清单等导致所在子目录变化时，把原有笔记移过来
+        previous = self.export_registry.get(task.id) or os.path.join(self.tasks_dir, filename)
+        if previous != filepath and os.path.exists(previous):
+            os.replace(previous, filepath)
+            print(f"已移动任务文件: {os.path.relpath(previous, self.tasks_dir)} -> {os.path.relpath(filepath, self.tasks_dir)}")
+        self.export_registry.record(task.id, filepath)
+
+        # 文件已存在且没有变化时跳过
+        if not force and os.path.exists(filepath):
+            print(f"任务文件已是最新: {filename}")
+            return
         
         # 准备 Front Matter
         front_matter = {
             "title": task.title,
             "task_id": task.id,
             "project_id": task.projectId,
-            "start_date": self._format_time_from_task(getattr(task, '_processed_startDate', None) or task.startDate),
-            "due_date": self._format_time_from_task(getattr(task, '_processed_dueDate', None) or task.dueDate),
+            "start_date": self._format_time_from_task(task._processed_startDate),
+            "due_date": self._format_time_from_task(task._processed_dueDate),
             "priority": task.priority,
             "status": task.status,
             "created_time": self._format_time(task.createdTime),
@@ -225,18 +254,21 @@ class Exporter:
         if task.childIds:
             content += "## 子任务列表\n\n"
             content += self._create_table_header()
-            for childId in task.childIds:
-                child_task = task_dict.get(childId)
-                if child_task:
-                    content += self._create_task_table_content(child_task)
+            for child_task in self.hierarchy.child_tasks(task.id):
+                content += self._create_task_table_content(child_task)
         
         # 添加父任务
         if task.parentId:
             content += f"## 父任务\n\n"
             content += self._create_table_header()
-            parent_task = task_dict.get(task.parentId)
+            parent_task = self.hierarchy.get(task.parentId)
             if parent_task:
                 content += self._create_task_table_content(parent_task)
+
+        # 添加任务层级（子任务还有子任务时，以嵌套列表展示整棵子树）
+        if self.hierarchy.height(task.id) > 1:
+            content += "\n## 任务层级\n\n"
+            content += "\n".join(self.hierarchy.outline_lines(task.id, self._format_task_line)) + "\n"
         
         # 写入文件
         # 如果文件存在，先删除
@@ -266,9 +298,9 @@ class Exporter:
         """
         content = f"## {project.name}\n\n"
         if tasks:
-            sorted_tasks = sorted(tasks, key=lambda x: (-x.priority if x.priority else 0, x.createdTime if x.createdTime else ""))
+            sorted_tasks = sorted(tasks, key=lambda x: (-x.priority, x.createdTime if x.createdTime else ""))
             for task in sorted_tasks:
-                priority_mark = self._get_priority_mark(task.priority if task.priority else 0)
+                priority_mark = self._get_priority_mark(task.priority)
                 time_range = self._format_task_time_range(task)
                 if time_range == "":
                     content += f"- [ ] [[{task.id}|{task.title}]] | {priority_mark}\n"
@@ -314,25 +346,14 @@ class Exporter:
         返回:
             如果任务在指定时间范围内，则返回 True，否则返回 False
         """
-        # 优先使用处理后的时间，如果没有则使用原始时间
-        task_start = getattr(task, '_processed_startDate', None) or task.startDate
-        task_end = getattr(task, '_processed_dueDate', None) or task.dueDate
-        
-        # 获取任务的开始时间和结束时间（可能是 datetime 对象或字符串）
-        start_dt = None
-        end_dt = None
-        
-        if task_start:
-            if isinstance(task_start, datetime):
-                start_dt = task_start
-            else:
-                start_dt = formate_datetime(task_start)
-        
-        if task_end:
-            if isinstance(task_end, datetime):
-                end_dt = task_end
-            else:
-                end_dt = formate_datetime(task_end)
+        # 重复任务按展开后的实例判断（见 Recurrence）
+        occurrences = self.occurrences.get(task, start, end)
+        if occurrences is not None:
+            return bool(occurrences)
+
+        # 使用解码时预解析的时间（见 Types.Task）
+        start_dt = task._processed_startDate
+        end_dt = task._processed_dueDate
         
         if not start_dt and not end_dt:
             return False
@@ -363,7 +384,8 @@ class Exporter:
         
         return todos + completeds   
 
-    def _format_task_line(self, task: Task, index: Optional[int] = None, ordered: bool = False) -> str:
+    def _format_task_line(self, task: Task, index: Optional[int] = None, ordered: bool = False,
+                          within: Optional[Tuple[datetime, datetime]] = None) -> str:
         """
         格式化单个任务行为 Markdown 格式
         
@@ -376,12 +398,13 @@ class Exporter:
             task: 要格式化的任务
             index: 任务索引，用于有序列表
             ordered: 是否使用有序列表格式
+            within: 摘要的时间范围，重复任务显示范围内实例的时间
             
         返回:
             格式化后的任务行字符串
         """
-        priority_mark = self._get_priority_mark(task.priority if task.priority else 0)
-        time_range = self._format_task_time_range(task)
+        priority_mark = self._get_priority_mark(task.priority)
+        time_range = self._format_task_time_range(task, within)
         if ordered and index is not None:
             line = f"{index}. [[{task.id}|{task.title}]] | {priority_mark}"
         else:
@@ -417,51 +440,170 @@ class Exporter:
         content += "---\n\n"
         return content
 
-    def _format_time_from_task(self, time_value) -> Optional[str]:
+    def _format_time_from_task(self, time_value: Optional[datetime]) -> Optional[str]:
         """
-        从任务的时间字段格式化时间字符串
+        从任务预解析的时间字段格式化时间字符串
         
         参数:
-            time_value: 可能是 datetime 对象或字符串的时间值
+            time_value: 解码时预解析的 datetime 对象（如 task._processed_dueDate）
             
         返回:
             格式化后的时间字符串
         """
         if not time_value:
             return None
-        
-        if isinstance(time_value, datetime):
-            return time_value.strftime("%Y-%m-%d %H:%M:%S")
-        else:
-            return self._format_time(time_value)
+        return time_value.strftime("%Y-%m-%d %H:%M:%S")
 
     def _create_table_header(self):
         content = "| 任务 | 优先级 | 时间范围 | 状态 | 完成时间 |\n"
         content += "| --- | --- | --- | --- | --- |\n"
         return content
 
-    def _create_task_table_content(self, task: Task):
+    def _create_task_table_content(self, task: Task, within: Optional[Tuple[datetime, datetime]] = None):
         content = ""
         title = f"[[{task.id}\|{task.title}]]"
-        priority = self._get_priority_mark(task.priority if task.priority else 0)
-        time_range = self._format_task_time_range(task)
+        priority = self._get_priority_mark(task.priority)
+        time_range = self._format_task_time_range(task, within)
         status = "待办" if task.status == 0 else "已完成"
         done_time = self._format_time(task.completedTime, "%Y-%m-%d") if task.status == 2 else ""
         content += f"| {title} | {priority} | {time_range} | {status} | {done_time} |\n"
         return content
 
-    def _create_sub_task_table(self, tasks: list[Task]):
+    def _create_sub_task_table(self, tasks: list[Task], within: Optional[Tuple[datetime, datetime]] = None):
         content = ""
         todos = [t for t in tasks if t.status == 0]
         dones = [t for t in tasks if t.status == 2]
-        todos_sorted = sorted(todos, key=lambda x: -(x.priority if x.priority else 0))
-        dones_sorted = sorted(dones, key=lambda x: -(x.priority if x.priority else 0))
+        todos_sorted = sorted(todos, key=lambda x: -x.priority)
+        dones_sorted = sorted(dones, key=lambda x: -x.priority)
         all_tasks = todos_sorted + dones_sorted
         # 表头
         content += self._create_table_header()
         for task in all_tasks:
-            content += self._create_task_table_content(task)
+            content += self._create_task_table_content(task, within)
         return content
+
+    def _summary_keys(self, task: Task, window: Tuple[datetime, datetime]) -> List[str]:
+        """
+        计算任务在时间窗口内参与的日/周/月摘要键
+
+        参数:
+            task: 任务
+            window: 时间窗口 (start, end)
+
+        返回:
+            摘要键列表
+        """
+        occurrences = self.occurrences.get(task)
+        if occurrences is None:
+            return task_summary_keys(task._processed_startDate, task._processed_dueDate, window)
+        # 重复任务参与每个实例所在的摘要
+        keys = set()
+        for start, end in occurrences:
+            keys.update(task_summary_keys(start, end, window))
+        return sorted(keys)
+
+    def _summary_path(self, key: str) -> str:
+        """
+        返回摘要键对应的文件路径
+
+        参数:
+            key: 摘要键
+
+        返回:
+            摘要文件路径
+        """
+        kind, date = parse_key(key)
+        if kind == 'daily':
+            return os.path.join(self.daily_dir, f"{date.strftime('%Y-%m-%d')}-Dida365.md")
+        if kind == 'weekly':
+            iso_year, week_num, _ = date.isocalendar()
+            return os.path.join(self.weekly_dir, f"{iso_year}-W{week_num:02d}-Dida365.md")
+        return os.path.join(self.monthly_dir, f"{date.strftime('%Y-%m')}-Dida365.md")
+
+    def _key_in_window(self, key: str, window: Tuple[datetime, datetime]) -> bool:
+        """
+        判断摘要键是否可以用本次获取的数据完整渲染
+
+        日摘要、月摘要需在窗口内，周摘要需与窗口相交
+        """
+        kind, date = parse_key(key)
+        if kind == 'weekly':
+            return date <= window[1] and date + timedelta(days=7) > window[0]
+        return window[0] <= date <= window[1]
+
+    def _habit_done_date(self, habit: Habit, checkins: Optional[dict], stamp: Optional[int]) -> Optional[str]:
+        """
+        查找习惯在指定日期的打卡记录
+
+        参数:
+            habit: 习惯
+            checkins: 习惯打卡记录
+            stamp: 日期时间戳（如 20250601）
+
+        返回:
+            已打卡时返回打卡日期字符串，否则返回 None
+        """
+        if checkins and 'checkins' in checkins and habit.id in checkins['checkins']:
+            for c in checkins['checkins'][habit.id]:
+                if c.get('checkinStamp') == stamp and c.get('status') == 2:
+                    return self._format_time(c.get('checkinTime'), "%Y-%m-%d") or ""
+        return None
+
+    def _update_index(self) -> set:
+        """
+        用本次获取的任务更新摘要依赖索引（每次运行只执行一次）
+
+        同时计算需要重新渲染的任务笔记（变化传播到父任务、祖先任务和直接子任务），
+        并在依赖索引保存之前把待渲染的笔记和摘要记入运行检查点，上次中断时未完成的条目会一并并入。
+
+        返回:
+            受影响的摘要键集合
+        """
+        if self._affected_keys is None:
+            window = self.window
+            affected = self.summary_index.update(
+                self.todo_tasks + self.completed_tasks,
+                window,
+                lambda task: self._summary_keys(task, window),
+            )
+            dirty_ids = self.hierarchy.propagate_dirty(
+                self.summary_index.changed_ids | self.summary_index.removed_ids,
+                self.summary_index.previous_parents,
+            )
+            if self.rebuild:
+                dirty_ids = set(self.hierarchy.tasks)
+                affected = affected | set(self.summary_index.task_keys())
+            # 本次输入的快照：与中断时相同则跳过上次已完成的条目
+            snapshot = fingerprint(sorted(task_fingerprint(task) for task in self.todo_tasks + self.completed_tasks))
+            self._dirty_ids = self.checkpoint.begin('notes', dirty_ids, snapshot)
+            self._affected_keys = self.checkpoint.begin('summaries', affected, snapshot)
+        return self._affected_keys
+
+    def _export_summary(self, key: str, habits: Optional[List[Habit]] = None, checkins: Optional[dict] = None):
+        """
+        按摘要键渲染对应的日/周/月摘要
+
+        参数:
+            key: 摘要键
+            habits: 习惯列表
+            checkins: 习惯打卡记录
+        """
+        kind, date = parse_key(key)
+        if kind == 'daily':
+            self.export_daily_summary(date, habits, checkins, int(date.strftime("%Y%m%d")))
+        elif kind == 'weekly':
+            self.export_weekly_summary(date)
+        else:
+            self.export_monthly_summary(date)
+
+    def _save_state(self):
+        """
+        保存摘要依赖索引和已导出文件登记表（从快照回放时不保存，见 rebuild）
+        """
+        if not self.rebuild:
+            self.summary_index.save()
+            self.export_registry.save()
+
     # MARK: - 公开方法
 
     def export_project_tasks(self):
@@ -471,41 +613,202 @@ class Exporter:
         该方法执行以下操作：
         1. 构建所有任务的 id->Task 映射
         2. 为每个未完成任务创建 Markdown 文件
-        3. 创建统一的项目索引文件，包含所有项目及其任务
+        3. 创建项目索引：默认为统一的 TasksInbox.md（只重新渲染变化的项目段落，全部未变化时不重写文件），
+           TASKS_INDEX_MODE=project 时为每个清单一个索引笔记加顶层索引（只重新渲染变化的清单）
         4. 为已完成任务创建 Markdown 文件
+        5. 按 ORPHAN_POLICY 归档或删除已删除任务的笔记（见 reconcile_orphans）
         """
-        total_tasks = self.todo_tasks + self.completed_tasks
-        # 构建 id->Task 映射
-        task_dict = {task.id: task for task in total_tasks}
-        
-        # 准备 Front Matter
-        front_matter = {
-            "updated_time": self._format_time(datetime.now().isoformat())
-        }
-        
-        # 构建文件内容
-        all_content = "---\n"
-        for key, value in front_matter.items():
-            if value is not None:
-                all_content += f"{key}: {value}\n"
-        all_content += "---\n\n"
-        
+        # 计算需要重新渲染的任务笔记
+        self._update_index()
+        dirty_ids = self._dirty_ids
+        # 分片方式变化（或首次启用分片）时把已有笔记迁移到新布局；
+        # 迁移会移动现有笔记并直接保存登记表，回放快照时不迁移，继续按登记表中的布局渲染
+        if self.export_registry.layout != self.layout.key and self.rebuild:
+            self.layout = TaskLayout.from_key(self.tasks_dir, self.export_registry.layout, self.layout.project_names)
+        elif self.export_registry.layout != self.layout.key:
+            moved = self.layout.migrate(self.export_registry)
+            print(f"已将 {moved} 个任务文件迁移到 {self.layout.key} 布局")
+        # 在摘要依赖索引保存之前处理孤立笔记，中途被杀时下次运行仍能得到同样的删除列表；
+        # 回放旧快照时之后新建的任务也不在快照中，不能据此处理
+        if not self.rebuild:
+            self.reconcile_orphans()
+
+        # 按清单分组未完成任务（一次遍历）
+        project_tasks: Dict[str, List[Task]] = {project.id: [] for project in self.projects}
+        for task in self.todo_tasks:
+            if task.projectId in project_tasks:
+                project_tasks[task.projectId].append(task)
         for project in self.projects:
-            # 获取该项目下的未完成任务
-            project_tasks = [task for task in self.todo_tasks if task.projectId == project.id]
-            for task in project_tasks:
-                self._create_task_markdown(task, task_dict)
-            all_content += self._get_project_index_content(project, project_tasks)
-        index_path = self.tasks_inbox_path
-        if os.path.exists(index_path):
-            os.remove(index_path)
-        with open(index_path, 'w', encoding='utf-8') as f:
-            f.write(all_content)
-        print(f"已创建统一项目索引文件: TasksInbox.md")
+            for task in project_tasks[project.id]:
+                self._create_task_markdown(task, force=task.id in dirty_ids)
+                self.checkpoint.mark_done('notes', task.id)
+
+        # 索引方式切换后需要重写全部索引
+        mode_changed = self.summary_index.track("index_mode", fingerprint(self.index_mode))
+        if self.index_mode == 'project':
+            self._export_project_notes(project_tasks, mode_changed)
+        else:
+            self._export_tasks_inbox(project_tasks, mode_changed)
+        self._save_state()
 
         # 导出已完成任务
         for task in self.completed_tasks:
-            self._create_task_markdown(task, task_dict)
+            self._create_task_markdown(task, force=task.id in dirty_ids)
+            self.checkpoint.mark_done('notes', task.id)
+        self._save_state()
+        self.checkpoint.finish('notes')
+
+    def _export_tasks_inbox(self, project_tasks: Dict[str, List[Task]], force: bool = False):
+        """
+        创建统一的项目索引文件 TasksInbox.md，包含所有项目及其任务
+
+        只重新渲染任务集合或名称发生变化的项目段落，全部未变化时不重写文件。
+
+        参数:
+            project_tasks: 清单 ID -> 该清单的未完成任务
+            force: 是否强制重写（索引方式切换后）
+        """
+        sections = self.summary_index.sections
+        project_ids = []
+        sections_changed = force
+        for project in self.projects:
+            tasks = project_tasks[project.id]
+            project_ids.append(project.id)
+            project_fp = fingerprint(project.name, [task_fingerprint(task) for task in tasks])
+            if self.summary_index.track(f"project:{project.id}", project_fp) or project.id not in sections or self.rebuild:
+                sections[project.id] = self._get_project_index_content(project, tasks)
+                sections_changed = True
+                print(f"已更新项目索引段落: {project.name}")
+        for project_id in [pid for pid in sections if pid not in project_ids]:
+            sections.pop(project_id)
+            self.summary_index.extras.pop(f"project:{project_id}", None)
+            sections_changed = True
+        if self.summary_index.track("projects", fingerprint(project_ids)) or self.rebuild:
+            sections_changed = True
+
+        index_path = self.tasks_inbox_path
+        if sections_changed or not os.path.exists(index_path):
+            all_content = self._get_summary_front_matter()
+            for project_id in project_ids:
+                all_content += sections[project_id]
+            if os.path.exists(index_path):
+                os.remove(index_path)
+            with open(index_path, 'w', encoding='utf-8') as f:
+                f.write(all_content)
+            print(f"已创建统一项目索引文件: TasksInbox.md")
+        else:
+            print("统一项目索引文件已是最新: TasksInbox.md")
+
+    def _project_note_names(self) -> Dict[str, str]:
+        """
+        计算每个清单索引笔记的文件名（不含扩展名），清单重名时附加清单 ID 前缀区分
+        """
+        names = {project.id: safe_name(project.name, project.id) for project in self.projects}
+        counts: Dict[str, int] = {}
+        for name in names.values():
+            counts[name] = counts.get(name, 0) + 1
+        return {pid: name if counts[name] == 1 else f"{name}-{pid[:6]}" for pid, name in names.items()}
+
+    def _export_project_notes(self, project_tasks: Dict[str, List[Task]], force: bool = False):
+        """
+        为每个清单创建一个索引笔记（PROJECTS_DIR 下），并在 TasksInbox.md 中生成链接到各清单的顶层索引
+
+        清单笔记只在该清单的任务集合或清单字段（name、sortOrder、closed）变化时重新渲染；
+        清单被删除时删除其索引笔记，改名时删除旧文件名的笔记。
+        顶层索引只包含清单链接和任务数量，内容不变时不重写。
+
+        参数:
+            project_tasks: 清单 ID -> 该清单的未完成任务
+            force: 是否强制重写（索引方式切换后）
+        """
+        self._ensure_dir(self.projects_dir)
+        registry = self.export_registry
+        note_names = self._project_note_names()
+        for project in self.projects:
+            tasks = project_tasks[project.id]
+            path = os.path.join(self.projects_dir, f"{note_names[project.id]}.md")
+            previous = registry.get(project.id, kind='projects')
+            project_fp = fingerprint(project.name, project.sortOrder, project.closed,
+                                     [task_fingerprint(task) for task in tasks])
+            changed = self.summary_index.track(f"project_note:{project.id}", project_fp)
+            if changed or force or self.rebuild or previous != path or not os.path.exists(path):
+                front_matter = {
+                    "project_id": project.id,
+                    "name": project.name,
+                    "closed": project.closed,
+                    "task_count": len(tasks),
+                    "updated_time": self._format_time(datetime.now().isoformat()),
+                }
+                content = "---\n"
+                for key, value in front_matter.items():
+                    if value is not None:
+                        content += f"{key}: {value}\n"
+                content += "---\n\n"
+                content += self._get_project_index_content(project, tasks)
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                print(f"已更新清单索引笔记: {os.path.basename(path)}")
+            if previous and previous != path and os.path.exists(previous) and not self.rebuild:
+                os.remove(previous)
+                print(f"删除旧清单索引笔记: {os.path.basename(previous)}")
+            registry.record(project.id, path, kind='projects')
+        for project_id in [pid for pid in registry.projects if pid not in project_tasks and not self.rebuild]:
+            previous = registry.get(project_id, kind='projects')
+            if os.path.exists(previous):
+                os.remove(previous)
+                print(f"删除已不存在清单的索引笔记: {os.path.basename(previous)}")
+            registry.forget(project_id, kind='projects')
+            self.summary_index.extras.pop(f"project_note:{project_id}", None)
+        self._save_state()
+
+        # 顶层索引：按清单排序列出链接和未完成任务数，已关闭的清单单独列出
+        ordered = sorted(self.projects, key=lambda p: (p.sortOrder if p.sortOrder is not None else 0))
+        entries = [(project.id, note_names[project.id], project.name, len(project_tasks[project.id]), bool(project.closed))
+                   for project in ordered]
+        index_path = self.tasks_inbox_path
+        if self.summary_index.track("project_notes_index", fingerprint(entries)) or force or self.rebuild \
+                or not os.path.exists(index_path):
+            content = self._get_summary_front_matter() + "## 清单\n\n"
+            closed = []
+            for _, note_name, name, count, is_closed in entries:
+                line = f"- [[{note_name}|{name}]] | {count} 个未完成任务\n"
+                if is_closed:
+                    closed.append(line)
+                else:
+                    content += line
+            if closed:
+                content += "\n## 已关闭的清单\n\n" + "".join(closed)
+            with open(index_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            print("已创建顶层清单索引文件: TasksInbox.md")
+        else:
+            print("顶层清单索引文件已是最新: TasksInbox.md")
+
+    def reconcile_orphans(self) -> List[str]:
+        """
+        处理已删除任务的孤立笔记
+
+        孤立任务来自同步结果的删除列表（syncTaskBean.delete）以及上次导出过、本次不再出现的任务
+        （移入回收站、被删除；超出窗口的已完成任务不算），且不在本次获取的任务中。
+        笔记按已导出文件登记表中的路径定位，登记表建立之前导出的笔记按 <任务ID>.md 在任务目录中查找，
+        因此无需遍历任务目录。
+
+        ORPHAN_POLICY 决定处理方式：archive（默认）移动到 TASKS_ARCHIVE_DIR，delete 直接删除，keep 保留不动。
+
+        返回:
+            被处理的笔记路径列表
+        """
+        current_ids = {task.id for task in self.todo_tasks + self.completed_tasks}
+        orphan_ids = (self.deleted_ids | self.summary_index.removed_ids) - current_ids
+        if not orphan_ids:
+            return []
+        policy = orphan_policy()
+        handled = self.export_registry.reconcile(orphan_ids, policy, self.tasks_archive_dir, self.tasks_dir)
+        self.export_registry.save()
+        action = {'archive': '已归档', 'delete': '已删除', 'keep': '保留'}[policy]
+        for path in handled:
+            print(f"{action}孤立任务文件: {os.path.basename(path)}")
+        return handled
     
     def export_daily_summary(self, date: Optional[datetime] = None, habits: Optional[List[Habit]] = None, checkins: Optional[dict] = None, today_stamp: Optional[int] = None):
         """
@@ -544,16 +847,9 @@ class Exporter:
         # 添加习惯打卡
         if habits:
             content += "## 习惯打卡\n\n"
-            done_date = ""
             for habit in habits:
-                checked = False
-                if checkins and 'checkins' in checkins and habit.id in checkins['checkins']:
-                    for c in checkins['checkins'][habit.id]:
-                        if c.get('checkinStamp') == today_stamp and c.get('status') == 2:
-                            checked = True
-                            done_date = self._format_time(c.get('checkinTime'), "%Y-%m-%d")
-                            break
-                if checked:
+                done_date = self._habit_done_date(habit, checkins, today_stamp)
+                if done_date is not None:
                     content += f"- [x] {habit.name} | ✅ {done_date}\n"
                 else:
                     content += f"- [ ] {habit.name}\n"
@@ -567,17 +863,17 @@ class Exporter:
             if todo_tasks:
                 content += "## 待办任务\n\n"
                 # 按优先级排序
-                sorted_tasks = sorted(todo_tasks, key=lambda x: (-(x.priority if x.priority else 0)))
+                sorted_tasks = sorted(todo_tasks, key=lambda x: -x.priority)
                 for idx, task in enumerate(sorted_tasks, 1):
-                    content += self._format_task_line(task, idx, ordered=True) + "\n"
+                    content += self._format_task_line(task, idx, ordered=True, within=(start_date, end_date)) + "\n"
                 content += "\n"
             # 输出已完成任务
             if done_tasks:
                 content += "## 已完成任务\n\n"
                 # 按优先级排序
-                sorted_tasks = sorted(done_tasks, key=lambda x: (-(x.priority if x.priority else 0)))
+                sorted_tasks = sorted(done_tasks, key=lambda x: -x.priority)
                 for task in sorted_tasks:
-                    content += self._format_task_line(task) + "\n"
+                    content += self._format_task_line(task, within=(start_date, end_date)) + "\n"
                 content += "\n"
         else:
             content += "今日没有任务。\n"
@@ -621,17 +917,15 @@ class Exporter:
             ]
             tasks_by_day = {d: [] for d in days}
             for task in tasks:
-                task_date = None
-                if task.status == 2 and getattr(task, 'completedTime', None):
-                    task_date = formate_datetime(task.completedTime)
-                elif getattr(task, '_processed_dueDate', None) or task.dueDate:
-                    # 优先使用处理后的时间
-                    task_date = getattr(task, '_processed_dueDate', None) or formate_datetime(task.dueDate)
-                elif getattr(task, '_processed_startDate', None) or task.startDate:
-                    # 优先使用处理后的时间
-                    task_date = getattr(task, '_processed_startDate', None) or formate_datetime(task.startDate)
-                if task_date:
-                    date_str = task_date.strftime('%Y-%m-%d')
+                occurrences = self.occurrences.get(task, start_date, end_date)
+                if occurrences is not None:
+                    # 重复任务出现在每个实例的日期
+                    task_dates = [end for _, end in occurrences]
+                elif task.status == 2 and task._processed_completedTime:
+                    task_dates = [task._processed_completedTime]
+                else:
+                    task_dates = [task._processed_dueDate or task._processed_startDate]
+                for date_str in sorted({task_date.strftime('%Y-%m-%d') for task_date in task_dates if task_date}):
                     if date_str in tasks_by_day:
                         tasks_by_day[date_str].append(task)
             for i, day in enumerate(days):
@@ -639,7 +933,8 @@ class Exporter:
                 day_tasks = tasks_by_day[day]
                 if day_tasks:
                     # 先输出待办，再输出已完成
-                    content += self._create_sub_task_table(day_tasks)
+                    day_start = start_date + timedelta(days=i)
+                    content += self._create_sub_task_table(day_tasks, within=(day_start, day_start + timedelta(days=1, seconds=-1)))
                 else:
                     content += "无任务\n"
                 content += "\n"
@@ -694,7 +989,7 @@ class Exporter:
                 content += f"## 第 {week_num} 周 ({week_start.strftime('%Y-%m-%d')} ~ {week_end.strftime('%Y-%m-%d')})\n\n"
                 week_tasks = [t for t in tasks if self._task_in_range(t, week_start, week_end)]
                 if week_tasks:
-                    content += self._create_sub_task_table(week_tasks)
+                    content += self._create_sub_task_table(week_tasks, within=(week_start, week_end))
                 else:
                     content += "无任务\n"
                 content += "\n"
@@ -704,6 +999,189 @@ class Exporter:
             f.write(content)
         print(f"已创建每月摘要：{filename}")
 
+    def export_changed_summaries(self, date: Optional[datetime] = None, habits: Optional[List[Habit]] = None, checkins: Optional[dict] = None, window: Optional[Tuple[datetime, datetime]] = None):
+        """
+        增量导出日/周/月摘要
+
+        根据摘要依赖索引，只重新渲染以下摘要文件：
+        1. 新增、修改、删除的任务变化前后所在的摘要
+        2. 习惯打卡发生变化的日摘要
+        3. 窗口内有任务但文件不存在的摘要，以及当天/本周/本月不存在的摘要
+
+        参数:
+            date: 当前日期，如果不提供则使用当前日期
+            habits: 习惯列表
+            checkins: 习惯打卡记录（需覆盖窗口内的日期）
+            window: 本次获取的已完成任务的时间窗口，默认使用初始化时的窗口
+        """
+        if date is None:
+            date = datetime.now()
+            date = date.replace(tzinfo=None)
+        if window is not None and self._affected_keys is None:
+            self.window = window
+            self.occurrences = OccurrenceCache(window)
+        window = self.window
+
+        affected = self._update_index()
+        # 未来日期的日摘要在当天到来时才生成
+        today_key = daily_key(date)
+        def renderable(key: str) -> bool:
+            if key.startswith('daily:') and key > today_key:
+                return False
+            return self._key_in_window(key, window)
+        dirty = {key for key in affected if renderable(key)}
+
+        # 习惯打卡变化的日摘要（只追踪到今天为止）
+        if habits:
+            day = window[0]
+            last_day = min(window[1], datetime(date.year, date.month, date.day))
+            while day <= last_day:
+                stamp = int(day.strftime("%Y%m%d"))
+                habits_fp = fingerprint([(habit.id, habit.name, self._habit_done_date(habit, checkins, stamp)) for habit in habits])
+                if self.summary_index.track(f"habits:{day.strftime('%Y-%m-%d')}", habits_fp) or self.rebuild:
+                    dirty.add(daily_key(day))
+                day += timedelta(days=1)
+
+        # 缺失的摘要文件
+        candidates = {key for key in self.summary_index.task_keys() if renderable(key)}
+        candidates.update([daily_key(date), weekly_key(date), monthly_key(date)])
+        for key in candidates:
+            if key not in dirty and (self.rebuild or not os.path.exists(self._summary_path(key))):
+                dirty.add(key)
+
+        print(f"变化任务 {len(self.summary_index.changed_ids)} 个，删除任务 {len(self.summary_index.removed_ids)} 个，需要更新摘要 {len(dirty)} 个")
+        for key in sorted(dirty):
+            self._export_summary(key, habits, checkins)
+            self.checkpoint.mark_done('summaries', key)
+        self._save_state()
+        self.checkpoint.finish('summaries')
+
+    def export_dataset(self, habits: Optional[List[Habit]] = None, checkins: Optional[dict] = None):
+        """
+        导出机器可读的数据集（JSON Lines，可选 SQLite）
+
+        数据集按主键增量更新：任务按本次获取结果更新并删除已被删除的任务，
+        项目和习惯按完整列表替换，打卡记录按习惯替换本次获取的窗口内的记录。
+        可通过环境变量 DATASET_ENABLED=false 关闭。
+
+        参数:
+            habits: 习惯列表
+            checkins: 习惯打卡记录
+        """
+        if os.getenv('DATASET_ENABLED', 'true').lower() != 'true':
+            return
+        # 数据集、搜索索引等只在对应阶段用到的模块延迟导入，探测和空跑时不必加载
+        from Dataset import Dataset, record_id
+        dataset = Dataset(self.output_dir)
+        self._update_index()
+        dataset.upsert('tasks', self.todo_tasks + self.completed_tasks)
+        dataset.delete('tasks', self.summary_index.removed_ids)
+        dataset.replace('projects', self.projects)
+        if habits is not None:
+            dataset.replace('habits', habits)
+        if checkins and 'checkins' in checkins:
+            # 打卡记录按习惯替换获取范围（窗口起始日起）内的记录，取消打卡的日期同时删除
+            from_stamp = int(self.window[0].strftime("%Y%m%d"))
+            fetched = {habit.id: [] for habit in habits or []}
+            for habit_id, items in checkins['checkins'].items():
+                fetched[habit_id] = [dict(c, habitId=c.get('habitId') or habit_id) for c in items]
+            keys = set()
+            for items in fetched.values():
+                dataset.upsert('checkins', items)
+                keys.update(record_id('checkins', c) for c in items)
+            dataset.delete('checkins', [
+                record_id('checkins', record) for record in dataset.records('checkins')
+                if record.get('habitId') in fetched and (record.get('checkinStamp') or 0) >= from_stamp
+                and record_id('checkins', record) not in keys
+            ])
+        dataset.save()
+        self.dataset = dataset
+
+    def export_analytics(self, date: Optional[datetime] = None):
+        """
+        导出任务统计页（每月、每年各一页）
+
+        统计包括各清单按周（年度页按月）的完成率、从创建到完成的前置时间、截止日期的逾期情况，
+        以及按优先级和标签的分布。启用数据集时基于数据集中积累的全部历史任务统计，否则只统计本次获取的任务。
+        统计结果没有变化的页面不会重写。可通过环境变量 ANALYTICS_ENABLED=false 关闭。
+
+        参数:
+            date: 当前日期，用于判断未完成任务是否已逾期
+        """
+        if os.getenv('ANALYTICS_ENABLED', 'true').lower() != 'true':
+            return
+        from Analytics import TaskColumns, analytics_available, render_stats
+        if not analytics_available():
+            print("任务统计需要安装 numpy：pip install numpy")
+            return
+        date = date or datetime.now()
+        if self.dataset is None and os.getenv('DATASET_ENABLED', 'true').lower() == 'true':
+            from Dataset import Dataset
+            self.dataset = Dataset(self.output_dir)
+        if self.dataset is not None:
+            records = self.dataset.records('tasks')
+        else:
+            records = [task.to_dict() for task in self.todo_tasks + self.completed_tasks]
+        columns = TaskColumns(records)
+        project_names = {project.id: project.name for project in self.projects}
+        analytics_dir = os.path.join(self.calendar_dir, os.getenv('ANALYTICS_DIR', '4.Analytics'))
+        self._ensure_dir(analytics_dir)
+        written = 0
+        for label, title, start, end, bucket in columns.periods():
+            stats = columns.period_stats(start, end, date, bucket)
+            filepath = os.path.join(analytics_dir, f"{label}-Stats.md")
+            changed = self.summary_index.track(f"analytics:{label}", fingerprint(stats))
+            if not changed and not self.rebuild and os.path.exists(filepath):
+                continue
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(self._get_summary_front_matter() + render_stats(title, stats, project_names))
+            written += 1
+        self._save_state()
+        print(f"任务统计：{columns.size} 个任务，更新 {written} 页")
+
+    def export_search_index(self, client: Optional[Dida365Client] = None):
+        """
+        增量更新任务的全文搜索索引
+
+        只重新索引 modifiedTime 发生变化的任务，并删除已被删除的任务。
+        设置 SEARCH_INDEX_COMMENTS=true 且提供客户端时，会为需要重新索引的任务获取评论一并索引
+        （安装了 aiohttp 时通过 AsyncDida365Client 并发获取）；是否索引评论记录在版本中，
+        开启该设置后已索引的任务会补全一次评论。
+        可通过环境变量 SEARCH_INDEX_ENABLED=false 关闭。
+
+        参数:
+            client: Dida365Client 实例，用于获取任务评论（可选）
+        """
+        if os.getenv('SEARCH_INDEX_ENABLED', 'true').lower() != 'true':
+            return
+        from SearchIndex import SearchIndex, task_version
+        from AsyncDida365Client import async_available, fetch_task_comments
+        self._update_index()
+        tasks = self.todo_tasks + self.completed_tasks
+        index = SearchIndex(self.state_dir)
+        with_comments = bool(client) and os.getenv('SEARCH_INDEX_COMMENTS', 'false').lower() == 'true'
+        stale_ids = set(index.stale_ids('task', {task.id: task_version(task, with_comments) for task in tasks if task.id}))
+        stale_tasks = [task for task in tasks if task.id in stale_ids]
+        comments = None
+        if with_comments:
+            comments = {}
+            if async_available() and isinstance(client, Dida365Client):
+                # 安装了 aiohttp 时并发获取评论
+                responses = fetch_task_comments(client, [(task.projectId, task.id) for task in stale_tasks])
+            else:
+                responses = {}
+                for task in stale_tasks:
+                    try:
+                        responses[task.id] = client.get_task_comments(task.projectId, task.id)
+                    except Exception as e:
+                        print(f"获取任务评论失败: {task.id} ({e})")
+            for task_id, response in responses.items():
+                comments[task_id] = [c.get('title') or c.get('content') or '' for c in response or []]
+        count = index.index_tasks(stale_tasks, comments)
+        deleted = index.delete('task', self.summary_index.removed_ids)
+        index.close()
+        print(f"已更新搜索索引：任务 {count} 个，删除 {deleted} 个")
+
 def formate_datetime(date: Optional[str]) -> Optional[datetime]:
         """
         将 ISO 格式的时间字符串转换为北京时间的 datetime 对象
@@ -714,35 +1192,113 @@ def formate_datetime(date: Optional[str]) -> Optional[datetime]:
         返回:
             转换后的 datetime 对象，如果输入为空则返回 None
         """
-        if not date:
-            return None
-        dt = datetime.fromisoformat(date.replace('Z', '+00:00'))
-        # 转换为北京时间（UTC+8）
-        beijing_time = (dt + timedelta(hours=8)).replace(tzinfo=None)
-        return beijing_time
+        return parse_api_time(date)
+
+def get_month_range(date: datetime) -> Tuple[datetime, datetime]:
+    """
+    获取日期所在月份的开始和结束时间
+
+    参数:
+        date: 日期对象
+
+    返回:
+        二元组 (start, end)，分别为当月 1 日 00:00:00 和当月最后一天 23:59:59
+    """
+    start_date = datetime(date.year, date.month, 1)
+    if date.month == 12:
+        end_date = datetime(date.year + 1, 1, 1) - timedelta(seconds=1)
+    else:
+        end_date = datetime(date.year, date.month + 1, 1) - timedelta(seconds=1)
+    return start_date, end_date
 
-def get_tasks(client, date):
+def get_export_window(date: datetime) -> Tuple[datetime, datetime]:
+    """
+    获取导出窗口（即获取已完成任务的时间范围）
+
+    窗口覆盖当月；当本周跨越月份边界时向前扩展到上个月的月初，使跨月的周摘要能够使用完整数据。
+    还可以通过 DIDA365_BACKFILL_MONTHS 额外回溯若干个整月。已结束月份的已完成任务由本地缓存提供，
+    扩大窗口不会增加请求次数。
+
+    参数:
+        date: 日期对象
+
+    返回:
+        二元组 (start, end)
+    """
+    week_start = date - timedelta(days=date.weekday())
+    start_date = get_month_range(min(week_start, date))[0]
+    for _ in range(int(os.getenv('DIDA365_BACKFILL_MONTHS', '0'))):
+        start_date = get_month_range(start_date - timedelta(days=1))[0]
+    return start_date, get_month_range(date)[1]
+
+def fetch_completed_tasks(client, start_date: datetime, end_date: datetime) -> List[dict]:
+    """
+    分页获取时间范围内的全部已完成任务
+
+    接口按完成时间倒序返回且每次最多返回 limit 条，因此以本页最早的完成时间作为下一页的结束时间继续获取，
+    直到返回条数不足一页或没有新任务为止。
+
+    参数:
+        client: Dida365Client 实例
+        start_date: 开始时间
+        end_date: 结束时间
+
+    返回:
+        已完成任务的原始字典列表
+    """
+    limit = int(os.getenv('DIDA365_COMPLETED_PAGE_SIZE', '50'))
+    tasks: Dict[str, dict] = {}
+    to_date = end_date
+    while True:
+        page = client.get_completed_tasks(
+            from_date=start_date.strftime("%Y-%m-%d %H:%M:%S"),
+            to_date=to_date.strftime("%Y-%m-%d %H:%M:%S"),
+            limit=limit
+        ) or []
+        new_tasks = [t for t in page if t and t.get('id') not in tasks]
+        for task_data in new_tasks:
+            tasks[task_data.get('id')] = task_data
+        completed_times = [formate_datetime(t.get('completedTime')) for t in new_tasks]
+        completed_times = [t for t in completed_times if t]
+        if len(page) < limit or not completed_times:
+            break
+        to_date = min(completed_times)
+    return list(tasks.values())
+
+def get_tasks(client, date, sync_info: Optional[dict] = None,
+              window: Optional[Tuple[datetime, datetime]] = None,
+              cache: Optional[CompletedTaskCache] = None,
+              deleted_ids: Optional[Set[str]] = None):
     """
     获取滴答清单中的项目和任务数据
     
     该函数执行以下操作：
     1. 获取所有项目数据
     2. 获取所有未完成任务
-    3. 获取当月已完成的任务
+    3. 获取窗口内（默认当月）已完成的任务，已结束的月份优先使用本地缓存
     4. 对任务的时间字段进行预处理和格式化
     
     参数:
         client: Dida365Client 实例，用于与滴答清单 API 交互
         date: 日期对象，用于确定获取已完成任务的时间范围
+        sync_info: 可选的字典，用于返回同步信息（checkPoint 同步检查点、project_etags 项目 etag）
+        window: 获取已完成任务的时间范围，默认为 date 所在的月份
+        cache: 可选的已完成任务缓存
+        deleted_ids: 可选的集合，用于返回同步结果中被删除的任务 ID
         
     返回:
         三元组 (projects, todo_tasks, completed_tasks)，分别为项目列表、待办任务列表和已完成任务列表
     """
-    response = client.get_all_data()
+    # 默认流式解析 batch/check 响应，逐个构建对象，峰值内存与账号数据量无关
+    if os.getenv('DIDA365_STREAM_DECODE', 'true').lower() == 'true' and hasattr(client, 'iter_all_data'):
+        items = client.iter_all_data()
+    else:
+        items = iter_object_paths(client.get_all_data(), ALL_DATA_TARGETS)
 
     projects = []
     todo_tasks = []
     completed_tasks = []
+    deleted = set()
 
     # 添加收集箱项目
     if client.inbox_id:
@@ -751,71 +1307,56 @@ def get_tasks(client, date):
         inbox.name = "收集箱"
         projects.append(inbox)
 
-    # 处理项目数据
-    for i in response.get("projectProfiles", []):
-        if i != []:
-            projects.append(Project(i))
-    
-    # 处理待办任务数据
-    for i in response.get("syncTaskBean", {}).get("update", []):
-        if i != []:
-            task = Task(i)
+    for path, i in items:
+        if i == []:
+            continue
+        if path == ("projectProfiles",):
+            # 处理项目数据
+            projects.append(Project.decode(i))
+        elif path == ("syncTaskBean", "update"):
+            # 处理待办任务数据
+            # 解码时已预解析时间字段（见 Types.Task）
+            task = Task.decode(i)
             if task.status == 0:
-                # 预处理时间字段
-                preprocess_task_dates(task)
                 todo_tasks.append(task)
+        elif path == ("syncTaskBean", "delete"):
+            # 删除列表的元素为 {"taskId": ..., "projectId": ...}
+            task_id = i.get('taskId') or i.get('id') if isinstance(i, dict) else i
+            if task_id:
+                deleted.add(task_id)
+        elif path == ("checkPoint",) and sync_info is not None:
+            sync_info["checkPoint"] = i
 
-    # 计算当月的开始和结束日期
-    start_date = datetime(date.year, date.month, 1)
-    if date.month == 12:
-        end_date = datetime(date.year + 1, 1, 1) - timedelta(seconds=1)
-    else:
-        end_date = datetime(date.year, date.month + 1, 1) - timedelta(seconds=1)
+    if deleted_ids is not None:
+        deleted_ids.update(deleted)
+    if sync_info is not None:
+        sync_info["project_etags"] = {project.id: project.etag for project in projects if project.etag}
 
-    # 获取本月已完成任务
-    response = client.get_completed_tasks(
-        from_date=start_date.strftime("%Y-%m-%d %H:%M:%S"),
-        to_date=end_date.strftime("%Y-%m-%d %H:%M:%S")
-    )
+    start_date, end_date = window or get_month_range(date)
+
+    # 获取窗口内的已完成任务（已结束的月份从缓存读取，只重新获取仍未结束的月份）
+    # 之后被删除或重新打开（重新出现在待办中）的任务从缓存中剔除
+    if cache:
+        response = cache.get_range(start_date, end_date,
+                                   lambda month_start, month_end: fetch_completed_tasks(client, month_start, month_end),
+                                   now=date, evict_ids=deleted | {task.id for task in todo_tasks})
+    else:
+        response = fetch_completed_tasks(client, start_date, end_date)
+    # 保存快照时，已完成任务按合并缓存后的结果保存，回放时不依赖本地缓存
+    recorder = getattr(client, 'recorder', None)
+    if recorder:
+        recorder.write_json('completed', response)
     for task_data in response:
         if task_data:
-            task = Task(task_data)
+            task = Task.decode(task_data)
             if task.status == 2:
-                # 预处理时间字段
-                preprocess_task_dates(task)
-                completed_tasks.append(task)
+                completed_time = task._processed_completedTime
+                if completed_time is None or start_date <= completed_time <= end_date:
+                    completed_tasks.append(task)
 
     return projects, todo_tasks, completed_tasks
 
-def preprocess_task_dates(task: Task):
-    """
-    预处理任务的时间字段
-    
-    对任务的 startDate 和 dueDate 进行格式化处理：
-    1. 使用 formate_datetime 将 ISO 字符串转换为 datetime 对象
-    2. 对于 isAllDay 为 true 的任务，dueDate 需要减一天
-    3. 将处理后的 datetime 对象存储为临时属性
-    
-    参数:
-        task: Task 对象，需要预处理时间字段的任务
-    """
-    
-    # 处理 startDate
-    if task.startDate:
-        processed_start = formate_datetime(task.startDate)
-        # 使用 setattr 动态添加属性
-        setattr(task, '_processed_startDate', processed_start)
-    
-    # 处理 dueDate
-    if task.dueDate:
-        dt = formate_datetime(task.dueDate)
-        # 如果是全天任务，dueDate 需要减一天
-        if getattr(task, 'isAllDay', False) and task.startDate != task.dueDate and dt:
-            dt = dt - timedelta(days=1)
-        # 使用 setattr 动态添加属性
-        setattr(task, '_processed_dueDate', dt)
-
-def get_habits(client, date):
+def get_habits(client, date, from_date: Optional[datetime] = None):
     """
     获取滴答清单中的习惯数据和打卡记录
     
@@ -827,6 +1368,7 @@ def get_habits(client, date):
     参数:
         client: Dida365Client 实例，用于与滴答清单 API 交互
         date: 日期对象，用于确定获取习惯打卡记录的时间范围
+        from_date: 打卡记录的起始日期，默认只获取当天（用于增量导出时覆盖整个窗口）
         
     返回:
         三元组 (habits, checkins, today_stamp)，分别为习惯列表、打卡记录和当天时间戳
@@ -838,14 +1380,13 @@ def get_habits(client, date):
     habits_data = client.get_habits()
     habits = []
     if isinstance(habits_data, list):
-        for h in habits_data:
-            habit = Habit(h)
+        for habit in Habit.decode_many(habits_data):
             # 只保留状态为活跃的习惯
-            if getattr(habit, 'status', None) == 0:
+            if habit.status == 0:
                 habits.append(habit)
     
     # 计算 stamp（前一天）- 滴答清单 API 需要前一天的时间戳作为参数
-    prev_day = start_date - timedelta(days=1)
+    prev_day = (from_date or start_date) - timedelta(days=1)
     stamp = prev_day.strftime("%Y%m%d")
     
     # 获取所有习惯的 ID
@@ -859,31 +1400,204 @@ def get_habits(client, date):
 
     return habits, checkins, today_stamp
 
-if __name__ == "__main__":
+def checkin_marker(habits, checkins, date: datetime) -> str:
+    """
+    习惯和当天打卡记录的变化标记（习惯的修改时间、总打卡次数，以及当天每条打卡的状态、数值和时间）
+
+    参数:
+        habits: 启用的习惯列表
+        checkins: 打卡记录（get_habits_checkins 的返回值，可以覆盖更早的日期，只取当天的部分）
+        date: 当前日期
+    """
+    today_stamp = int(date.strftime("%Y%m%d"))
+    records = []
+    for habit_id, items in ((checkins or {}).get('checkins') or {}).items():
+        for item in items or []:
+            if item and int(item.get('checkinStamp') or 0) >= today_stamp:
+                records.append([habit_id, item.get('checkinStamp'), item.get('status'), item.get('value'),
+                                item.get('checkinTime')])
+    return fingerprint(sorted(([habit.id, habit.modifiedTime, habit.totalCheckIns] for habit in habits), key=str),
+                       sorted(records, key=str))
+
+def probe_changes(client, probe: ChangeProbe, date: Optional[datetime] = None) -> bool:
+    """
+    用一次增量同步请求探测滴答清单数据是否有变化；任务没有变化时再获取习惯和当天的打卡记录（两个很小的请求）比较打卡标记
+
+    参数:
+        client: Dida365Client 实例
+        probe: 变化探测器，markers 中保存了上次完整导出的检查点、项目 etag 和打卡标记
+        date: 当前日期，默认为现在
+
+    返回:
+        有变化（或无法判断）时返回 True
+    """
+    checkpoint = probe.markers.get("checkPoint")
+    if not checkpoint:
+        return True
+    try:
+        response = client.get_sync_changes(checkpoint)
+    except Exception as e:
+        print(f"变化探测失败，执行完整导出: {e}")
+        return True
+    sync_task_bean = response.get("syncTaskBean") or {}
+    if sync_task_bean.get("update") or sync_task_bean.get("delete"):
+        return True
+    project_etags = probe.markers.get("project_etags", {})
+    for project in response.get("projectProfiles") or []:
+        if project and project_etags.get(project.get("id")) != project.get("etag"):
+            return True
+    if not probe.markers.get("checkins"):
+        return True
+    date = date or datetime.now()
+    try:
+        habits, checkins, _ = get_habits(client, date)
+    except Exception as e:
+        print(f"打卡变化探测失败，执行完整导出: {e}")
+        return True
+    return checkin_marker(habits, checkins, date) != probe.markers["checkins"]
+
+def fetch_data(date: datetime, force: bool = False, output_dir: Optional[str] = None, client=None,
+               client_factory: Optional[Callable[[], Dida365Client]] = None,
+               window: Optional[Tuple[datetime, datetime]] = None) -> Optional[dict]:
+    """
+    获取一次导出需要的全部数据（项目、任务、习惯和打卡记录）
+
+    启用变化探测时（PROBE_ENABLED，默认启用），未到下次探测时间或探测到没有变化会返回 None。
+    设置 SNAPSHOT_ENABLED=true 时同时保存原始响应快照，供 render_from_snapshot 离线重新渲染。
+
+    参数:
+        date: 当前日期（不带时区信息）
+        force: 是否跳过变化探测，强制完整导出
+        output_dir: 输出目录，默认为 get_output_dir()
+        client: 指定客户端（如从快照回放的 SnapshotClient），此时不做变化探测、不使用已完成任务缓存、不保存快照
+        client_factory: 需要发起请求时创建客户端的函数（多账号模式下按账号创建），默认为 Dida365Client()
+        window: 导出窗口，默认按 date 和环境变量计算（从快照回放时使用快照中记录的窗口）
+
+    返回:
+        包含 client、probe、sync_info、deleted_ids、window、projects、todo_tasks、completed_tasks、habits、checkins 的字典，
+        无需导出时返回 None
+    """
+    output_dir = output_dir or get_output_dir()
+    window = window or get_export_window(date)
+    state_dir = get_state_dir(output_dir)
+
+    replay = client is not None
+    probe = ChangeProbe(state_dir, 'dida365') if ChangeProbe.enabled() and not replay else None
+    if probe and not force and not probe.due(date):
+        print(f"未到下次探测时间（{probe.next_probe_at}），跳过滴答清单导出")
+        return None
+
     # 初始化滴答清单客户端
-    client = Dida365Client()
-    
+    if client is None:
+        client = client_factory() if client_factory else Dida365Client()
+
+    if probe and not force and not probe.needs_full_run(date) and not probe_changes(client, probe, date):
+        probe.record_idle(date)
+        return None
+
+    if not replay:
+        from Snapshot import SnapshotRecorder, snapshot_enabled
+        if snapshot_enabled():
+            client.recorder = SnapshotRecorder(state_dir, 'dida365', date)
+
+    # 获取任务和项目数据
+    sync_info = {}
+    cache = CompletedTaskCache(state_dir) if CompletedTaskCache.enabled() and not replay else None
+    deleted_ids = set()
+    projects, todo_tasks, completed_tasks = get_tasks(client, date, sync_info, window, cache, deleted_ids)
+
+    # 获取习惯数据和打卡记录（覆盖整个窗口，便于重新渲染窗口内受影响的日摘要）
+    habits, checkins, today_stamp = get_habits(client, date, from_date=window[0])
+
+    recorder = getattr(client, 'recorder', None)
+    if recorder:
+        recorder.finish(inbox_id=client.inbox_id, window=[window[0].isoformat(), window[1].isoformat()])
+        client.recorder = None
+
+    return {
+        'date': date,
+        'output_dir': output_dir,
+        'window': window,
+        'client': client,
+        'probe': probe,
+        'sync_info': sync_info,
+        'deleted_ids': deleted_ids,
+        'projects': projects,
+        'todo_tasks': todo_tasks,
+        'completed_tasks': completed_tasks,
+        'habits': habits,
+        'checkins': checkins,
+    }
+
+def record_run(data: dict, exporter: Exporter):
+    """
+    导出完成后记录本次完整导出和新的变化标记
+
+    参数:
+        data: fetch_data 的返回值
+        exporter: 本次使用的导出器
+    """
+    probe = data['probe']
+    if probe:
+        changed = bool(exporter.summary_index.changed_ids or exporter.summary_index.removed_ids)
+        probe.record_full_run(data['date'], changed, **data['sync_info'],
+                              checkins=checkin_marker(data['habits'], data['checkins'], data['date']))
+
+def main(force: bool = False) -> bool:
+    """
+    执行一次滴答清单导出
+
+    启用变化探测时（PROBE_ENABLED，默认启用），未到下次探测时间或探测到没有变化会直接返回；
+    已有其他导出进程在运行时也直接返回。
+
+    参数:
+        force: 是否跳过变化探测，强制完整导出
+
+    返回:
+        是否执行了完整导出
+    """
+    lock = RunLock(get_state_dir(get_output_dir()))
+    if not lock.acquire():
+        print("已有导出进程在运行，跳过本次滴答清单导出")
+        return False
+    try:
+        return _run(force)
+    finally:
+        lock.release()
+
+def _run(force: bool) -> bool:
+    """
+    在持有运行锁的情况下执行一次导出
+    """
     # 获取当前日期（不带时区信息）
     date = datetime.now()
     date = date.replace(tzinfo=None)
 
-    # 获取任务和项目数据
-    projects, todo_tasks, completed_tasks = get_tasks(client, date)
-    
-    # 获取习惯数据和打卡记录
-    habits, checkins, today_stamp = get_habits(client, date)
+    data = fetch_data(date, force)
+    if data is None:
+        return False
 
     # 初始化导出器并执行导出操作
-    exporter = Exporter(projects, todo_tasks, completed_tasks)
+    exporter = Exporter(data['projects'], data['todo_tasks'], data['completed_tasks'],
+                        output_dir=data['output_dir'], window=data['window'], deleted_ids=data['deleted_ids'])
     
     # 导出项目任务到 Markdown 文件
     exporter.export_project_tasks()
     
-    # 导出每日任务摘要
-    exporter.export_daily_summary(date, habits, checkins, today_stamp)
-    
-    # 导出每周任务摘要
-    exporter.export_weekly_summary(date)
-    
-    # 导出每月任务摘要
-    exporter.export_monthly_summary(date)
\ No newline at end of file
+    # 增量导出受影响的日/周/月摘要
+    exporter.export_changed_summaries(date, data['habits'], data['checkins'], data['window'])
+
+    # 导出机器可读的数据集
+    exporter.export_dataset(data['habits'], data['checkins'])
+
+    # 导出每月、每年的任务统计页
+    exporter.export_analytics(date)
+
+    # 增量更新全文搜索索引
+    exporter.export_search_index(data['client'])
+
+    record_run(data, exporter)
+    return True
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import os
+from typing import Dict, Iterable, List, Optional
+from StateStore import load_json, save_json
+
+# 孤立笔记的处理策略：移动到归档目录、直接删除、保留不动
+ORPHAN_POLICIES = ('archive', 'delete', 'keep')
+
+
+def orphan_policy() -> str:
+    """
+    孤立任务笔记的处理策略（环境变量 ORPHAN_POLICY，默认 archive，无法识别的值按 keep 处理）
+    """
+    policy = os.getenv('ORPHAN_POLICY', 'archive').lower()
+    return policy if policy in ORPHAN_POLICIES else 'keep'
+
+
+class ExportRegistry:
+    """
+    已导出文件登记表
+
+    记录每个任务笔记和清单索引笔记写入的位置（相对于输出目录的路径），任务被删除、移入回收站或不再出现在同步结果中时，
+    按登记的路径直接定位其笔记进行归档或删除，不需要遍历任务目录。
+
+    状态保存在状态目录下的 exported_files.json 中。
+    """
+
+    def __init__(self, state_dir: str, root: str):
+        """
+        初始化已导出文件登记表
+
+        参数:
+            state_dir: 状态目录
+            root: 输出目录（登记的路径相对于该目录）
+        """
+        self.path = os.path.join(state_dir, 'exported_files.json')
+        self.root = root
+        data = load_json(self.path, {}) or {}
+        # 任务ID -> 笔记相对路径
+        self.tasks: Dict[str, str] = data.get('tasks', {})
+        # 清单ID -> 清单索引笔记相对路径（TASKS_INDEX_MODE=project 时）
+        self.projects: Dict[str, str] = data.get('projects', {})
+        # 笔记所用的目录布局（见 TaskLayout.key），登记表建立之前的笔记都在任务目录顶层
+        self.layout: str = data.get('layout', 'flat')
+        self._saved_layout = self.layout
+        self._dirty = False
+
+    def get(self, task_id: str, kind: str = 'tasks') -> Optional[str]:
+        """
+        返回任务笔记（kind 为 projects 时为清单索引笔记）的绝对路径，未登记时返回 None
+        """
+        relpath = getattr(self, kind).get(task_id)
+        return os.path.join(self.root, relpath) if relpath else None
+
+    def record(self, task_id: str, path: str, kind: str = 'tasks'):
+        """
+        登记笔记的位置
+
+        参数:
+            task_id: 任务 ID（kind 为 projects 时为清单 ID）
+            path: 笔记的绝对路径
+            kind: tasks 或 projects
+        """
+        entries = getattr(self, kind)
+        relpath = os.path.relpath(path, self.root)
+        if entries.get(task_id) != relpath:
+            entries[task_id] = relpath
+            self._dirty = True
+
+    def forget(self, task_id: str, kind: str = 'tasks'):
+        if getattr(self, kind).pop(task_id, None) is not None:
+            self._dirty = True
+
+    def reconcile(self, orphan_ids: Iterable[str], policy: str, archive_dir: str,
+                  fallback_dir: Optional[str] = None) -> List[str]:
+        """
+        按策略处理孤立任务的笔记，并从登记表中移除
+
+        参数:
+            orphan_ids: 已删除或不再出现的任务 ID
+            policy: 处理策略（archive / delete / keep）
+            archive_dir: 归档目录（policy 为 archive 时使用）
+            fallback_dir: 未登记的任务在该目录下查找 <任务ID>.md（登记表建立之前导出的笔记）
+
+        返回:
+            实际处理（归档、删除或保留）的笔记路径列表
+        """
+        handled = []
+        for task_id in sorted(set(orphan_ids)):
+            path = self.get(task_id)
+            if path is None and fallback_dir:
+                path = os.path.join(fallback_dir, f"{task_id}.md")
+            self.forget(task_id)
+            if not path or not os.path.exists(path):
+                continue
+            if policy == 'archive':
+                os.makedirs(archive_dir, exist_ok=True)
+                os.replace(path, os.path.join(archive_dir, os.path.basename(path)))
+            elif policy == 'delete':
+                os.remove(path)
+            handled.append(path)
+        return handled
+
+    def save(self):
+        """
+        登记表有变化时保存到状态文件
+        """
+        if self._dirty or self.layout != self._saved_layout:
+            save_json(self.path, {'layout': self.layout, 'tasks': self.tasks, 'projects': self.projects})
+            self._saved_layout = self.layout
+            self._dirty = False
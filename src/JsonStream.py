@@ -0,0 +1,196 @@
+import json
+import codecs
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+
+# 流式解析的目标：路径 -> 'items'（逐个产出数组元素）或 'value'（产出完整的值）
+Targets = Dict[Tuple[str, ...], str]
+
+_WHITESPACE = ' \t\n\r'
+
+
+class _StreamReader:
+    """
+    基于分块输入的增量 JSON 读取器
+
+    只在结构层面（对象的键、数组的分隔符）逐字符推进，
+    叶子值和目标数组的元素交给 json.JSONDecoder.raw_decode 解析，
+    因此内存占用只与单个元素的大小有关，而与整个响应的大小无关。
+    """
+
+    def __init__(self, chunks: Iterable, compact_size: int = 1 << 16):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._compact_size = compact_size
+        self._eof = False
+        self.buf = ''
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        """
+        读取下一块数据，已经到达末尾时返回 False
+        """
+        if self._eof:
+            return False
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                # 丢弃已消费的部分，避免缓冲区无限增长
+                if self.pos > self._compact_size:
+                    self.buf = self.buf[self.pos:]
+                    self.pos = 0
+                self.buf += text
+                return True
+        self.buf += self._utf8.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def peek(self) -> Optional[str]:
+        """
+        跳过空白并返回下一个字符（不消费），到达末尾时返回 None
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return None
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"JSON 格式错误：期望 {char!r}，位置 {self.pos}")
+        self.pos += 1
+
+    def decode_value(self) -> Any:
+        """
+        解析下一个完整的 JSON 值，数据不完整时继续读取后重试
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # 数字等值靠近缓冲区末尾时可能被截断（如 "-1." 会被解析为 -1），读取更多数据后重新解析
+            if end + 64 >= len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def skip_value(self):
+        """
+        跳过下一个值；对象和数组逐个元素跳过，避免一次性构建大型容器
+        """
+        char = self.peek()
+        if char == '{':
+            for _ in self.walk_object((), {}):
+                pass
+        elif char == '[':
+            self.pos += 1
+            if self.peek() == ']':
+                self.pos += 1
+                return
+            while True:
+                self.skip_value()
+                if self.peek() == ',':
+                    self.pos += 1
+                    continue
+                self.expect(']')
+                return
+        else:
+            self.decode_value()
+
+    def iter_array(self) -> Iterator[Any]:
+        """
+        逐个产出数组元素
+        """
+        if self.peek() == 'n':
+            # null 视为空数组
+            self.decode_value()
+            return
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.decode_value()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+    def walk_object(self, path: Tuple[str, ...], targets: Targets) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+        """
+        遍历对象，产出目标路径上的值
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.decode_value()
+            self.expect(':')
+            child = path + (key,)
+            mode = targets.get(child)
+            if mode == 'items':
+                for item in self.iter_array():
+                    yield child, item
+            elif mode == 'value':
+                yield child, self.decode_value()
+            elif self.peek() == '{' and any(target[:len(child)] == child for target in targets):
+                yield from self.walk_object(child, targets)
+            else:
+                self.skip_value()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
+
+
+def iter_json_paths(chunks: Iterable, targets: Targets) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """
+    流式解析 JSON 对象，按出现顺序产出目标路径上的值
+
+    参数:
+        chunks: 字节块或字符串块的可迭代对象（如 response.iter_content()）
+        targets: 路径 -> 'items' / 'value'，例如 {('syncTaskBean', 'update'): 'items'}
+
+    返回:
+        (路径, 值) 的迭代器
+    """
+    reader = _StreamReader(chunks)
+    if reader.peek() is None:
+        return
+    yield from reader.walk_object((), targets)
+
+
+def iter_object_paths(data: dict, targets: Targets) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """
+    对已解析的字典按与 iter_json_paths 相同的方式产出目标路径上的值
+
+    用于非流式请求的兼容路径。
+
+    参数:
+        data: 已解析的 JSON 对象
+        targets: 路径 -> 'items' / 'value'
+
+    返回:
+        (路径, 值) 的迭代器
+    """
+    for path, mode in targets.items():
+        value: Any = data
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is None:
+            continue
+        if mode == 'items':
+            for item in value:
+                yield path, item
+        else:
+            yield path, value
@@ -0,0 +1,286 @@
+import os
+import re
+import json
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from Types import MemosRecord
+from StateStore import load_json, save_json
+
+try:
+    import orjson  # 可选依赖：安装后解码响应更快
+except ImportError:
+    orjson = None
+
+# 支持的 Memos API 格式：
+# - v0：/api/v1/memo（或更早的 /api/memo），limit/offset/rowStatus 分页，返回 Memo 数组，时间为 Unix 时间戳
+# - v1：/api/v1/memos（Memos 0.22 及以后），pageSize/pageToken 分页，返回 {"memos": [...], "nextPageToken": ...}，
+#   时间为 RFC 3339 字符串，支持 filter 过滤表达式
+API_VERSIONS = ('v0', 'v1')
+
+# Go 返回的纳秒精度时间，fromisoformat 在旧版本 Python 中只接受最多 6 位小数
+_FRACTION_PATTERN = re.compile(r'(\.\d{6})\d+')
+
+
+def parse_rfc3339(value: Optional[str]) -> Optional[int]:
+    """
+    把 RFC 3339 时间字符串转换为 Unix 时间戳（秒），为空时返回 None
+    """
+    if not value:
+        return None
+    dt = datetime.fromisoformat(_FRACTION_PATTERN.sub(r'\1', value.replace('Z', '+00:00')))
+    return int(dt.timestamp())
+
+
+def format_rfc3339(timestamp: int) -> str:
+    """
+    把 Unix 时间戳转换为 RFC 3339 时间字符串（UTC）
+    """
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _short_name(name: Optional[str]) -> Optional[str]:
+    """
+    资源名（如 memos/123、resources/abc）的最后一段
+    """
+    return name.rsplit('/', 1)[-1] if name else None
+
+
+def decode_v1_memo(data: dict) -> MemosRecord:
+    """
+    把 v1 API 返回的 Memo 转换为 MemosRecord（与 v0 的字段一致：id、createdTs、updatedTs、rowStatus、resourceList）
+    """
+    status = data.get('state') or data.get('rowStatus') or 'NORMAL'
+    resources = data.get('attachments') or data.get('resources') or []
+    return MemosRecord.decode({
+        'id': _short_name(data.get('name')) or data.get('uid'),
+        'name': data.get('name'),
+        'content': data.get('content'),
+        'createdTs': parse_rfc3339(data.get('createTime') or data.get('displayTime')),
+        'updatedTs': parse_rfc3339(data.get('updateTime')),
+        'createdAt': data.get('createTime'),
+        'updatedAt': data.get('updateTime'),
+        # v1 中正常状态为 NORMAL（0.22、0.23 为 ACTIVE）
+        'rowStatus': 'NORMAL' if status in ('NORMAL', 'ACTIVE') else status,
+        'pinned': bool(data.get('pinned')),
+        'resourceList': [{
+            'name': resource.get('name'),
+            'id': _short_name(resource.get('name')),
+            'uid': resource.get('uid') or _short_name(resource.get('name')),
+            'filename': resource.get('filename'),
+            'type': resource.get('type'),
+            'size': resource.get('size'),
+            'externalLink': resource.get('externalLink'),
+        } for resource in resources if resource],
+    })
+
+
+def decode_memos(raw) -> List[MemosRecord]:
+    """
+    把 Memos 响应（原始字节或已解析的数据）解码为 MemosRecord 列表，按响应的结构自动区分格式：
+    数组为 v0，{"memos": [...]} 为 v1，{"data": [...]} 为更早的 v0 包装格式
+    """
+    if isinstance(raw, (bytes, bytearray, memoryview, str)):
+        raw = (orjson.loads(raw) if orjson else json.loads(raw)) if raw else None
+    if isinstance(raw, dict):
+        if 'memos' in raw:
+            return [decode_v1_memo(item) for item in raw['memos'] or [] if item]
+        raw = raw.get('data')
+    return MemosRecord.decode_many(raw or [])
+
+
+class MemosApi:
+    """
+    Memos API 适配器
+
+    按 MEMOS_API_VERSION（v0 / v1，默认 auto）选择 API 格式；auto 时根据地址判断（以 /memos 结尾为 v1，以 /memo 结尾为 v0），
+    只配置了服务器地址时请求 /api/v1/workspace/profile 检测服务器版本（0.22 及以后为 v1），
+    得到明确结果（返回版本号或 404）时缓存在状态目录的 memos_api.json 中。两种格式的响应都转换为 MemosRecord。
+
+    按时间获取时，v1 通过 filter 表达式在服务端过滤，只传输需要的时间范围；
+    v0 不支持按时间过滤，逐页获取到早于起始时间为止。
+    """
+
+    def __init__(self, api_url: str, token: Optional[str], session=None, state_dir: Optional[str] = None,
+                 version: Optional[str] = None):
+        """
+        参数:
+            api_url: MEMOS_API 的值（完整的 Memo 列表地址或服务器地址）
+            token: Memos Token
+            session: 发起请求使用的会话（多账号时为 Accounts.AccountSession），默认直接使用 requests
+            state_dir: 状态目录（缓存版本检测结果），为空时不缓存
+            version: API 格式，默认读取环境变量 MEMOS_API_VERSION
+        """
+        self.api_url = api_url.rstrip('/')
+        self.token = token
+        self.session = session
+        self.state_dir = state_dir
+        version = (version or os.getenv('MEMOS_API_VERSION', 'auto')).lower()
+        self._version = version if version in API_VERSIONS else None
+        self._endpoint = self.api_url if self._version else None
+
+    @property
+    def origin(self) -> str:
+        parts = urlsplit(self.api_url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _headers(self) -> dict:
+        headers = {"Accept": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def _get(self, url: str, params: Optional[dict] = None):
+        headers = self._headers()
+        if self.session is None:
+            import requests as session  # 延迟导入：只在真正发起请求时加载
+        else:
+            session = self.session
+        return session.get(url, headers=headers, params=params)
+
+    def _detect(self):
+        """
+        确定 API 格式和 Memo 列表地址
+        """
+        path = urlsplit(self.api_url).path
+        if path.endswith('/memos'):
+            self._version, self._endpoint = 'v1', self.api_url
+            return
+        if path.endswith('/memo'):
+            self._version, self._endpoint = 'v0', self.api_url
+            return
+        cache_path = os.path.join(self.state_dir, 'memos_api.json') if self.state_dir else None
+        cached = (load_json(cache_path, {}) or {}).get(self.api_url) if cache_path else None
+        if cached:
+            self._version, self._endpoint = cached['version'], cached['endpoint']
+            return
+        import requests  # 延迟导入：只在真正发起请求时加载
+        server_version = None
+        # 只有明确的结果才缓存：返回了版本号（v1），或接口不存在（404，v0）；
+        # 5xx、网络错误等暂时性故障本次按 v0 处理，下次运行重新检测
+        definitive = False
+        try:
+            response = self._get(f"{self.origin}/api/v1/workspace/profile")
+            if response.status_code == 200:
+                server_version = (response.json() or {}).get('version')
+                definitive = bool(server_version)
+            elif response.status_code == 404:
+                definitive = True
+            else:
+                print(f"检测 Memos 服务器版本失败：HTTP {response.status_code}")
+        except (requests.RequestException, ValueError) as e:
+            print(f"检测 Memos 服务器版本失败：{e}")
+        if server_version:
+            self._version, self._endpoint = 'v1', f"{self.origin}/api/v1/memos"
+        else:
+            self._version, self._endpoint = 'v0', f"{self.origin}/api/v1/memo"
+        if not definitive:
+            print(f"本次按 {self._version} 格式获取 Memos，不缓存检测结果")
+            return
+        print(f"检测到 Memos API 格式：{self._version}（服务器版本 {server_version or '0.21 或更早'}）")
+        if cache_path:
+            cache = load_json(cache_path, {}) or {}
+            cache[self.api_url] = {'version': self._version, 'endpoint': self._endpoint, 'server_version': server_version}
+            save_json(cache_path, cache)
+
+    @property
+    def version(self) -> str:
+        if self._version is None or self._endpoint is None:
+            self._detect()
+        return self._version
+
+    @property
+    def endpoint(self) -> str:
+        self.version
+        return self._endpoint
+
+    def page_request(self, page_size: int, page_token: Optional[str] = None,
+                     since: Optional[int] = None) -> Tuple[str, dict, dict]:
+        """
+        构建获取一页 NORMAL 状态的 Memos 的请求（同步和异步获取共用）
+
+        参数:
+            page_size: 每页数量
+            page_token: 上一页返回的翻页标记（v0 为偏移量），第一页为 None
+            since: 只获取该时间戳之后创建的 Memo（v1 在服务端过滤，v0 在 parse_page 中本地过滤）
+
+        返回:
+            三元组 (请求地址, 请求头, 查询参数)
+        """
+        if self.version == 'v1':
+            params = {"pageSize": page_size, "state": "NORMAL"}
+            if page_token:
+                params["pageToken"] = page_token
+            if since is not None:
+                # 过滤表达式因服务器版本而异，可通过 MEMOS_V1_FILTER 修改（可用 {since_ts} 时间戳、{since} RFC 3339）
+                template = os.getenv('MEMOS_V1_FILTER') or 'created_ts >= {since_ts}'
+                params["filter"] = template.format(since_ts=since, since=format_rfc3339(since))
+        else:
+            params = {"limit": page_size, "offset": int(page_token or 0), "rowStatus": "NORMAL"}
+        return self.endpoint, self._headers(), params
+
+    def parse_page(self, data, page_size: int, page_token: Optional[str] = None,
+                   since: Optional[int] = None) -> Tuple[List[MemosRecord], Optional[str]]:
+        """
+        解析 page_request 对应的响应（已解析的 JSON），参数与 page_request 相同
+
+        返回:
+            二元组 (本页 Memos, 下一页的翻页标记)，没有下一页时标记为 None
+        """
+        memos = decode_memos(data)
+        if self.version == 'v1':
+            return memos, (data or {}).get('nextPageToken') or None
+        next_token = None
+        if len(memos) == page_size:
+            # 逐页获取到早于起始时间为止（置顶的 Memo 不按时间排序，不参与判断）
+            timestamps = [memo.createdTs for memo in memos if not getattr(memo, 'pinned', False)]
+            if since is None or not timestamps or min(timestamps) >= since:
+                next_token = str(int(page_token or 0) + page_size)
+        if since is not None:
+            memos = [memo for memo in memos if memo.createdTs and memo.createdTs >= since]
+        return memos, next_token
+
+    def list_memos(self, page_size: int, page_token: Optional[str] = None, since: Optional[int] = None,
+                   recorder=None) -> Tuple[List[MemosRecord], Optional[str]]:
+        """
+        获取一页 NORMAL 状态的 Memos（按创建时间倒序，置顶的排在最前）
+
+        参数:
+            page_size: 每页数量
+            page_token: 上一页返回的翻页标记（v0 为偏移量），第一页为 None
+            since: 只获取该时间戳之后创建的 Memo（v1 在服务端过滤，v0 在本地过滤）
+            recorder: 保存原始响应快照（Snapshot.SnapshotRecorder）
+
+        返回:
+            二元组 (本页 Memos, 下一页的翻页标记)，没有下一页时标记为 None
+        """
+        url, _, params = self.page_request(page_size, page_token, since)
+        response = self._get(url, params)
+        response.raise_for_status()
+        if recorder:
+            recorder.write_bytes('memos', response.content)
+        data = orjson.loads(response.content) if orjson else json.loads(response.content)
+        return self.parse_page(data, page_size, page_token, since)
+
+    async def list_memos_async(self, pool, page_size: int, page_token: Optional[str] = None,
+                               since: Optional[int] = None) -> Tuple[List[MemosRecord], Optional[str]]:
+        """
+        list_memos 的异步版本，通过共享的 AsyncDida365Client.AsyncHttpPool发起请求
+
+        版本检测（只配置服务器地址且没有缓存时）仍是一次同步请求。
+        """
+        url, headers, params = self.page_request(page_size, page_token, since)
+        data = await pool.request_json("GET", url, headers=headers, params=params)
+        return self.parse_page(data, page_size, page_token, since)
+
+    def iter_pages(self, page_size: int, since: Optional[int] = None) -> Iterator[List[MemosRecord]]:
+        """
+        逐页获取全部（或 since 之后创建的）NORMAL 状态的 Memos，按页生成，不一次性加载全部历史
+        """
+        page_token = None
+        while True:
+            memos, page_token = self.list_memos(page_size, page_token, since)
+            if memos:
+                yield memos
+            if not page_token:
+                return
@@ -0,0 +1,168 @@
+import os
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+from Types import MemosRecord
+from MemosIndex import format_memo, memo_datetime, memo_id, memo_tags, render_month, render_week, month_filename, week_filename
+
+
+def in_created_order(memos: Iterable[MemosRecord]) -> Iterator[MemosRecord]:
+    """
+    把 API 返回的 Memos 整理为按创建时间倒序的流
+
+    Memos 按创建时间倒序返回，但置顶的 Memo 排在最前面；置顶的 Memo 先暂存（数量很少），
+    流经过其创建时间时再插回原位。
+
+    参数:
+        memos: API 返回的 Memos（可以是逐页获取的生成器）
+    """
+    held = []
+    counter = itertools.count()
+    for memo in memos:
+        if getattr(memo, 'pinned', False):
+            heapq.heappush(held, (-memo.createdTs, next(counter), memo))
+            continue
+        while held and -held[0][0] >= memo.createdTs:
+            yield heapq.heappop(held)[2]
+        yield memo
+    while held:
+        yield heapq.heappop(held)[2]
+
+
+class MemosArchive:
+    """
+    全部历史 Memos 的流式归档
+
+    Memo 按创建时间倒序逐条加入，每条只换算一次时间，同时归入日、ISO 周和月三个桶；
+    流越过某天、某周、某月时立即写出对应文件并释放，内存中最多只保留一个月和一周的 Memo，
+    数年的 Memos 也可以在有限内存中导出。
+    """
+
+    def __init__(self, daily_dir: str, weekly_dir: str, monthly_dir: str, links: Optional[Dict[str, str]] = None,
+                 since: Optional[datetime] = None):
+        """
+        参数:
+            daily_dir: 每日 Memos 目录
+            weekly_dir: 每周 Memos 目录
+            monthly_dir: 每月 Memos 目录
+            links: 资源主键 -> 已下载的附件文件名（可在逐页获取时继续补充）
+            since: 只归档该日期（北京时间 0 点，应为月初）之后的 Memos；起点所在的周不完整，不写出该周文件
+        """
+        self.since = since
+        self.daily_dir = daily_dir
+        self.weekly_dir = weekly_dir
+        self.monthly_dir = monthly_dir
+        self.links = links if links is not None else {}
+        # 当前打开的桶：日期、所在周的周一、所在月份
+        self._day: Optional[datetime] = None
+        self._day_entries: List[tuple] = []
+        self._week: Optional[datetime] = None
+        self._week_days: Dict[str, List[str]] = {}
+        self._month: Optional[tuple] = None
+        self._month_days: Dict[str, List[str]] = {}
+        # 已写出的文件名（用于清理不再有 Memo 的旧文件）
+        self.written: Dict[str, Set[str]] = {'daily': set(), 'weekly': set(), 'monthly': set()}
+        # 顺序异常（早于已写出的桶）而未能归档的 Memo ID
+        self.skipped: List[str] = []
+        # 带标签的 Memo：ID -> (日期, 标签列表)，用于重建标签索引
+        self.tags: Dict[str, tuple] = {}
+        self.count = 0
+
+    def add(self, memo: MemosRecord):
+        """
+        加入一条 Memo（必须按创建时间倒序加入，见 in_created_order）
+        """
+        if not memo.createdTs:
+            return
+        when = memo_datetime(memo)
+        day = datetime(when.year, when.month, when.day)
+        if self._day is not None and day != self._day:
+            if day > self._day:
+                # 所在的日文件已经写出
+                self.skipped.append(memo_id(memo))
+                return
+            self._close_day()
+            monday = day - timedelta(days=day.weekday())
+            if monday != self._week:
+                self._close_week()
+            if (day.year, day.month) != self._month:
+                self._close_month()
+        if self._day is None:
+            self._day = day
+            self._week = day - timedelta(days=day.weekday())
+            self._month = (day.year, day.month)
+        text = format_memo(memo, self.links, when)
+        tags = memo_tags(text)
+        if tags:
+            self.tags[memo_id(memo)] = (day.strftime('%Y-%m-%d'), tags)
+        self._day_entries.append((memo.createdTs, text))
+        self.count += 1
+
+    def _write(self, kind: str, directory: str, filename: str, content: str):
+        with open(os.path.join(directory, filename), 'w', encoding='utf-8') as f:
+            f.write(content)
+        self.written[kind].add(filename)
+
+    def _close_day(self):
+        if self._day is None:
+            return
+        day = self._day.strftime('%Y-%m-%d')
+        texts = [text for _, text in sorted(self._day_entries, key=lambda entry: entry[0])]
+        self._write('daily', self.daily_dir, f"{day}-Memos.md", "".join(texts))
+        self._week_days[day] = texts
+        self._month_days[day] = texts
+        self._day = None
+        self._day_entries = []
+
+    def _close_week(self):
+        if self._week is None:
+            return
+        if self.since is None or self._week >= self.since:
+            self._write('weekly', self.weekly_dir, week_filename(self._week),
+                        render_week(self._week, lambda day: self._week_days.get(day, [])))
+        self._week = None
+        self._week_days = {}
+
+    def _close_month(self):
+        if self._month is None:
+            return
+        year, month = self._month
+        self._write('monthly', self.monthly_dir, month_filename(year, month), render_month(year, month, self._month_days))
+        self._month = None
+        self._month_days = {}
+
+    def _in_range(self, kind: str, name: str) -> bool:
+        """
+        文件对应的日、周或月是否在归档范围内
+        """
+        if self.since is None:
+            return True
+        try:
+            if kind == 'daily':
+                start = datetime.strptime(name[:10], '%Y-%m-%d')
+            elif kind == 'weekly':
+                start = datetime.strptime(f"{name[:8]}-1", '%G-W%V-%u')
+            else:
+                start = datetime.strptime(name[:7], '%Y-%m')
+        except ValueError:
+            return False
+        return start >= self.since
+
+    def finish(self, prune: bool = True):
+        """
+        写出仍然打开的桶
+
+        参数:
+            prune: 是否删除目录中本次没有写出的旧 Memos 文件（对应的 Memo 已全部删除或归档；指定了 since 时只处理之后的文件）
+        """
+        self._close_day()
+        self._close_week()
+        self._close_month()
+        if prune:
+            for kind, directory in (('daily', self.daily_dir), ('weekly', self.weekly_dir), ('monthly', self.monthly_dir)):
+                for name in os.listdir(directory):
+                    if name.endswith('-Memos.md') and name not in self.written[kind] and self._in_range(kind, name):
+                        os.remove(os.path.join(directory, name))
+        if self.skipped:
+            print(f"有 {len(self.skipped)} 条 Memo 未按创建时间倒序返回，未能归档: {', '.join(self.skipped[:10])}")
@@ -0,0 +1,204 @@
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlsplit
+from Types import MemosRecord, MemosResource
+from StateStore import load_json, save_json
+
+# 在笔记中直接嵌入显示的图片扩展名
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.svg', '.avif'}
+
+_CHUNK_SIZE = 256 * 1024
+
+
+def attachments_enabled() -> bool:
+    """
+    是否下载 Memos 附件（环境变量 MEMOS_ATTACHMENTS，默认启用）
+    """
+    return os.getenv('MEMOS_ATTACHMENTS', 'true').lower() == 'true'
+
+
+def resource_key(resource: MemosResource) -> str:
+    """
+    资源的主键（优先使用 uid，其次 id）
+    """
+    return str(resource.uid or resource.id)
+
+
+def resource_embed(resource: MemosResource, filename: Optional[str]) -> Optional[str]:
+    """
+    返回资源在 Markdown 中的链接：已下载的图片嵌入显示，其他文件链接到本地副本，外部链接原样引用
+
+    参数:
+        resource: 资源
+        filename: 本地文件名（附件目录中按内容哈希命名的文件），未下载时为 None
+    """
+    name = resource.filename or resource.name or resource_key(resource)
+    if filename:
+        if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS:
+            return f"![[{filename}]]"
+        return f"[[{filename}|{name}]]"
+    if resource.externalLink:
+        if os.path.splitext(urlsplit(resource.externalLink).path)[1].lower() in IMAGE_EXTENSIONS:
+            return f"![{name}]({resource.externalLink})"
+        return f"[{name}]({resource.externalLink})"
+    return None
+
+
+class AttachmentStore:
+    """
+    Memos 附件的本地存储
+
+    附件以内容的 SHA-256 命名保存在附件目录中（<哈希前两位>/<哈希><扩展名>），相同内容只保存一份；
+    状态目录下的 memos_attachments.json 记录每个资源（按 uid/id）对应的文件和大小，
+    已下载且大小一致的资源不再发起请求。
+
+    下载使用有上限的线程池并发进行（MEMOS_ATTACHMENT_WORKERS，默认 4），按块流式写入 .part 临时文件，
+    中断后下次运行通过 Range 请求从已下载的位置继续。
+    """
+
+    def __init__(self, state_dir: str, attachments_dir: str, api_url: Optional[str] = None,
+                 token: Optional[str] = None, session=None, workers: Optional[int] = None):
+        """
+        参数:
+            state_dir: 状态目录
+            attachments_dir: 附件目录
+            api_url: Memos API 地址（用于推导资源下载地址），为空时不下载，只返回已下载的附件
+            token: Memos Token
+            session: 发起请求使用的会话（多账号时为 Accounts.AccountSession），默认直接使用 requests
+            workers: 最大并发下载数，默认读取环境变量 MEMOS_ATTACHMENT_WORKERS
+        """
+        self.path = os.path.join(state_dir, 'memos_attachments.json')
+        self.attachments_dir = attachments_dir
+        self.partial_dir = os.path.join(state_dir, 'attachments.part')
+        self.api_url = api_url
+        self.token = token
+        self.session = session
+        self.workers = max(workers or int(os.getenv('MEMOS_ATTACHMENT_WORKERS', '4')), 1)
+        data = load_json(self.path, {}) or {}
+        # 资源主键 -> {"sha256": 内容哈希, "size": 大小, "file": 相对于附件目录的路径}
+        self.resources: Dict[str, dict] = data.get('resources', {})
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def _url(self, resource: MemosResource) -> str:
+        """
+        资源的下载地址，默认 <Memos 地址>/o/r/<uid>（旧版本没有 uid 时为 /o/r/<id>/<文件名>，
+        v1 API 的资源为 /file/<资源名>/<文件名>），可通过 MEMOS_RESOURCE_URL 模板（可用 {origin}、{id}、{uid}、{name}、{filename}）修改
+        """
+        parts = urlsplit(self.api_url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        template = os.getenv('MEMOS_RESOURCE_URL')
+        if not template:
+            if resource.name and '/' in resource.name:
+                template = "{origin}/file/{name}/{filename}"
+            else:
+                template = "{origin}/o/r/{uid}" if resource.uid else "{origin}/o/r/{id}/{filename}"
+        return template.format(origin=origin, id=resource.id, uid=resource.uid or '', name=resource.name or '',
+                               filename=resource.filename or '')
+
+    def _is_present(self, key: str, resource: MemosResource) -> bool:
+        entry = self.resources.get(key)
+        if not entry:
+            return False
+        if resource.size and entry.get('size') != resource.size:
+            return False
+        return os.path.exists(os.path.join(self.attachments_dir, entry['file']))
+
+    def _download(self, key: str, resource: MemosResource):
+        """
+        下载一个资源：续传 .part 文件，完成后按内容哈希放入附件目录
+        """
+        os.makedirs(self.partial_dir, exist_ok=True)
+        part_path = os.path.join(self.partial_dir, f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.part")
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if resource.size and offset > resource.size:
+            offset = 0
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        if self.session is None:
+            import requests as session  # 延迟导入：只在真正发起请求时加载
+        else:
+            session = self.session
+        response = session.get(self._url(resource), headers=headers, stream=True)
+        try:
+            if offset and response.status_code == 416:
+                # 上次已下载完整，只是没有来得及移动
+                pass
+            else:
+                response.raise_for_status()
+                # 服务端不支持 Range 时返回完整内容，从头写入
+                mode = 'ab' if offset and response.status_code == 206 else 'wb'
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+        finally:
+            response.close()
+
+        digest = hashlib.sha256()
+        size = 0
+        with open(part_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                size += len(chunk)
+        if resource.size and size != resource.size:
+            raise IOError(f"附件大小不一致（{size} != {resource.size}），下次运行继续下载")
+        sha256 = digest.hexdigest()
+        extension = os.path.splitext(resource.filename or '')[1].lower()
+        relpath = os.path.join(sha256[:2], f"{sha256}{extension}")
+        target = os.path.join(self.attachments_dir, relpath)
+        if os.path.exists(target):
+            os.remove(part_path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(part_path, target)
+        with self._lock:
+            self.resources[key] = {'sha256': sha256, 'size': size, 'file': relpath}
+            self._dirty = True
+
+    def sync(self, memos: Iterable[MemosRecord]) -> Dict[str, str]:
+        """
+        下载 Memos 中尚未下载的附件（设置了 api_url 时），返回已下载资源的本地文件名
+
+        参数:
+            memos: Memos 列表
+
+        返回:
+            资源主键 -> 附件文件名（按内容哈希命名，在 Obsidian 中可直接以文件名链接）
+        """
+        memos = list(memos)
+        pending: Dict[str, MemosResource] = {}
+        for memo in memos:
+            for resource in memo.resourceList:
+                key = resource_key(resource)
+                if resource.externalLink or key in pending or self._is_present(key, resource):
+                    continue
+                pending[key] = resource
+        if pending and self.api_url:
+            print(f"下载 Memos 附件 {len(pending)} 个")
+            with ThreadPoolExecutor(min(self.workers, len(pending))) as executor:
+                futures = {key: executor.submit(self._download, key, resource) for key, resource in pending.items()}
+                for key, future in futures.items():
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"下载 Memos 附件失败（下次运行重试）: {pending[key].filename or key} ({e})")
+        links = {}
+        for memo in memos:
+            for resource in memo.resourceList:
+                key = resource_key(resource)
+                if self._is_present(key, resource):
+                    links[key] = os.path.basename(self.resources[key]['file'])
+        return links
+
+    def save(self):
+        """
+        有新下载的附件时保存状态
+        """
+        if self._dirty:
+            save_json(self.path, {'resources': self.resources})
+            self._dirty = False
@@ -1,140 +1,492 @@
-import requests
 import os
-from Types import MemosRecord
+from MemosIndex import (MemosDayIndex, MemosTagIndex, memo_datetime, memo_id, render_month, render_week,
+                        month_filename, tag_filename, week_filename)
+from MemosAttachments import AttachmentStore, attachments_enabled
+from MemosApi import MemosApi, decode_memos
+from StateStore import fingerprint, get_state_dir
+from ChangeProbe import ChangeProbe
+from RunLock import RunLock
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
 # 加载 .env 文件
 load_dotenv()
 
-def fetch_memos(api_url, token, limit=20, offset=0, rowStatus="NORMAL"):
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/json",
-    }
-    params = {
-        "limit": limit,
-        "offset": offset,
-        "rowStatus": rowStatus,
-    }
-    response = requests.get(api_url, headers=headers, params=params)
-    response.raise_for_status()
-    data = response.json()
-    # 格式化为 MemosRecord
-    return [MemosRecord(item) for item in data]
+# 每次获取的 Memos 数量（最近的一页）
+MEMOS_PAGE_SIZE = 20
 
-def export_weekly_memos_summary(memos, output_dir):
+def fetch_memos(api_url, token, limit=20, offset=0, rowStatus="NORMAL", recorder=None, session=None, state_dir=None):
     """
-    导出每周 Memos 摘要，按 createdTs 聚合，输出为 Markdown
+    获取最近的一页 NORMAL 状态的 Memos（自动适配 v0 / v1 API，见 MemosApi）
+
+    参数:
+        api_url: Memos API 地址
+        token: Memos Token
+        limit: 每页数量
+        offset: 偏移量（只有 v0 API 支持）
+        rowStatus: 只支持 NORMAL，保留该参数以兼容旧的调用
+        recorder: 保存原始响应快照（Snapshot.SnapshotRecorder）
+        session: 发起请求使用的会话
+        state_dir: 状态目录（缓存 API 版本检测结果）
+    """
+    api = MemosApi(api_url, token, session, state_dir)
+    memos, _ = api.list_memos(limit, str(offset) if offset else None, recorder=recorder)
+    return memos
+
+def iter_memos(api_url, token, page_size=200, session=None, since=None, state_dir=None):
+    """
+    逐页获取全部（或 since 之后创建的）NORMAL 状态的 Memos（按页生成，不一次性加载全部历史）
+
+    参数:
+        api_url: Memos API 地址
+        token: Memos Token
+        page_size: 每页数量
+        session: 发起请求使用的会话
+        since: 只获取该时间戳之后创建的 Memo（v1 API 在服务端过滤）
+        state_dir: 状态目录（缓存 API 版本检测结果）
+
+    返回:
+        每次生成一页 MemosRecord 列表
+    """
+    return MemosApi(api_url, token, session, state_dir).iter_pages(page_size, since)
+
+async def fetch_memos_async(pool, api_url, token, limit=20, offset=0, rowStatus="NORMAL", state_dir=None):
+    """
+    fetch_memos 的异步版本，使用共享的 AsyncHttpPool（需要安装 aiohttp），请求参数和响应解码与 fetch_memos 相同（见 MemosApi），
+    可与 AsyncDida365Client 在同一事件循环中并发请求，例如并发获取多个分页（按偏移量分页只有 v0 API 支持）：
+
+        async with AsyncHttpPool() as pool:
+            pages = await asyncio.gather(*(fetch_memos_async(pool, api, token, 100, i * 100) for i in range(10)))
+    """
+    api = MemosApi(api_url, token, state_dir=state_dir)
+    memos, _ = await api.list_memos_async(pool, limit, str(offset) if offset else None)
+    return memos
+
+def export_weekly_memos_summary(index, touched, output_dir):
+    """
+    导出每周 Memos 摘要（周一到周日按天列出），只重新渲染包含变化日期的周和缺失的本周文件
+
+    参数:
+        index: MemosDayIndex
+        touched: 有变化的日期集合（YYYY-MM-DD）
+        output_dir: 每周 Memos 目录
     """
-    if not memos:
-        print("没有 Memos 数据")
-        return
-    # 获取本周起止时间（周一到周日）
     now = datetime.now(timezone(timedelta(hours=8)))
-    start_date = now - timedelta(days=now.weekday())
-    start_date = datetime(start_date.year, start_date.month, start_date.day, 0, 0, 0, tzinfo=timezone(timedelta(hours=8)))
-    end_date = start_date + timedelta(days=6, hours=23, minutes=59, seconds=59)
-    iso_year, week_num, _ = now.isocalendar()
-    filename = f"{iso_year}-W{week_num:02d}-Memos.md"
-    filepath = os.path.join(output_dir, filename)
-    # 按天聚合
-    days = [(start_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(7)]
-    week_days = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
-    days_with_weekday = [
-        f"{week_days[i]}（{(start_date + timedelta(days=i)).strftime('%Y-%m-%d')}）" for i in range(7)
-    ]
-    memos_by_day = {d: [] for d in days}
-    for memo in memos:
-        if not memo.createdTs:
+    mondays = {datetime.strptime(day, '%Y-%m-%d') for day in touched}
+    mondays = {day - timedelta(days=day.weekday()) for day in mondays}
+    this_monday = datetime(now.year, now.month, now.day) - timedelta(days=now.weekday())
+    if not os.path.exists(os.path.join(output_dir, week_filename(this_monday))):
+        mondays.add(this_monday)
+    for start_date in sorted(mondays):
+        filename = week_filename(start_date)
+        with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
+            f.write(render_week(start_date, index.day_texts))
+        print(f"已创建每周 Memos 摘要：{filename}")
+
+def export_monthly_memos(index, touched, monthly_dir):
+    """
+    导出每月 Memos，只重新渲染包含变化日期的月份；Memo 全部被删除的月份删除其文件
+
+    参数:
+        index: MemosDayIndex
+        touched: 有变化的日期集合（YYYY-MM-DD）
+        monthly_dir: 每月 Memos 目录
+    """
+    for month in sorted({day[:7] for day in touched}):
+        year, month_num = int(month[:4]), int(month[5:7])
+        filename = month_filename(year, month_num)
+        filepath = os.path.join(monthly_dir, filename)
+        days = index.month_days(month)
+        if not days:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+                print(f"已删除每月 Memos：{filename}")
             continue
-        dt = datetime.fromtimestamp(memo.createdTs, tz=timezone.utc) + timedelta(hours=8)
-        if start_date <= dt <= end_date:
-            date_str = dt.strftime('%Y-%m-%d')
-            if date_str in memos_by_day:
-                memos_by_day[date_str].append(memo)
-    content = f"# {iso_year} 第 {week_num:02d} 周 Memos 摘要\n\n"
-    content += f"**周期**：{start_date.strftime('%Y-%m-%d')} 至 {end_date.strftime('%Y-%m-%d')}\n\n"
-    for i, day in enumerate(days):
-        content += f"## {days_with_weekday[i]}\n\n"
-        day_memos = memos_by_day[day]
-        if day_memos:
-            day_memos_sorted = sorted(day_memos, key=lambda m: m.createdTs or 0)
-            for memo in day_memos_sorted:
-                dt = datetime.fromtimestamp(memo.createdTs, tz=timezone.utc) + timedelta(hours=8)
-                time_str = dt.strftime('%H:%M')
-                memo_lines = (memo.content or '').strip().split('\n')
-                target_first_line = f"- {time_str} "
-                if len(memo_lines) > 1:
-                    target_other_line = '\n' + '\n'.join([f"\t{line}" for line in memo_lines])
-                else:
-                    target_other_line = memo_lines[0] if memo_lines else ''
-                content += f"{target_first_line}{target_other_line}\n"
-        else:
-            content += "无 Memos\n"
-        content += "\n"
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
-    print(f"已创建每周 Memos 摘要：{filename}")
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(render_month(year, month_num, days))
+        print(f"已创建每月 Memos：{filename}")
 
-def export_daily_memos(memos, daily_dir):
+def export_daily_memos(index, touched, daily_dir):
     """
-    导出每日 Memos，每天一个 Markdown 文件
+    导出每日 Memos，每天一个 Markdown 文件，只重新渲染有变化的日期；Memo 全部被删除的日期删除其文件
+
+    参数:
+        index: MemosDayIndex
+        touched: 有变化的日期集合（YYYY-MM-DD）
+        daily_dir: 每日 Memos 目录
     """
-    if not memos:
-        print("没有 Memos 数据")
-        return
-    # 按天聚合
-    memos_by_day = {}
-    for memo in memos:
-        if not memo.createdTs:
+    for date_str in sorted(touched):
+        filename = f"{date_str}-Memos.md"
+        filepath = os.path.join(daily_dir, filename)
+        texts = index.day_texts(date_str)
+        if not texts:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+                print(f"已删除每日 Memos：{filename}")
+            continue
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write("".join(texts))
+        print(f"已创建每日 Memos：{filename}")
+
+def tag_pages_enabled():
+    """
+    是否生成标签页（环境变量 MEMOS_TAG_PAGES，默认启用）
+    """
+    return os.getenv('MEMOS_TAG_PAGES', 'true').lower() == 'true'
+
+def export_memos_tag_pages(tag_index, touched_tags, tags_dir):
+    """
+    导出标签页，每个标签一个 Markdown 文件，列出包含该标签的每日 Memos 链接（按日期倒序）；
+    只重新渲染有变化的标签，不再有 Memo 的标签删除其文件
+
+    参数:
+        tag_index: MemosTagIndex
+        touched_tags: 有变化的标签集合
+        tags_dir: 标签页目录
+    """
+    if touched_tags:
+        os.makedirs(tags_dir, exist_ok=True)
+    for tag in sorted(touched_tags):
+        filename = tag_filename(tag)
+        filepath = os.path.join(tags_dir, filename)
+        days = tag_index.tag_days(tag)
+        if not days:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+                print(f"已删除 Memos 标签页：{filename}")
             continue
-        dt = datetime.fromtimestamp(memo.createdTs, tz=timezone.utc) + timedelta(hours=8)
-        date_str = dt.strftime('%Y-%m-%d')
-        if date_str not in memos_by_day:
-            memos_by_day[date_str] = []
-        memos_by_day[date_str].append(memo)
-    for date_str, day_memos in memos_by_day.items():
-        if day_memos:
-            # 按 createdTs 正序排序
-            day_memos_sorted = sorted(day_memos, key=lambda m: m.createdTs or 0)
-            filename = f"{date_str}-Memos.md"
-            filepath = os.path.join(daily_dir, filename)
-            content = ""
-            for memo in day_memos_sorted:
-                dt = datetime.fromtimestamp(memo.createdTs, tz=timezone.utc) + timedelta(hours=8)
-                time_str = dt.strftime('%H:%M')
-                memo_lines = (memo.content or '').strip().split('\n')
-                target_first_line = f"- {time_str} "
-                if len(memo_lines) > 1:
-                    target_other_line = '\n' + '\n'.join([f"\t{line}" for line in memo_lines])
-                else:
-                    target_other_line = memo_lines[0] if memo_lines else ''
-                content += f"{target_first_line}{target_other_line}\n"
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"已创建每日 Memos：{filename}")
-        
-
-def main():
-    if os.getenv('OUTPUT_DIR'):
-        output_dir = os.getenv('OUTPUT_DIR')
+        content = f"# #{tag}\n\n"
+        content += f"共 {sum(days.values())} 条 Memo，{len(days)} 天\n\n"
+        for day in sorted(days, reverse=True):
+            content += f"- [[{day}-Memos]]（{days[day]} 条）\n"
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(content)
+    if touched_tags:
+        print(f"已更新 Memos 标签页：{len(touched_tags)} 个")
+
+def export_memos_notes(memos, config, replay=False):
+    """
+    增量导出日/周 Memos：与状态目录中的按天状态比较，只重新渲染有新增、修改或删除 Memo 的日期和周；
+    启用 MEMOS_ATTACHMENTS 时先下载附件，笔记中嵌入本地链接
+
+    参数:
+        memos: 本次获取的 Memos
+        config: get_config 的返回值
+        replay: 是否为从快照离线回放：只使用已下载的附件，重新渲染快照中的全部日期，
+                快照中没有的 Memo 不视为删除，也不保存按天状态和标签索引
+
+    返回:
+        本次判断为已删除的 Memo ID 集合（用于清理数据集之外的搜索索引）
+    """
+    state_dir = get_state_dir(config['output_dir'])
+    index = MemosDayIndex(state_dir)
+    links = None
+    if attachments_enabled():
+        # 附件在渲染之前下载，笔记中嵌入本地副本
+        store = AttachmentStore(state_dir, config['attachments_dir'], None if replay else config['api_url'],
+                                config['token'], config.get('session'))
+        links = store.sync(memo for memo in memos if memo.rowStatus in (None, 'NORMAL'))
+        store.save()
+    if replay:
+        # 旧快照中没有之后新建的 Memo，不能据此判断删除
+        touched = index.update(memos, None, links, covered_from=float('inf'))
+        touched |= {memo_datetime(memo).strftime('%Y-%m-%d') for memo in memos
+                    if memo.createdTs and memo.rowStatus in (None, 'NORMAL')}
     else:
-        output_dir = os.path.dirname(os.path.abspath(__file__))
+        touched = index.update(memos, MEMOS_PAGE_SIZE, links)
+    if not touched:
+        print("Memos 没有变化")
+    export_daily_memos(index, touched, config['daily_dir'])
+    export_weekly_memos_summary(index, touched, config['weekly_dir'])
+    export_monthly_memos(index, touched, config['monthly_dir'])
+    if tag_pages_enabled():
+        tag_index = MemosTagIndex(state_dir)
+        # 首次启用时由按天状态中的全部 Memo 建立（更早的历史可通过 --archive 补全）
+        touched_tags = tag_index.apply(index, None if tag_index.exists else index.memo_days())
+        export_memos_tag_pages(tag_index, touched_tags, config['tags_dir'])
+        if not replay:
+            tag_index.save()
+    # 文件全部写完后才保存状态，中途失败时下次运行会重新渲染
+    if not replay:
+        index.save()
+    return {mid for mid, day in index.changed.items() if day is None}
+
+def export_memos_archive(config, since=None):
+    """
+    归档全部历史 Memos：逐页获取整个历史，每条 Memo 只换算一次时间并在一次遍历中归入日、ISO 周和月文件，
+    每个桶完成时立即写出，内存占用与历史长度无关（见 MemosArchive）；目录中不再有 Memo 的旧文件会被删除。
+
+    同时用最近一页 Memos 所在的周和月重建按天状态，之后的增量导出重新渲染这些周和月时内容完整。
+
+    参数:
+        config: get_config 的返回值
+        since: 只重新归档该月份（YYYY-MM 或 YYYY-MM-DD，按所在月的月初计算）之后的 Memos，
+               v1 API 在服务端按时间过滤，只传输这段时间的 Memos
+    """
+    from MemosArchive import MemosArchive, in_created_order
+    state_dir = get_state_dir(config['output_dir'])
+    since_date = since_ts = None
+    if since:
+        since_date = datetime.strptime(since[:7], '%Y-%m')
+        since_ts = int(since_date.replace(tzinfo=timezone(timedelta(hours=8))).timestamp())
+    store = None
+    if attachments_enabled():
+        store = AttachmentStore(state_dir, config['attachments_dir'], config['api_url'], config['token'],
+                                config.get('session'))
+    archive = MemosArchive(config['daily_dir'], config['weekly_dir'], config['monthly_dir'], since=since_date)
+
+    def stream():
+        for page in iter_memos(config['api_url'], config['token'], int(os.getenv('MEMOS_ARCHIVE_PAGE_SIZE', '200')),
+                               config.get('session'), since_ts, state_dir):
+            if store:
+                archive.links.update(store.sync(page))
+            yield from page
+
+    # 增量导出每次获取最近 MEMOS_PAGE_SIZE 条，其中最早一条所在周、月的起点之后的 Memo 都写入按天状态
+    # （比较的是时间戳，不再换算时间）
+    recent: list = []
+    seed_from = None
+    seeding = True
+    # 获取了全部历史时，搜索索引中不在其中的 Memo 都已删除
+    seen = set() if since is None else None
+    for memo in in_created_order(stream()):
+        archive.add(memo)
+        if seen is not None:
+            seen.add(memo_id(memo))
+        if not seeding or not memo.createdTs:
+            continue
+        if seed_from is None:
+            recent.append(memo)
+            if len(recent) == MEMOS_PAGE_SIZE:
+                when = memo_datetime(memo)
+                start = min(when - timedelta(days=when.weekday()), when.replace(day=1))
+                # memo_datetime 的时区标记为 UTC、时刻为北京时间，换回时间戳时减去 8 小时
+                seed_from = start.replace(hour=0, minute=0, second=0, microsecond=0).timestamp() - 8 * 3600
+        elif memo.createdTs >= seed_from:
+            recent.append(memo)
+        else:
+            seeding = False
+    archive.finish()
+    if store:
+        store.save()
+    if tag_pages_enabled():
+        # 用归档范围内的 Memos 重建标签索引（全部历史时同时重写所有标签页并删除多余的标签页）
+        tag_index = MemosTagIndex(state_dir)
+        since_day = since_date.strftime('%Y-%m-%d') if since_date else ''
+        touched_tags = set()
+        for mid, (day, _) in list(tag_index.memos.items()):
+            if mid not in archive.tags and day >= since_day:
+                touched_tags |= tag_index.set(mid, None, [])
+        for mid, (day, tags) in archive.tags.items():
+            touched_tags |= tag_index.set(mid, day, tags)
+        if since_date is None:
+            touched_tags |= set(tag_index.tags)
+            written = {tag_filename(tag) for tag in tag_index.tags}
+            if os.path.isdir(config['tags_dir']):
+                for name in os.listdir(config['tags_dir']):
+                    if name.endswith('.md') and name not in written:
+                        os.remove(os.path.join(config['tags_dir'], name))
+        export_memos_tag_pages(tag_index, touched_tags, config['tags_dir'])
+        tag_index.save()
+    index = MemosDayIndex(state_dir)
+    # 不足一页时 recent 就是归档范围内的全部 Memos（状态中范围内的其他 Memo 都视为删除）
+    if seed_from is None:
+        seed_from = since_ts if since_ts is not None else float('-inf')
+    index.update(recent, None, archive.links, covered_from=seed_from)
+    index.save()
+    if seen is not None and os.getenv('SEARCH_INDEX_ENABLED', 'true').lower() == 'true':
+        from SearchIndex import SearchIndex
+        search_index = SearchIndex(state_dir)
+        deleted = search_index.prune('memo', seen)
+        search_index.close()
+        if deleted:
+            print(f"已从搜索索引删除 {deleted} 条已删除的 Memo")
+    print(f"已归档{'全部' if since is None else f' {since_date:%Y-%m} 之后的'} Memos：{archive.count} 条，"
+          f"日 {len(archive.written['daily'])} 个、周 {len(archive.written['weekly'])} 个、月 {len(archive.written['monthly'])} 个文件")
+
+def export_memos_dataset(memos, output_dir, deleted_ids=None):
+    """
+    将 Memos 写入机器可读的数据集（JSON Lines，可选 SQLite），按主键增量更新，并删除已删除或归档的 Memos
+
+    参数:
+        memos: 本次获取的 Memos
+        output_dir: 输出目录
+        deleted_ids: 已删除或归档的 Memo ID（export_memos_notes 的返回值）
+    """
+    if not (memos or deleted_ids) or os.getenv('DATASET_ENABLED', 'true').lower() != 'true':
+        return
+    from Dataset import Dataset
+    dataset = Dataset(output_dir)
+    dataset.upsert('memos', memos)
+    dataset.delete('memos', deleted_ids or [])
+    dataset.save()
+
+def export_memos_search_index(memos, output_dir, deleted_ids=None):
+    """
+    增量更新 Memos 的全文搜索索引（按 updatedTs 判断是否需要重新索引），并删除已删除的 Memos
+
+    参数:
+        memos: 本次获取的 Memos
+        output_dir: 输出目录
+        deleted_ids: 已删除的 Memo ID（export_memos_notes 的返回值）
+    """
+    if not (memos or deleted_ids) or os.getenv('SEARCH_INDEX_ENABLED', 'true').lower() != 'true':
+        return
+    from SearchIndex import SearchIndex
+    index = SearchIndex(get_state_dir(output_dir))
+    count = index.index_memos(memos)
+    deleted = index.delete('memo', deleted_ids or [])
+    index.close()
+    print(f"已更新搜索索引：Memos {count} 条，删除 {deleted} 条")
+
+def memos_marker(memos):
+    """
+    返回最近一页 Memos 的变化标记：条数、最大的 updatedTs 和全部 ID 的指纹
+
+    增量导出只处理最近一页，页内任何一条 Memo 的新增、修改或删除都会改变标记（不只是最新的一条）。
+    """
+    if not memos:
+        return None
+    return [len(memos), max(memo.updatedTs or 0 for memo in memos), fingerprint(sorted(memo_id(memo) for memo in memos))]
+
+def get_config(output_dir=None, api_url=None, token=None, session=None):
+    """
+    读取 Memos 导出配置并创建输出目录
+
+    参数:
+        output_dir: 输出目录，默认读取环境变量 OUTPUT_DIR，未设置时使用当前脚本所在目录
+        api_url: Memos API 地址，默认读取环境变量 MEMOS_API
+        token: Memos Token，默认读取环境变量 MEMOS_TOKEN
+        session: 发起请求使用的会话（多账号时为 Accounts.AccountSession），默认直接使用 requests
+
+    返回:
+        包含 output_dir、api_url、token、session、daily_dir、weekly_dir、monthly_dir、attachments_dir、tags_dir 的字典
+    """
+    output_dir = output_dir or os.getenv('OUTPUT_DIR') or os.path.dirname(os.path.abspath(__file__))
     assert output_dir is not None, "输出目录不能为空"
 
     memos_dir = os.getenv('MEMOS_DIR', 'Memos')
-    api_url = os.getenv('MEMOS_API')
-    memos_token = os.getenv('MEMOS_TOKEN')
-
     daily_dir = os.path.join(output_dir, memos_dir, "1.Daily")
     os.makedirs(daily_dir, exist_ok=True)
     weekly_dir = os.path.join(output_dir, memos_dir, "2.Weekly")
     os.makedirs(weekly_dir, exist_ok=True)
+    monthly_dir = os.path.join(output_dir, memos_dir, "3.Monthly")
+    os.makedirs(monthly_dir, exist_ok=True)
+    return {
+        'output_dir': output_dir,
+        'api_url': api_url or os.getenv('MEMOS_API'),
+        'token': token or os.getenv('MEMOS_TOKEN'),
+        'session': session,
+        'daily_dir': daily_dir,
+        'weekly_dir': weekly_dir,
+        'monthly_dir': monthly_dir,
+        'attachments_dir': os.path.join(output_dir, memos_dir, os.getenv('MEMOS_ATTACHMENTS_DIR', 'Attachments')),
+        'tags_dir': os.path.join(output_dir, memos_dir, os.getenv('MEMOS_TAGS_DIR', 'Tags')),
+    }
+
+def fetch_data(config, now, force=False, snapshot=None):
+    """
+    获取需要导出的 Memos
+
+    启用变化探测时（PROBE_ENABLED，默认启用），未到下次探测时间，
+    或最近一页 Memos 的变化标记（见 memos_marker）与上次导出相同时返回 None；
+    探测到变化时直接使用探测获取的这一页，不再重复请求。
+    设置 SNAPSHOT_ENABLED=true 时同时保存原始响应快照。
+
+    参数:
+        config: get_config 的返回值
+        now: 当前时间
+        force: 是否跳过变化探测，强制完整导出
+        snapshot: 从该快照（Snapshot.Snapshot）回放，不发起网络请求
+
+    返回:
+        二元组 (memos, probe)，无需导出时返回 None
+    """
+    if snapshot is not None:
+        return decode_memos(snapshot.load('memos', [])), None
+
+    api_url, memos_token = config['api_url'], config['token']
+    probe = ChangeProbe(get_state_dir(config['output_dir']), 'memos') if ChangeProbe.enabled() else None
+    if probe and not force:
+        if not probe.due(now):
+            print(f"未到下次探测时间（{probe.next_probe_at}），跳过 Memos 导出")
+            return None
+        if not probe.needs_full_run(now):
+            recent = fetch_memos(api_url, memos_token, limit=MEMOS_PAGE_SIZE, offset=0, rowStatus="NORMAL",
+                                 session=config.get('session'), state_dir=get_state_dir(config['output_dir']))
+            if memos_marker(recent) == probe.markers.get('recent'):
+                probe.record_idle(now)
+                return None
+            from Snapshot import snapshot_enabled
+            if not snapshot_enabled():
+                return recent, probe
+
+    from Snapshot import SnapshotRecorder, snapshot_enabled
+    recorder = SnapshotRecorder(get_state_dir(config['output_dir']), 'memos', now) if snapshot_enabled() else None
+    memos = fetch_memos(api_url, memos_token, limit=MEMOS_PAGE_SIZE, offset=0, rowStatus="NORMAL", recorder=recorder,
+                        session=config.get('session'), state_dir=get_state_dir(config['output_dir']))
+    if recorder:
+        recorder.finish()
+    return memos, probe
+
+def record_run(memos, probe, now):
+    """
+    导出完成后记录本次完整导出和最近一页 Memos 的标记
+    """
+    if probe:
+        marker = memos_marker(memos)
+        probe.record_full_run(now, marker != probe.markers.get('recent'), recent=marker)
+
+def main(force=False, archive=False, since=None):
+    """
+    执行一次 Memos 导出
+
+    启用变化探测时（PROBE_ENABLED，默认启用），未到下次探测时间，
+    或最近一页 Memos 没有变化时直接返回；已有其他导出进程在运行时也直接返回。
+
+    参数:
+        force: 是否跳过变化探测，强制完整导出
+        archive: 是否归档全部历史 Memos（见 export_memos_archive）
+        since: 归档时只重新归档该月份之后的 Memos
+
+    返回:
+        是否执行了完整导出
+    """
+    config = get_config()
+    lock = RunLock(get_state_dir(config['output_dir']))
+    if not lock.acquire():
+        print("已有导出进程在运行，跳过本次 Memos 导出")
+        return False
+    try:
+        if archive:
+            export_memos_archive(config, since)
+            return True
+        return _run(config, force)
+    finally:
+        lock.release()
+
+def _run(config, force):
+    """
+    在持有运行锁的情况下执行一次导出
+    """
+    now = datetime.now()
+    fetched = fetch_data(config, now, force)
+    if fetched is None:
+        return False
+    memos, probe = fetched
+
+    deleted_ids = export_memos_notes(memos, config)
+    export_memos_dataset(memos, config['output_dir'], deleted_ids)
+    export_memos_search_index(memos, config['output_dir'], deleted_ids)
 
-    memos = fetch_memos(api_url, memos_token, limit=20, offset=0, rowStatus="NORMAL")
-    export_daily_memos(memos, daily_dir)
-    export_weekly_memos_summary(memos, weekly_dir)
+    record_run(memos, probe, now)
+    return True
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Memos 导出")
+    parser.add_argument('--force', action='store_true', help="跳过变化探测，强制完整导出")
+    parser.add_argument('--archive', action='store_true', help="逐页获取全部历史 Memos，重新生成所有日/周/月 Memos")
+    parser.add_argument('--since', help="与 --archive 一起使用，只重新归档该月份（YYYY-MM）之后的 Memos")
+    args = parser.parse_args()
+    main(args.force, args.archive, args.since) 
\ No newline at end of file
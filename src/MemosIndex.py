@@ -0,0 +1,347 @@
+import os
+import re
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from Types import MemosRecord
+from MemosAttachments import resource_embed, resource_key
+from StateStore import load_json, save_json
+from TaskLayout import safe_name
+
+# Memo 中的 #标签（# 前不能是字母数字、/、# 或 &，以排除标题、URL 片段和 HTML 实体；支持 a/b 形式的嵌套标签）
+_TAG_PATTERN = re.compile(r'(?<![\w/#&])#([^\s#\[\](){}<>,.;:!?\'"`，。；：！？、（）【】《》]+)')
+_FENCE_PATTERN = re.compile(r'^\s*```.*?^\s*```[^\n]*$', re.MULTILINE | re.DOTALL)
+_INLINE_CODE_PATTERN = re.compile(r'`[^`\n]*`')
+
+
+def memo_datetime(memo: MemosRecord) -> datetime:
+    """
+    Memo 的创建时间（北京时间）
+    """
+    return datetime.fromtimestamp(memo.createdTs, tz=timezone.utc) + timedelta(hours=8)
+
+
+def memo_id(memo: MemosRecord) -> str:
+    """
+    Memo 的主键（没有 id 时用创建时间戳代替）
+    """
+    return str(getattr(memo, 'id', None) or memo.createdTs)
+
+
+def format_memo(memo: MemosRecord, links: Optional[Dict[str, str]] = None, when: Optional[datetime] = None) -> str:
+    """
+    把一条 Memo 渲染为日/周 Memos 中的列表项：单行内容跟在时间后面，多行内容逐行缩进，附件逐个缩进列在后面
+
+    参数:
+        memo: Memo
+        links: 资源主键 -> 已下载的附件文件名（见 MemosAttachments.AttachmentStore.sync）
+        when: 已换算好的创建时间（memo_datetime 的结果），调用方已换算时传入以免重复换算
+    """
+    time_str = (when or memo_datetime(memo)).strftime('%H:%M')
+    memo_lines = (memo.content or '').strip().split('\n')
+    if len(memo_lines) > 1:
+        body = '\n' + '\n'.join([f"\t{line}" for line in memo_lines])
+    else:
+        body = memo_lines[0] if memo_lines else ''
+    text = f"- {time_str} {body}\n"
+    for resource in memo.resourceList:
+        embed = resource_embed(resource, (links or {}).get(resource_key(resource)))
+        if embed:
+            text += f"\t{embed}\n"
+    return text
+
+
+def memo_tags(text: str) -> List[str]:
+    """
+    提取渲染结果中的标签（忽略代码块和行内代码，纯数字的 #123 不算标签），去重后按出现顺序返回
+    """
+    text = _INLINE_CODE_PATTERN.sub('', _FENCE_PATTERN.sub('', text))
+    tags = []
+    for tag in _TAG_PATTERN.findall(text):
+        tag = tag.strip('/')
+        if tag and not tag.isdigit() and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def tag_filename(tag: str) -> str:
+    return f"{safe_name(tag, 'tag')}.md"
+
+
+WEEK_DAYS = ['周一', '周二', '周三', '周四', '周五', '周六', '周日']
+
+
+def render_week(start_date: datetime, day_texts: Callable[[str], List[str]]) -> str:
+    """
+    渲染每周 Memos 摘要（周一到周日按天列出）
+
+    参数:
+        start_date: 周一
+        day_texts: 日期（YYYY-MM-DD）-> 当天 Memo 的渲染结果
+    """
+    end_date = start_date + timedelta(days=6)
+    iso_year, week_num, _ = start_date.isocalendar()
+    content = f"# {iso_year} 第 {week_num:02d} 周 Memos 摘要\n\n"
+    content += f"**周期**：{start_date.strftime('%Y-%m-%d')} 至 {end_date.strftime('%Y-%m-%d')}\n\n"
+    for i in range(7):
+        day = (start_date + timedelta(days=i)).strftime('%Y-%m-%d')
+        content += f"## {WEEK_DAYS[i]}（{day}）\n\n"
+        texts = day_texts(day)
+        content += "".join(texts) if texts else "无 Memos\n"
+        content += "\n"
+    return content
+
+
+def render_month(year: int, month: int, days: Dict[str, List[str]]) -> str:
+    """
+    渲染每月 Memos（只列出有 Memo 的日期）
+
+    参数:
+        year: 年
+        month: 月
+        days: 日期（YYYY-MM-DD）-> 当天 Memo 的渲染结果
+    """
+    content = f"# {year} 年 {month:02d} 月 Memos\n\n"
+    for day in sorted(days):
+        weekday = WEEK_DAYS[datetime.strptime(day, '%Y-%m-%d').weekday()]
+        content += f"## {day}（{weekday}）\n\n"
+        content += "".join(days[day]) + "\n"
+    return content
+
+
+def week_filename(start_date: datetime) -> str:
+    iso_year, week_num, _ = start_date.isocalendar()
+    return f"{iso_year}-W{week_num:02d}-Memos.md"
+
+
+def month_filename(year: int, month: int) -> str:
+    return f"{year}-{month:02d}-Memos.md"
+
+
+class MemosDayIndex:
+    """
+    Memos 的按天状态
+
+    记录每天包含的 Memo（ID、updatedTs、渲染内容的哈希和渲染结果），每次运行与获取到的 Memos 比较，
+    只返回有新增、修改（内容哈希变化）或删除的日期，日/周 Memos 只重新渲染这些日期所在的文件。
+
+    rowStatus 不是 NORMAL（如 ARCHIVED）的 Memo 视为删除；获取的是最近的一页 Memos，
+    因此只有创建时间落在本页覆盖范围内却没有出现的 Memo 才视为已归档或删除，更早的 Memo 保持不变。
+
+    状态保存在状态目录下的 memos_days.json 中。
+    """
+
+    def __init__(self, state_dir: str):
+        """
+        参数:
+            state_dir: 状态目录
+        """
+        self.path = os.path.join(state_dir, 'memos_days.json')
+        data = load_json(self.path, {}) or {}
+        # 日期 -> {Memo ID -> {"updatedTs": ..., "createdTs": ..., "hash": ..., "text": 渲染结果}}
+        self.days: Dict[str, Dict[str, dict]] = data.get('days', {})
+        # Memo ID -> 所在日期
+        self._day_of: Dict[str, str] = {mid: day for day, entries in self.days.items() for mid in entries}
+        # 最近一次 update 中有变化的 Memo：ID -> 新的日期（删除时为 None），供标签索引增量更新
+        self.changed: Dict[str, Optional[str]] = {}
+        self._dirty = False
+
+    def _remove(self, mid: str) -> str:
+        day = self._day_of.pop(mid)
+        entries = self.days[day]
+        entries.pop(mid)
+        if not entries:
+            del self.days[day]
+        return day
+
+    def update(self, memos: Iterable[MemosRecord], limit: Optional[int] = None,
+               links: Optional[Dict[str, str]] = None, covered_from: Optional[float] = None) -> Set[str]:
+        """
+        用本次获取的 Memos 更新状态，返回需要重新渲染的日期
+
+        参数:
+            memos: 本次获取的 Memos（最近的一页）
+            limit: 获取时的分页大小；返回的 NORMAL Memo 少于该数量时说明已获取全部，缺失的 Memo 都视为删除
+            links: 已下载的附件（附件下载完成后渲染结果变化，所在日期会重新渲染）
+            covered_from: 已获取该时间戳之后创建的全部 Memo（按时间范围获取时），指定时不再按 limit 推算
+
+        返回:
+            有变化的日期集合（YYYY-MM-DD）
+        """
+        fetched: Dict[str, MemosRecord] = {}
+        deleted: Set[str] = set()
+        for memo in memos:
+            if not memo.createdTs:
+                continue
+            mid = memo_id(memo)
+            if memo.rowStatus and memo.rowStatus != 'NORMAL':
+                deleted.add(mid)
+            else:
+                fetched[mid] = memo
+
+        # 本页覆盖的创建时间范围（置顶的 Memo 不按时间排序，不参与计算）
+        if covered_from is not None:
+            pass
+        elif limit is not None and len(fetched) < limit:
+            covered_from = float('-inf')
+        else:
+            timestamps = [memo.createdTs for memo in fetched.values() if not getattr(memo, 'pinned', False)]
+            covered_from = min(timestamps) if timestamps else None
+        if covered_from is not None:
+            for mid, day in self._day_of.items():
+                if mid not in fetched and self.days[day][mid]['createdTs'] >= covered_from:
+                    deleted.add(mid)
+
+        touched: Set[str] = set()
+        self.changed = {}
+        for mid in deleted:
+            if mid in self._day_of:
+                touched.add(self._remove(mid))
+                self.changed[mid] = None
+        for mid, memo in fetched.items():
+            when = memo_datetime(memo)
+            text = format_memo(memo, links, when)
+            digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+            day = when.strftime('%Y-%m-%d')
+            old_day = self._day_of.get(mid)
+            if old_day == day and self.days[day][mid]['hash'] == digest:
+                # 内容未变（只有 updatedTs 变化时不重新渲染）
+                if self.days[day][mid]['updatedTs'] != memo.updatedTs:
+                    self.days[day][mid]['updatedTs'] = memo.updatedTs
+                    self._dirty = True
+                continue
+            if old_day:
+                touched.add(self._remove(mid))
+            self.days.setdefault(day, {})[mid] = {
+                'updatedTs': memo.updatedTs,
+                'createdTs': memo.createdTs,
+                'hash': digest,
+                'text': text,
+            }
+            self._day_of[mid] = day
+            self.changed[mid] = day
+            touched.add(day)
+        if touched:
+            self._dirty = True
+        return touched
+
+    def day_texts(self, day: str) -> List[str]:
+        """
+        返回某天所有 Memo 的渲染结果（按创建时间排序）
+        """
+        entries = self.days.get(day, {})
+        return [entry['text'] for entry in sorted(entries.values(), key=lambda e: e['createdTs'] or 0)]
+
+    def memo_days(self) -> Dict[str, str]:
+        """
+        返回所有 Memo 所在的日期（Memo ID -> YYYY-MM-DD）
+        """
+        return dict(self._day_of)
+
+    def memo_text(self, mid: str) -> str:
+        """
+        返回某条 Memo 的渲染结果
+        """
+        return self.days[self._day_of[mid]][mid]['text']
+
+    def month_days(self, month: str) -> Dict[str, List[str]]:
+        """
+        返回某月（YYYY-MM）每个有 Memo 的日期及其渲染结果
+        """
+        return {day: self.day_texts(day) for day in self.days if day.startswith(f"{month}-")}
+
+    def save(self):
+        """
+        状态有变化时保存到状态文件
+        """
+        if self._dirty:
+            save_json(self.path, {'days': self.days})
+            self._dirty = False
+
+
+class MemosTagIndex:
+    """
+    Memos 的标签索引
+
+    记录每条带标签的 Memo 所在的日期和标签，由按天状态中有变化的 Memo 增量更新，
+    只返回标签集合有变化的标签，标签页只重新渲染这些标签，不需要重新扫描每日 Memos 文件。
+
+    状态保存在状态目录下的 memos_tags.json 中；状态文件不存在时（首次启用）由按天状态中的全部 Memo 建立。
+    """
+
+    def __init__(self, state_dir: str):
+        """
+        参数:
+            state_dir: 状态目录
+        """
+        self.path = os.path.join(state_dir, 'memos_tags.json')
+        data = load_json(self.path, None)
+        self.exists = data is not None
+        # Memo ID -> [日期, [标签, ...]]（只记录带标签的 Memo）
+        self.memos: Dict[str, list] = (data or {}).get('memos', {})
+        # 标签 -> {Memo ID -> 日期}
+        self._by_tag: Dict[str, Dict[str, str]] = {}
+        for mid, (day, tags) in self.memos.items():
+            for tag in tags:
+                self._by_tag.setdefault(tag, {})[mid] = day
+        self._dirty = False
+
+    def set(self, mid: str, day: Optional[str], tags: List[str]) -> Set[str]:
+        """
+        更新一条 Memo 的日期和标签（day 为 None 或没有标签时移除），返回有变化的标签
+        """
+        old = self.memos.get(mid)
+        new = [day, sorted(tags)] if day and tags else None
+        if old == new:
+            return set()
+        touched = set()
+        if old:
+            for tag in old[1]:
+                entries = self._by_tag[tag]
+                entries.pop(mid, None)
+                if not entries:
+                    del self._by_tag[tag]
+                touched.add(tag)
+            del self.memos[mid]
+        if new:
+            self.memos[mid] = new
+            for tag in new[1]:
+                self._by_tag.setdefault(tag, {})[mid] = day
+                touched.add(tag)
+        self._dirty = True
+        return touched
+
+    def apply(self, index: MemosDayIndex, changed: Optional[Dict[str, Optional[str]]] = None) -> Set[str]:
+        """
+        用按天状态中有变化的 Memo 更新标签索引，返回有变化的标签
+
+        参数:
+            index: 按天状态
+            changed: Memo ID -> 日期（删除时为 None），默认为 index 最近一次 update 的变化
+        """
+        touched = set()
+        for mid, day in (index.changed if changed is None else changed).items():
+            touched |= self.set(mid, day, memo_tags(index.memo_text(mid)) if day else [])
+        return touched
+
+    @property
+    def tags(self) -> List[str]:
+        return sorted(self._by_tag)
+
+    def tag_days(self, tag: str) -> Dict[str, int]:
+        """
+        返回包含某标签的日期及当天带该标签的 Memo 数量
+        """
+        counts: Dict[str, int] = {}
+        for day in self._by_tag.get(tag, {}).values():
+            counts[day] = counts.get(day, 0) + 1
+        return counts
+
+    def save(self):
+        """
+        状态有变化时保存到状态文件
+        """
+        if self._dirty or not self.exists:
+            save_json(self.path, {'memos': self.memos})
+            self.exists = True
+            self._dirty = False
@@ -0,0 +1,123 @@
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# 阶段状态
+DONE = 'done'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+_STATUS_LABELS = {DONE: '完成', SKIPPED: '跳过', FAILED: '失败'}
+
+
+class Stage:
+    """
+    流水线中的一个阶段
+
+    fn 接收所有已完成阶段的结果字典（阶段名 -> 返回值），返回值作为本阶段的结果；
+    返回 None 表示没有需要处理的数据，依赖本阶段的后续阶段会被跳过。
+    """
+
+    def __init__(self, name: str, fn: Callable[[Dict[str, Any]], Any],
+                 requires: Iterable[str] = (), after: Iterable[str] = ()):
+        """
+        参数:
+            name: 阶段名称
+            fn: 阶段函数
+            requires: 必须成功并产出结果的前置阶段，任一失败或跳过时本阶段跳过
+            after: 只需等待其结束的前置阶段（无论成功与否）
+        """
+        self.name = name
+        self.fn = fn
+        self.requires = list(requires)
+        self.after = list(after)
+        self.status: Optional[str] = None
+        self.seconds = 0.0
+        self.error: Optional[BaseException] = None
+
+    @property
+    def upstream(self) -> List[str]:
+        return self.requires + self.after
+
+
+class Pipeline:
+    """
+    以有向无环图描述的导出流水线
+
+    互不依赖的阶段在线程池中并发执行；单个阶段失败只会跳过依赖它的阶段，不影响其他阶段。
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+
+    def add(self, name: str, fn: Callable[[Dict[str, Any]], Any],
+            requires: Iterable[str] = (), after: Iterable[str] = ()) -> Stage:
+        """
+        添加阶段（前置阶段必须已经添加，因此不会形成环）
+        """
+        stage = Stage(name, fn, requires, after)
+        for dep in stage.upstream:
+            if dep not in self.stages:
+                raise ValueError(f"阶段 {name} 依赖的阶段 {dep} 不存在")
+        self.stages[name] = stage
+        return stage
+
+    def _run_stage(self, stage: Stage) -> Any:
+        start = time.perf_counter()
+        try:
+            return stage.fn(self.results)
+        finally:
+            stage.seconds = time.perf_counter() - start
+
+    def _ready(self, stage: Stage) -> bool:
+        return all(self.stages[dep].status is not None for dep in stage.upstream)
+
+    def run(self) -> bool:
+        """
+        执行流水线
+
+        返回:
+            所有阶段都没有失败时返回 True
+        """
+        pending = dict(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if not self._ready(stage):
+                        continue
+                    del pending[name]
+                    if any(self.stages[dep].status != DONE for dep in stage.requires):
+                        stage.status = SKIPPED
+                        continue
+                    running[executor.submit(self._run_stage, stage)] = stage
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        stage.status = FAILED
+                        stage.error = e
+                        print(f"阶段 {stage.name} 失败：")
+                        traceback.print_exception(type(e), e, e.__traceback__)
+                        continue
+                    self.results[stage.name] = result
+                    stage.status = DONE if result is not None else SKIPPED
+        return all(stage.status != FAILED for stage in self.stages.values())
+
+    def report(self) -> str:
+        """
+        生成各阶段的状态和耗时报告
+        """
+        width = max((len(name) for name in self.stages), default=0)
+        lines = ["阶段耗时："]
+        for name, stage in self.stages.items():
+            label = _STATUS_LABELS.get(stage.status or '', '未执行')
+            lines.append(f"  {name:<{width}}  {label}  {stage.seconds:.2f}s")
+        return "\n".join(lines)
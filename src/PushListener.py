@@ -0,0 +1,296 @@
+import os
+import ssl
+import time
+import base64
+import socket
+import struct
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# RFC 6455 规定的握手 GUID
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class WebSocketClient:
+    """
+    最小化的 WebSocket 客户端（RFC 6455），只依赖标准库
+
+    支持 ws/wss、文本和二进制消息、分片消息、ping/pong 和关闭帧，足够用于接收推送通知。
+
+    读超时可以发生在帧或分片消息的任意位置：已收到的字节和已合并的分片都保存在客户端上，
+    只有完整解析一帧后才从缓冲区移除，超时后再次调用 recv 会从中断处继续。
+    """
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 30):
+        """
+        初始化 WebSocket 客户端
+
+        参数:
+            url: ws:// 或 wss:// 地址
+            headers: 握手时附带的额外请求头（如 Cookie）
+            timeout: 读超时（秒），超时后由调用方决定是否发送心跳
+        """
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.sock: Optional[socket.socket] = None
+        # 已收到、尚未组成完整帧的字节
+        self._buffer = bytearray()
+        # 正在合并的分片消息：首帧的 opcode 和已收到的分片
+        self._message_opcode: Optional[int] = None
+        self._chunks: List[bytes] = []
+
+    def connect(self):
+        """
+        建立连接并完成握手
+        """
+        parsed = urlparse(self.url)
+        secure = parsed.scheme == 'wss'
+        host = parsed.hostname or ''
+        port = parsed.port or (443 if secure else 80)
+        path = parsed.path or '/'
+        if parsed.query:
+            path += f"?{parsed.query}"
+        sock = socket.create_connection((host, port), timeout=self.timeout)
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+        key = base64.b64encode(os.urandom(16)).decode()
+        lines = [
+            f"GET {path} HTTP/1.1",
+            f"Host: {parsed.netloc}",
+            "Upgrade: websocket",
+            "Connection: Upgrade",
+            f"Sec-WebSocket-Key: {key}",
+            "Sec-WebSocket-Version: 13",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in self.headers.items())
+        sock.sendall(("\r\n".join(lines) + "\r\n\r\n").encode())
+
+        response = b''
+        while b'\r\n\r\n' not in response:
+            data = sock.recv(4096)
+            if not data:
+                raise ConnectionError("WebSocket 握手失败：连接已关闭")
+            response += data
+        header, _, rest = response.partition(b'\r\n\r\n')
+        status_line, *header_lines = header.decode('latin-1').split('\r\n')
+        if ' 101 ' not in f"{status_line} ":
+            raise ConnectionError(f"WebSocket 握手失败：{status_line}")
+        accept = hashlib.sha1((key + _WS_GUID).encode()).digest()
+        expected = base64.b64encode(accept).decode()
+        received = {}
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            received[name.strip().lower()] = value.strip()
+        if received.get('sec-websocket-accept') != expected:
+            raise ConnectionError("WebSocket 握手失败：Sec-WebSocket-Accept 不匹配")
+        self.sock = sock
+        self._buffer = bytearray(rest)
+        self._message_opcode = None
+        self._chunks = []
+
+    def _fill(self, size: int):
+        """
+        读取到缓冲区中至少有 size 字节为止（超时异常直接抛出，已读取的字节留在缓冲区中）
+        """
+        assert self.sock is not None
+        while len(self._buffer) < size:
+            chunk = self.sock.recv(max(size - len(self._buffer), 4096))
+            if not chunk:
+                raise ConnectionError("WebSocket 连接已关闭")
+            self._buffer += chunk
+
+    def _recv_frame(self) -> Tuple[bool, int, bytes]:
+        # 先确认整帧都已收到，再一次性从缓冲区移除
+        self._fill(2)
+        first, second = self._buffer[0], self._buffer[1]
+        fin = bool(first & 0x80)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        offset = 2
+        if length == 126:
+            self._fill(offset + 2)
+            length = struct.unpack_from('!H', self._buffer, offset)[0]
+            offset += 2
+        elif length == 127:
+            self._fill(offset + 8)
+            length = struct.unpack_from('!Q', self._buffer, offset)[0]
+            offset += 8
+        mask = None
+        if second & 0x80:
+            self._fill(offset + 4)
+            mask = bytes(self._buffer[offset:offset + 4])
+            offset += 4
+        self._fill(offset + length)
+        payload = bytes(self._buffer[offset:offset + length])
+        del self._buffer[:offset + length]
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return fin, opcode, payload
+
+    def send(self, payload: bytes, opcode: int = OP_TEXT):
+        """
+        发送一帧（客户端发送的帧必须加掩码）
+        """
+        assert self.sock is not None
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([0x80 | length])
+        elif length < 1 << 16:
+            header += bytes([0x80 | 126]) + struct.pack('!H', length)
+        else:
+            header += bytes([0x80 | 127]) + struct.pack('!Q', length)
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        self.sock.sendall(header + mask + masked)
+
+    def recv(self) -> Tuple[int, bytes]:
+        """
+        接收一条完整的消息，自动回复 ping、合并分片
+
+        返回:
+            (opcode, payload)，收到关闭帧时 opcode 为 OP_CLOSE
+        """
+        while True:
+            fin, opcode, payload = self._recv_frame()
+            if opcode == OP_PING:
+                self.send(payload, OP_PONG)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                return OP_CLOSE, payload
+            if opcode != OP_CONTINUATION:
+                self._message_opcode = opcode
+                self._chunks = []
+            self._chunks.append(payload)
+            if fin:
+                message_opcode, chunks = self._message_opcode, self._chunks
+                self._message_opcode, self._chunks = None, []
+                return message_opcode or OP_TEXT, b''.join(chunks)
+
+    def close(self):
+        if not self.sock:
+            return
+        try:
+            self.send(struct.pack('!H', 1000), OP_CLOSE)
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        finally:
+            self.sock = None
+
+
+class PushListener:
+    """
+    滴答清单推送监听器
+
+    通过网页版使用的 WebSocket 推送通道接收变化通知（地址可通过 DIDA365_WS_URL 配置），
+    收到除心跳以外的任何消息都视为数据发生了变化。连接断开后按指数退避自动重连，
+    断开期间 connected 为 False，调用方应退回轮询。
+    """
+
+    # 视为心跳、不触发同步的消息
+    HEARTBEATS = {b'', b'ping', b'pong', b'hello'}
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None,
+                 ping_interval: float = 30, debounce_seconds: float = 2,
+                 headers_factory: Optional[Callable[[], Dict[str, str]]] = None):
+        """
+        初始化推送监听器
+
+        参数:
+            url: WebSocket 地址
+            headers: 握手请求头（需包含登录 Cookie）
+            ping_interval: 空闲多久发送一次心跳（秒）
+            debounce_seconds: 收到通知后等待多久再触发同步，用于合并连续的多条通知
+            headers_factory: 每次（重新）连接时生成握手请求头的函数，登录 Token 过期后重连能使用新的 Cookie；
+                             指定时忽略 headers
+        """
+        self.url = url
+        self.headers = headers or {}
+        self.headers_factory = headers_factory
+        self.ping_interval = ping_interval
+        self.debounce_seconds = debounce_seconds
+        self.connected = False
+        self._changed = threading.Event()
+        self._stopped = threading.Event()
+        self._client: Optional[WebSocketClient] = None
+
+    def start(self) -> threading.Thread:
+        """
+        在后台线程中运行监听器
+        """
+        thread = threading.Thread(target=self.run_forever, name='dida365-push', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stopped.set()
+        if self._client:
+            self._client.close()
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """
+        等待变化通知
+
+        参数:
+            timeout: 最长等待时间（秒）
+
+        返回:
+            收到变化通知时返回 True（已做去抖动处理）
+        """
+        if not self._changed.wait(timeout):
+            return False
+        time.sleep(self.debounce_seconds)
+        self._changed.clear()
+        return True
+
+    def run_forever(self):
+        """
+        保持连接并接收通知，断开后按指数退避重连
+        """
+        failures = 0
+        while not self._stopped.is_set():
+            self._client = None
+            try:
+                headers = self.headers_factory() if self.headers_factory else self.headers
+                self._client = WebSocketClient(self.url, headers, timeout=self.ping_interval)
+                self._client.connect()
+                self.connected = True
+                failures = 0
+                print("推送通道已连接")
+                self._receive_loop(self._client)
+            except (OSError, ConnectionError, ValueError) as e:
+                if not self._stopped.is_set():
+                    print(f"推送通道断开，退回轮询: {e}")
+            finally:
+                self.connected = False
+                if self._client:
+                    self._client.close()
+            failures += 1
+            self._stopped.wait(min(2 ** failures, 300))
+
+    def _receive_loop(self, client: WebSocketClient):
+        while not self._stopped.is_set():
+            try:
+                opcode, payload = client.recv()
+            except socket.timeout:
+                client.send(b'', OP_PING)
+                continue
+            if opcode == OP_CLOSE:
+                raise ConnectionError("服务器关闭了连接")
+            if payload.strip().lower() in self.HEARTBEATS:
+                continue
+            self._changed.set()
@@ -0,0 +1,287 @@
+import calendar
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from Types import Task, parse_api_time
+
+# 一个重复任务的实例：(开始时间, 结束时间)，与 Task 的 _processed_startDate / _processed_dueDate 含义一致
+Occurrence = Tuple[datetime, datetime]
+
+_WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+# 展开时最多遍历的周期数，防止异常规则导致死循环
+_MAX_PERIODS = 5000
+
+
+def _parse_compact_time(value: str) -> datetime:
+    """
+    解析 RRULE 中的紧凑时间格式（20250101、20250101T120000、20250101T120000Z），Z 结尾的转换为北京时间
+    """
+    if 'T' not in value:
+        return datetime.strptime(value[:8], '%Y%m%d')
+    dt = datetime.strptime(value.rstrip('Z')[:15], '%Y%m%dT%H%M%S')
+    return dt + timedelta(hours=8) if value.endswith('Z') else dt
+
+
+def _parse_exdate(value: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return parse_api_time(value)
+    except ValueError:
+        return _parse_compact_time(value)
+
+
+def _add_months(year: int, month: int, months: int) -> Tuple[int, int]:
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+class RecurrenceRule:
+    """
+    重复规则
+
+    支持滴答清单使用的 RRULE 子集：FREQ（DAILY/WEEKLY/MONTHLY/YEARLY）、INTERVAL、BYDAY（含月内序号，如 2MO、-1FR）、
+    BYMONTHDAY（含负数）、BYMONTH、COUNT、UNTIL，以及自定义日期规则 ERULE:NAME=CUSTOM;BYDATE=...。
+    包含其他无法识别的规则部分（如 BYSETPOS）时视为不支持，任务按单次任务处理。
+    """
+
+    def __init__(self, freq: str, interval: int = 1, by_day: Sequence[Tuple[Optional[int], int]] = (),
+                 by_month_day: Sequence[int] = (), by_month: Sequence[int] = (),
+                 count: Optional[int] = None, until: Optional[datetime] = None,
+                 dates: Sequence[datetime] = ()):
+        self.freq = freq
+        self.interval = max(interval, 1)
+        self.by_day = list(by_day)
+        self.by_month_day = list(by_month_day)
+        self.by_month = list(by_month)
+        self.count = count
+        self.until = until
+        self.dates = sorted(dates)
+
+    @classmethod
+    def parse(cls, repeat_flag: Optional[str]) -> Optional["RecurrenceRule"]:
+        """
+        解析任务的 repeatFlag
+
+        返回:
+            重复规则，不是重复任务或规则不受支持时返回 None
+        """
+        if not repeat_flag:
+            return None
+        kind, _, body = repeat_flag.partition(':')
+        parts = dict(part.split('=', 1) for part in body.split(';') if '=' in part)
+        try:
+            if kind == 'ERULE':
+                if parts.get('NAME') != 'CUSTOM' or not parts.get('BYDATE'):
+                    return None
+                return cls('CUSTOM', dates=[_parse_compact_time(value) for value in parts['BYDATE'].split(',') if value])
+            if kind != 'RRULE' or parts.get('FREQ') not in ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY'):
+                return None
+            # TT_ 开头的是滴答清单的扩展字段（如跳过节假日），忽略；其他未知部分视为不支持
+            known = {'FREQ', 'INTERVAL', 'BYDAY', 'BYMONTHDAY', 'BYMONTH', 'COUNT', 'UNTIL', 'WKST'}
+            if any(key not in known and not key.startswith('TT_') for key in parts):
+                return None
+            by_day = []
+            for value in filter(None, parts.get('BYDAY', '').split(',')):
+                ordinal = int(value[:-2]) if value[:-2] else None
+                by_day.append((ordinal, _WEEKDAYS[value[-2:]]))
+            return cls(
+                parts['FREQ'],
+                interval=int(parts.get('INTERVAL') or 1),
+                by_day=by_day,
+                by_month_day=[int(v) for v in parts.get('BYMONTHDAY', '').split(',') if v],
+                by_month=[int(v) for v in parts.get('BYMONTH', '').split(',') if v],
+                count=int(parts['COUNT']) if parts.get('COUNT') else None,
+                until=_parse_compact_time(parts['UNTIL']) if parts.get('UNTIL') else None,
+            )
+        except (KeyError, ValueError):
+            return None
+
+    def _month_days(self, year: int, month: int, default_day: int) -> List[int]:
+        """
+        计算某个月内符合 BYMONTHDAY / BYDAY 的日期
+        """
+        days_in_month = calendar.monthrange(year, month)[1]
+        days = set()
+        for value in self.by_month_day:
+            day = value if value > 0 else days_in_month + value + 1
+            if 1 <= day <= days_in_month:
+                days.add(day)
+        if self.by_day:
+            first_weekday = calendar.monthrange(year, month)[0]
+            for ordinal, weekday in self.by_day:
+                matches = [day for day in range(1 + (weekday - first_weekday) % 7, days_in_month + 1, 7)]
+                if ordinal is None:
+                    days.update(matches)
+                elif -len(matches) <= ordinal <= len(matches) and ordinal != 0:
+                    days.add(matches[ordinal - 1 if ordinal > 0 else ordinal])
+        if not self.by_month_day and not self.by_day and default_day <= days_in_month:
+            days.add(default_day)
+        return sorted(days)
+
+    def _period_candidates(self, dtstart: datetime, period: int) -> List[datetime]:
+        """
+        计算第 period 个周期（从 dtstart 所在周期开始，按 INTERVAL 步进）内的候选时间
+        """
+        time_of_day = timedelta(hours=dtstart.hour, minutes=dtstart.minute, seconds=dtstart.second)
+        base = datetime(dtstart.year, dtstart.month, dtstart.day)
+        if self.freq == 'DAILY':
+            day = base + timedelta(days=period * self.interval)
+            if self.by_day and day.weekday() not in {weekday for _, weekday in self.by_day}:
+                return []
+            return [day + time_of_day]
+        if self.freq == 'WEEKLY':
+            week_start = base - timedelta(days=base.weekday()) + timedelta(weeks=period * self.interval)
+            weekdays = sorted({weekday for _, weekday in self.by_day}) or [base.weekday()]
+            return [week_start + timedelta(days=weekday) + time_of_day for weekday in weekdays]
+        if self.freq == 'MONTHLY':
+            year, month = _add_months(base.year, base.month, period * self.interval)
+            return [datetime(year, month, day) + time_of_day for day in self._month_days(year, month, base.day)]
+        year = base.year + period * self.interval
+        candidates = []
+        # BYMONTH 可以不按顺序书写（如 BYMONTH=12,1），候选时间需按时间排序
+        for month in sorted(set(self.by_month)) or [base.month]:
+            for day in self._month_days(year, month, base.day):
+                candidates.append(datetime(year, month, day) + time_of_day)
+        return candidates
+
+    def _skip_periods(self, dtstart: datetime, start: datetime) -> int:
+        """
+        没有 COUNT 限制时，直接跳过窗口开始之前的整周期，避免从很早的 dtstart 逐个遍历
+        """
+        if self.count is not None or start <= dtstart:
+            return 0
+        if self.freq == 'DAILY':
+            span = (start - dtstart).days // self.interval
+        elif self.freq == 'WEEKLY':
+            span = (start - dtstart).days // (7 * self.interval)
+        elif self.freq == 'MONTHLY':
+            span = ((start.year - dtstart.year) * 12 + start.month - dtstart.month) // self.interval
+        else:
+            span = (start.year - dtstart.year) // self.interval
+        return max(span - 1, 0)
+
+    def between(self, dtstart: datetime, start: datetime, end: datetime,
+                first: Optional[datetime] = None) -> List[datetime]:
+        """
+        展开 dtstart 之后（含 dtstart）、开始时间在 [start, end] 内的实例
+
+        参数:
+            dtstart: 展开的起点（任务当前的开始时间）
+            start: 范围开始
+            end: 范围结束
+            first: 规则原本的起点（DTSTART，不晚于 dtstart），周期和 COUNT 从这里开始计算，默认与 dtstart 相同
+
+        返回:
+            实例开始时间列表（升序）
+        """
+        origin = first if first is not None and first <= dtstart else dtstart
+        last = min(end, self.until) if self.until else end
+        if self.freq == 'CUSTOM':
+            dates = [dtstart] + [datetime(d.year, d.month, d.day, dtstart.hour, dtstart.minute, dtstart.second)
+                                 for d in self.dates]
+            return sorted({d for d in dates if d >= dtstart and start <= d <= last})
+        results = []
+        emitted = 0
+        period = self._skip_periods(origin, start)
+        for period in range(period, period + _MAX_PERIODS):
+            candidates = self._period_candidates(origin, period)
+            if candidates and candidates[0] > last:
+                break
+            for candidate in candidates:
+                if candidate < origin:
+                    continue
+                emitted += 1
+                if self.count is not None and emitted > self.count:
+                    return results
+                if candidate < dtstart:
+                    continue
+                if candidate > last:
+                    return results
+                if candidate >= start:
+                    results.append(candidate)
+        return results
+
+
+def expand_task(task: Task, start: datetime, end: datetime) -> Optional[List[Occurrence]]:
+    """
+    展开重复任务在 [start, end] 内的实例
+
+    只展开未完成的任务：滴答清单在完成一次重复任务时会生成一条已完成的任务并把原任务推进到下一次，
+    因此任务当前的开始时间就是下一个待办实例，更早的实例不再展开。
+    按完成时间重复（repeatFrom=1）的任务无法预知之后的日期，只保留当前实例。
+    带 COUNT 的规则从第一次的开始时间（repeatFirstDate）计数，已完成的实例也计入次数；
+    接口没有返回 repeatFirstDate 时无法知道还剩几次，同样只保留当前实例。
+
+    参数:
+        task: 任务
+        start: 范围开始
+        end: 范围结束
+
+    返回:
+        与范围相交的实例列表（已排除 exDate）；不是可展开的重复任务时返回 None
+    """
+    if task.status != 0 or str(getattr(task, 'repeatFrom', '0') or '0') == '1':
+        return None
+    rule = RecurrenceRule.parse(task.repeatFlag)
+    anchor = task._processed_startDate or task._processed_dueDate
+    if rule is None or anchor is None:
+        return None
+    first = None
+    if rule.count is not None:
+        first = getattr(task, '_processed_repeatFirstDate', None)
+        if first is None or first > anchor:
+            return None
+    # 每个实例的时长与当前实例相同（全天任务的 _processed_dueDate 已减去一天）
+    duration = (task._processed_dueDate - anchor) if task._processed_dueDate else timedelta(0)
+    excluded = {dt for dt in map(_parse_exdate, task.exDate or []) if dt}
+    excluded_days = {dt.date() for dt in excluded}
+    occurrences = []
+    # 跨天的实例可能在范围开始之前开始，向前多展开一个时长
+    for occurrence in rule.between(anchor, start - duration, end, first):
+        if occurrence in excluded or (task.isAllDay and occurrence.date() in excluded_days):
+            continue
+        occurrences.append((occurrence, occurrence + duration))
+    return occurrences
+
+
+class OccurrenceCache:
+    """
+    重复任务实例的缓存
+
+    以 (任务 ID, modifiedTime, 范围) 为键缓存展开结果：同一次运行中日/周/月摘要和摘要键计算都在导出窗口
+    （扩展到完整的周）内查询，每个重复任务的规则只展开一次；任务修改后 modifiedTime 变化，缓存自然失效。
+    """
+
+    def __init__(self, window: Tuple[datetime, datetime]):
+        """
+        参数:
+            window: 导出窗口 (start, end)，会扩展到与窗口相交的完整周
+        """
+        first = datetime(window[0].year, window[0].month, window[0].day)
+        first -= timedelta(days=first.weekday())
+        last = datetime(window[1].year, window[1].month, window[1].day)
+        last += timedelta(days=7 - last.weekday()) - timedelta(seconds=1)
+        self.window = (first, last)
+        self._cache: Dict[Tuple[Optional[str], Optional[str], datetime, datetime], Optional[List[Occurrence]]] = {}
+
+    def _expand(self, task: Task, start: datetime, end: datetime) -> Optional[List[Occurrence]]:
+        key = (task.id, task.modifiedTime, start, end)
+        if key not in self._cache:
+            self._cache[key] = expand_task(task, start, end)
+        return self._cache[key]
+
+    def get(self, task: Task, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Optional[List[Occurrence]]:
+        """
+        返回重复任务与 [start, end] 相交的实例（默认整个窗口），不是可展开的重复任务时返回 None
+        """
+        if not task.repeatFlag or task.status != 0:
+            return None
+        start = start or self.window[0]
+        end = end or self.window[1]
+        if self.window[0] <= start and end <= self.window[1]:
+            occurrences = self._expand(task, *self.window)
+        else:
+            occurrences = self._expand(task, start, end)
+        if occurrences is None:
+            return None
+        return [(s, e) for s, e in occurrences if not (e < start or s > end)]
@@ -0,0 +1,87 @@
+import os
+from typing import Dict, Iterable, Optional, Set
+from StateStore import load_json, save_json
+
+
+class RunCheckpoint:
+    """
+    可恢复的运行检查点
+
+    长时间运行的导出（如首次导出、回溯历史）在开始渲染前记录本次需要处理的条目（任务笔记、摘要文件），
+    处理过程中定期记录已完成的条目。进程中途被杀时，下次运行会把上次未完成的条目并入本次的待处理集合，
+    不会因为依赖索引已经更新而遗漏这些文件；输入数据的快照指纹与上次相同时，上次已完成的条目直接跳过，
+    从中断处继续而不必从头重新渲染。
+
+    状态保存在状态目录下的 checkpoint_<name>.json 中，全部完成后删除。
+    """
+
+    # 每完成多少个条目写一次检查点
+    FLUSH_EVERY = 50
+
+    def __init__(self, state_dir: str, name: str):
+        """
+        初始化检查点
+
+        参数:
+            state_dir: 状态目录
+            name: 数据源名称（如 dida365）
+        """
+        self.path = os.path.join(state_dir, f"checkpoint_{name}.json")
+        self.state: Dict[str, dict] = load_json(self.path, {}) or {}
+        self._pending: Dict[str, Set[str]] = {}
+        self._done: Dict[str, Set[str]] = {}
+        self._unsaved = 0
+
+    def begin(self, kind: str, items: Iterable[str], snapshot: Optional[str] = None) -> Set[str]:
+        """
+        开始一类工作，合并上次中断时未完成的条目
+
+        参数:
+            kind: 工作类别（如 notes、summaries）
+            items: 本次需要处理的条目
+            snapshot: 输入数据的快照指纹，与上次中断时相同才会跳过上次已完成的条目
+
+        返回:
+            本次仍需处理的条目（含上次未完成的条目，不含上次已完成且输入未变化的条目）
+        """
+        entry = self.state.get(kind) or {}
+        previous_done = set(entry.get('done', []))
+        leftover = set(entry.get('pending', [])) - previous_done
+        pending = set(items) | leftover
+        done = pending & previous_done if snapshot is not None and entry.get('snapshot') == snapshot else set()
+        remaining = pending - done
+        if entry:
+            print(f"从上次中断处继续：{kind} 已完成 {len(done)} 个，还需处理 {len(remaining)} 个")
+        self._pending[kind] = pending
+        self._done[kind] = done
+        self.state[kind] = {'snapshot': snapshot, 'pending': sorted(pending), 'done': sorted(done)}
+        self.save()
+        return remaining
+
+    def mark_done(self, kind: str, item: str):
+        """
+        记录一个已完成的条目（每 FLUSH_EVERY 个写一次文件）
+        """
+        if item not in self._pending.get(kind, ()) or item in self._done[kind]:
+            return
+        self._done[kind].add(item)
+        self.state[kind]['done'].append(item)
+        self._unsaved += 1
+        if self._unsaved >= self.FLUSH_EVERY:
+            self.save()
+
+    def finish(self, kind: str):
+        """
+        一类工作全部完成，清除其检查点
+        """
+        self.state.pop(kind, None)
+        self._pending.pop(kind, None)
+        self._done.pop(kind, None)
+        self.save()
+
+    def save(self):
+        self._unsaved = 0
+        if self.state:
+            save_json(self.path, self.state)
+        elif os.path.exists(self.path):
+            os.remove(self.path)
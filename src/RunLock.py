@@ -0,0 +1,70 @@
+import os
+from typing import Optional, TextIO
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，改用 msvcrt 的文件锁
+    fcntl = None
+    import msvcrt
+
+
+class RunLock:
+    """
+    单实例运行锁
+
+    在状态目录下的 <name>.lock 文件上加非阻塞的排他锁，保证同一输出目录同一时间只有一个导出进程在运行：
+    cron 的下一次触发遇到仍在运行的慢任务（如首次导出、回溯历史）时直接退出，而不是并发地重写同一批文件。
+    锁由操作系统持有，进程被杀后自动释放，不会留下需要手动清理的过期锁。
+    """
+
+    def __init__(self, state_dir: str, name: str = 'run'):
+        """
+        初始化运行锁
+
+        参数:
+            state_dir: 状态目录
+            name: 锁名称
+        """
+        self.path = os.path.join(state_dir, f"{name}.lock")
+        self._file: Optional[TextIO] = None
+
+    def acquire(self) -> bool:
+        """
+        尝试获取锁，已被其他进程持有时立即返回 False
+        """
+        f = open(self.path, 'a+', encoding='utf-8')
+        try:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        # 记录持有锁的进程，便于排查
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "RunLock":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
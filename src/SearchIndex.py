@@ -0,0 +1,228 @@
+import os
+import sys
+import sqlite3
+import argparse
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def task_version(task, with_comments: bool = False) -> str:
+    """
+    任务在索引中的版本：modifiedTime，索引了评论时加上标记
+
+    开启或关闭 SEARCH_INDEX_COMMENTS 后版本随之变化，已索引的任务会重新索引一次（补全或去掉评论）。
+    """
+    return f"{task.modifiedTime}|comments" if with_comments else str(task.modifiedTime)
+
+
+class SearchIndex:
+    """
+    任务和 Memos 的全文搜索索引（SQLite FTS5）
+
+    索引覆盖任务标题、content、desc、检查项 items、评论（可选）以及 Memos 内容。
+    索引按任务的 modifiedTime、Memos 的 updatedTs 增量更新：版本未变化的文档不会重新写入。
+
+    中文内容默认使用 trigram 分词（支持任意子串匹配），SQLite 版本不支持时退回 unicode61。
+    """
+
+    def __init__(self, state_dir: str):
+        """
+        初始化搜索索引
+
+        参数:
+            state_dir: 状态目录，索引文件为其下的 search.sqlite
+        """
+        self.path = os.path.join(state_dir, 'search.sqlite')
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "id INTEGER PRIMARY KEY, kind TEXT NOT NULL, doc_id TEXT NOT NULL, "
+            "version TEXT, title TEXT, UNIQUE(kind, doc_id))"
+        )
+        try:
+            self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(title, body, tokenize='trigram')")
+        except sqlite3.OperationalError:
+            self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(title, body)")
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def versions(self, kind: str) -> Dict[str, str]:
+        """
+        获取某类文档已索引的版本
+
+        参数:
+            kind: 文档类型（task / memo）
+
+        返回:
+            文档ID -> 版本
+        """
+        return dict(self.conn.execute("SELECT doc_id, version FROM docs WHERE kind = ?", (kind,)).fetchall())
+
+    def stale_ids(self, kind: str, versions: Dict[str, Optional[str]]) -> List[str]:
+        """
+        找出需要重新索引的文档（新增或版本变化）
+
+        参数:
+            kind: 文档类型
+            versions: 文档ID -> 当前版本
+
+        返回:
+            需要重新索引的文档ID列表
+        """
+        indexed = self.versions(kind)
+        return [doc_id for doc_id, version in versions.items() if indexed.get(doc_id) != str(version)]
+
+    def upsert(self, kind: str, doc_id: str, version, title: str, body: str) -> bool:
+        """
+        写入一篇文档，版本未变化时跳过
+
+        返回:
+            是否写入了索引
+        """
+        version = str(version)
+        row = self.conn.execute("SELECT id, version FROM docs WHERE kind = ? AND doc_id = ?", (kind, doc_id)).fetchone()
+        if row and row[1] == version:
+            return False
+        if row:
+            rowid = row[0]
+            self.conn.execute("DELETE FROM search WHERE rowid = ?", (rowid,))
+            self.conn.execute("UPDATE docs SET version = ?, title = ? WHERE id = ?", (version, title, rowid))
+        else:
+            cursor = self.conn.execute(
+                "INSERT INTO docs (kind, doc_id, version, title) VALUES (?, ?, ?, ?)",
+                (kind, doc_id, version, title),
+            )
+            rowid = cursor.lastrowid
+        self.conn.execute("INSERT INTO search (rowid, title, body) VALUES (?, ?, ?)", (rowid, title, body))
+        return True
+
+    def delete(self, kind: str, doc_ids: Iterable[str]) -> int:
+        """
+        从索引中删除文档
+
+        返回:
+            删除的文档数
+        """
+        deleted = 0
+        for doc_id in doc_ids:
+            row = self.conn.execute("SELECT id FROM docs WHERE kind = ? AND doc_id = ?", (kind, str(doc_id))).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM search WHERE rowid = ?", (row[0],))
+                self.conn.execute("DELETE FROM docs WHERE id = ?", (row[0],))
+                deleted += 1
+        return deleted
+
+    def prune(self, kind: str, keep_ids: Iterable[str]) -> int:
+        """
+        删除某类文档中不在 keep_ids 里的文档（用于获取了全部文档之后清理已删除的文档）
+
+        返回:
+            删除的文档数
+        """
+        keep = {str(doc_id) for doc_id in keep_ids}
+        return self.delete(kind, [doc_id for doc_id in self.versions(kind) if doc_id not in keep])
+
+    def index_tasks(self, tasks, comments: Optional[Dict[str, List[str]]] = None) -> int:
+        """
+        增量索引任务
+
+        参数:
+            tasks: 任务列表
+            comments: 任务ID -> 评论内容列表（启用评论索引时传入；没有条目的任务视为评论获取失败，下次重新获取）
+
+        返回:
+            写入索引的任务数
+        """
+        comments = comments or {}
+        count = 0
+        for task in tasks:
+            if not task.id:
+                continue
+            parts = [task.content or '', task.desc or '']
+            parts.extend(item.get('title', '') for item in task.items or [])
+            parts.extend(comments.get(task.id, []))
+            body = "\n".join(part for part in parts if part)
+            if self.upsert('task', task.id, task_version(task, task.id in comments), task.title or '', body):
+                count += 1
+        self.conn.commit()
+        return count
+
+    def index_memos(self, memos) -> int:
+        """
+        增量索引 Memos
+
+        参数:
+            memos: MemosRecord 列表
+
+        返回:
+            写入索引的 Memos 数
+        """
+        count = 0
+        for memo in memos:
+            memo_id = getattr(memo, 'id', None) or getattr(memo, 'name', None)
+            if memo_id is None:
+                continue
+            content = (memo.content or '').strip()
+            title = content.split('\n', 1)[0][:80]
+            if self.upsert('memo', str(memo_id), memo.updatedTs, title, content):
+                count += 1
+        self.conn.commit()
+        return count
+
+    def search(self, query: str, kind: Optional[str] = None, limit: int = 20) -> List[Tuple[str, str, str, str]]:
+        """
+        搜索索引
+
+        参数:
+            query: 搜索关键词
+            kind: 限定文档类型（task / memo）
+            limit: 返回结果数上限
+
+        返回:
+            (kind, doc_id, title, snippet) 列表，按相关度排序
+        """
+        kind_clause = " AND docs.kind = ?" if kind else ""
+        kind_params = [kind] if kind else []
+        if len(query) >= 3:
+            phrase = '"' + query.replace('"', '""') + '"'
+            sql = (
+                "SELECT docs.kind, docs.doc_id, docs.title, snippet(search, 1, '[', ']', '…', 12) "
+                "FROM search JOIN docs ON docs.id = search.rowid "
+                f"WHERE search MATCH ?{kind_clause} ORDER BY rank LIMIT ?"
+            )
+            return self.conn.execute(sql, [phrase] + kind_params + [limit]).fetchall()
+        # trigram 分词不支持少于 3 个字符的查询，退回 LIKE 匹配
+        pattern = f"%{query}%"
+        sql = (
+            "SELECT docs.kind, docs.doc_id, docs.title, substr(search.body, 1, 60) "
+            "FROM search JOIN docs ON docs.id = search.rowid "
+            f"WHERE (search.title LIKE ? OR search.body LIKE ?){kind_clause} LIMIT ?"
+        )
+        return self.conn.execute(sql, [pattern, pattern] + kind_params + [limit]).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="搜索已导出的任务和 Memos")
+    parser.add_argument('query', help="搜索关键词")
+    parser.add_argument('--kind', choices=['task', 'memo'], help="只搜索任务或 Memos")
+    parser.add_argument('--limit', type=int, default=20, help="返回结果数上限")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from StateStore import get_state_dir
+    load_dotenv()
+    output_dir = os.getenv('OUTPUT_DIR') or os.path.dirname(os.path.abspath(__file__))
+    index = SearchIndex(get_state_dir(output_dir))
+    results = index.search(args.query, args.kind, args.limit)
+    index.close()
+    if not results:
+        print("没有找到匹配的结果")
+        return
+    for kind, doc_id, title, snippet in results:
+        snippet = (snippet or '').replace('\n', ' ')
+        print(f"[{kind}] [[{doc_id}|{title}]] {snippet}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
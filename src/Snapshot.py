@@ -0,0 +1,173 @@
+import os
+import io
+import gzip
+import json
+import shutil
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson  # 可选依赖：安装后解析快照更快
+except ImportError:
+    orjson = None
+
+
+def snapshot_enabled() -> bool:
+    """
+    是否在每次获取数据时保存原始响应快照（环境变量 SNAPSHOT_ENABLED，默认关闭）
+    """
+    return os.getenv('SNAPSHOT_ENABLED', 'false').lower() == 'true'
+
+
+class SnapshotRecorder:
+    """
+    原始响应快照的写入器
+
+    每次获取数据时把原始响应按名称写入 <state>/snapshots/<source>/<时间>/<name>.json.gz，
+    全部写完后写入 meta.json 表示快照完整（中途被杀的快照没有 meta.json，读取时会被忽略），
+    并只保留最近 SNAPSHOT_KEEP 个快照（默认 3）。
+    """
+
+    def __init__(self, state_dir: str, source: str, now: Optional[datetime] = None):
+        """
+        参数:
+            state_dir: 状态目录
+            source: 数据源名称（dida365、memos）
+            now: 快照时间
+        """
+        self.now = now or datetime.now()
+        self.root = os.path.join(state_dir, 'snapshots', source)
+        self.path = os.path.join(self.root, self.now.strftime('%Y%m%d-%H%M%S'))
+        os.makedirs(self.path, exist_ok=True)
+        self.names: List[str] = []
+
+    def _file(self, name: str) -> str:
+        self.names.append(name)
+        return os.path.join(self.path, f"{name}.json.gz")
+
+    def write_bytes(self, name: str, raw: bytes):
+        """
+        写入一个原始响应体
+        """
+        with gzip.open(self._file(name), 'wb', compresslevel=6) as f:
+            f.write(raw)
+
+    def write_json(self, name: str, data: Any):
+        """
+        写入一个已解析的数据（用于由多个请求和本地缓存合并而成的数据，如已完成任务）
+        """
+        self.write_bytes(name, json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    def open_stream(self, name: str) -> io.BufferedIOBase:
+        """
+        打开一个流式写入的响应体（用于边下载边解析的请求）
+        """
+        return gzip.open(self._file(name), 'wb', compresslevel=6)
+
+    def finish(self, **meta):
+        """
+        写入元信息并清理旧快照
+
+        参数:
+            meta: 回放时需要的额外信息（如收集箱 ID、导出窗口）
+        """
+        meta = dict(meta, time=self.now.isoformat(), files=self.names)
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, default=str)
+        keep = max(int(os.getenv('SNAPSHOT_KEEP', '3')), 1)
+        for name in sorted(os.listdir(self.root))[:-keep]:
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        print(f"已保存原始响应快照: {self.path}")
+
+
+class Snapshot:
+    """
+    原始响应快照的读取器
+
+    使用内存映射读取压缩文件，安装了 orjson 时用 orjson 解析，否则使用标准库 json。
+    """
+
+    def __init__(self, path: str):
+        """
+        参数:
+            path: 快照目录（含 meta.json）
+        """
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        self.time = datetime.fromisoformat(self.meta['time'])
+
+    @classmethod
+    def latest(cls, state_dir: str, source: str) -> Optional["Snapshot"]:
+        """
+        返回指定数据源最近一个完整的快照，没有时返回 None
+        """
+        root = os.path.join(state_dir, 'snapshots', source)
+        if not os.path.isdir(root):
+            return None
+        for name in sorted(os.listdir(root), reverse=True):
+            if os.path.exists(os.path.join(root, name, 'meta.json')):
+                return cls(os.path.join(root, name))
+        return None
+
+    def has(self, name: str) -> bool:
+        return os.path.exists(os.path.join(self.path, f"{name}.json.gz"))
+
+    def load(self, name: str, default: Any = None) -> Any:
+        """
+        读取并解析一个响应，不存在时返回默认值
+
+        边读边解压：未安装 orjson 时 json.load 直接从解压流中读取，不在内存中保留压缩数据
+        """
+        path = os.path.join(self.path, f"{name}.json.gz")
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return default
+        with gzip.open(path, 'rb') as f:
+            return orjson.loads(f.read()) if orjson else json.load(f)
+
+
+class SnapshotClient:
+    """
+    从快照回放的滴答清单客户端
+
+    方法与 Dida365Client 一致，数据全部来自快照，不发起任何网络请求，用于修改模板或修复渲染后离线重新生成笔记。
+    """
+
+    def __init__(self, snapshot: Snapshot):
+        self.snapshot = snapshot
+        self.inbox_id = snapshot.meta.get('inbox_id')
+        self._completed: Optional[List[dict]] = None
+
+    def get_all_data(self) -> Dict:
+        return self.snapshot.load('batch_check', {})
+
+    def get_completed_tasks(self, from_date: str, to_date: str, limit: int = 50) -> List[dict]:
+        """
+        与接口一致：返回时间范围内按完成时间倒序的前 limit 个已完成任务
+        """
+        if self._completed is None:
+            completed = self.snapshot.load('completed', []) or []
+            # 完成时间统一换算为北京时间的「YYYY-MM-DD HH:MM:SS」，与查询参数直接比较
+            for task in completed:
+                completed_time = task.get('completedTime')
+                if completed_time:
+                    dt = datetime.fromisoformat(completed_time.replace('Z', '+00:00')) + timedelta(hours=8)
+                    task['_snapshotCompletedTime'] = dt.strftime("%Y-%m-%d %H:%M:%S")
+                else:
+                    task['_snapshotCompletedTime'] = ''
+            self._completed = sorted(completed, key=lambda t: t['_snapshotCompletedTime'], reverse=True)
+        tasks = [
+            {k: v for k, v in task.items() if k != '_snapshotCompletedTime'}
+            for task in self._completed
+            if from_date <= task['_snapshotCompletedTime'] <= to_date
+        ]
+        return tasks[:limit]
+
+    def get_habits(self) -> List[dict]:
+        return self.snapshot.load('habits', [])
+
+    def get_habits_checkins(self, after_stamp: str, habitIds: List) -> Dict:
+        return self.snapshot.load('checkins', {})
+
+    def get_task_comments(self, project_id: str, task_id: str) -> List[dict]:
+        return []
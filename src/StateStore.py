@@ -0,0 +1,79 @@
+import os
+import json
+import hashlib
+from typing import Any
+
+
+def get_output_dir() -> str:
+    """
+    获取输出目录：环境变量 OUTPUT_DIR，未设置时使用脚本所在目录（src）
+    """
+    return os.getenv('OUTPUT_DIR') or os.path.dirname(os.path.abspath(__file__))
+
+
+def get_state_dir(output_dir: str) -> str:
+    """
+    获取导出器的状态目录（用于保存增量导出所需的索引、缓存等）
+
+    状态目录默认位于输出目录下的 .dida365 文件夹中，Obsidian 会忽略以点开头的目录。
+    可通过环境变量 STATE_DIR 自定义（相对路径基于输出目录）。
+
+    参数:
+        output_dir: 输出目录
+
+    返回:
+        状态目录的绝对路径（确保已存在）
+    """
+    state_dir = os.path.join(output_dir, os.getenv('STATE_DIR', '.dida365'))
+    os.makedirs(state_dir, exist_ok=True)
+    return state_dir
+
+
+def load_json(path: str, default: Any = None) -> Any:
+    """
+    读取 JSON 状态文件，文件不存在或损坏时返回默认值
+
+    参数:
+        path: 文件路径
+        default: 默认值
+
+    返回:
+        解析后的数据
+    """
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"读取状态文件失败，将重新生成: {path} ({e})")
+        return default
+
+
+def save_json(path: str, data: Any):
+    """
+    原子地写入 JSON 状态文件（先写临时文件再替换），避免中途被杀导致文件损坏
+
+    参数:
+        path: 文件路径
+        data: 要写入的数据
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def fingerprint(*values: Any) -> str:
+    """
+    计算一组值的指纹，用于判断数据是否发生变化
+
+    参数:
+        values: 任意可 JSON 序列化的值
+
+    返回:
+        指纹字符串
+    """
+    raw = json.dumps(values, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
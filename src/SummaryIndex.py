@@ -0,0 +1,221 @@
+import os
+from datetime import datetime, date as date_type, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from Types import Task
+from StateStore import load_json, save_json, fingerprint
+
+
+def task_fingerprint(task: Task) -> str:
+    """
+    计算任务在摘要/索引中可见字段的指纹
+
+    参数:
+        task: Task 对象
+
+    返回:
+        指纹字符串，任务的标题、状态、时间等任一字段变化都会导致指纹变化
+    """
+    return fingerprint(
+        task.title, task.projectId, task.status, task.priority,
+        task.startDate, task.dueDate, task.isAllDay, task.completedTime,
+        task.createdTime, task.modifiedTime, task.parentId, task.childIds,
+        task.repeatFlag, task.exDate,
+    )
+
+
+def daily_key(day: date_type) -> str:
+    return f"daily:{day.strftime('%Y-%m-%d')}"
+
+
+def weekly_key(day: date_type) -> str:
+    iso_year, week_num, _ = day.isocalendar()
+    return f"weekly:{iso_year}-W{week_num:02d}"
+
+
+def monthly_key(day: date_type) -> str:
+    return f"monthly:{day.strftime('%Y-%m')}"
+
+
+def parse_key(key: str) -> Tuple[str, datetime]:
+    """
+    将摘要键解析为 (类型, 周期内任意一天的日期)
+
+    参数:
+        key: 形如 daily:2025-06-01、weekly:2025-W23、monthly:2025-06 的摘要键
+
+    返回:
+        二元组 (kind, date)，date 为日摘要当天、周摘要周一、月摘要一号
+    """
+    kind, value = key.split(':', 1)
+    if kind == 'daily':
+        return kind, datetime.strptime(value, '%Y-%m-%d')
+    if kind == 'weekly':
+        iso_year, week_num = value.split('-W')
+        return kind, datetime.fromisocalendar(int(iso_year), int(week_num), 1)
+    if kind == 'monthly':
+        return kind, datetime.strptime(value, '%Y-%m')
+    raise ValueError(f"未知的摘要键: {key}")
+
+
+class SummaryIndex:
+    """
+    摘要依赖索引
+
+    记录每个任务参与了哪些日/周/月摘要文件（由处理后的开始、截止时间决定），
+    并在每次运行时与上次的任务指纹比较，得到新增、修改、删除的任务，
+    从而只重新渲染受影响的摘要文件和项目索引段落。
+
+    状态保存在状态目录下的 summary_index.json 中。
+    """
+
+    def __init__(self, state_dir: str):
+        """
+        初始化摘要依赖索引
+
+        参数:
+            state_dir: 状态目录
+        """
+        self.path = os.path.join(state_dir, 'summary_index.json')
+        data = load_json(self.path, {}) or {}
+        # 任务ID -> {"fp": 指纹, "keys": 摘要键列表, "status": 状态, "done": 完成日期, "parent": 父任务ID}
+        self.tasks: Dict[str, dict] = data.get('tasks', {})
+        # 额外追踪的键（如习惯打卡、项目段落）-> 指纹
+        self.extras: Dict[str, str] = data.get('extras', {})
+        # 项目ID -> 已渲染的项目索引段落
+        self.sections: Dict[str, str] = data.get('sections', {})
+        self.changed_ids: Set[str] = set()
+        self.removed_ids: Set[str] = set()
+        # 变化或删除任务原来的父任务ID（任务被删除或移动后，原父任务的笔记也需要更新）
+        self.previous_parents: Set[str] = set()
+
+    def update(self, tasks: Iterable[Task], window: Tuple[datetime, datetime],
+               key_fn: Callable[[Task], List[str]]) -> Set[str]:
+        """
+        用本次获取的任务更新索引，返回受影响的摘要键
+
+        参数:
+            tasks: 本次获取的全部任务（待办和已完成）
+            window: 本次获取的已完成任务的时间窗口 (start, end)
+            key_fn: 计算任务所参与摘要键的函数
+
+        返回:
+            受影响的摘要键集合（包含任务变化前后所在的摘要）
+        """
+        window_start, window_end = window
+        affected: Set[str] = set()
+        seen: Set[str] = set()
+        self.changed_ids = set()
+        self.removed_ids = set()
+        self.previous_parents = set()
+        for task in tasks:
+            if not task.id:
+                continue
+            seen.add(task.id)
+            fp = task_fingerprint(task)
+            old = self.tasks.get(task.id)
+            if old and old.get('fp') == fp:
+                # 指纹未变，只刷新键（时间窗口可能已移动）
+                old['keys'] = key_fn(task)
+                continue
+            keys = key_fn(task)
+            self.changed_ids.add(task.id)
+            affected.update(keys)
+            if old:
+                affected.update(old.get('keys', []))
+                if old.get('parent'):
+                    self.previous_parents.add(old['parent'])
+            done = getattr(task, '_processed_completedTime', None)
+            self.tasks[task.id] = {
+                'fp': fp,
+                'keys': keys,
+                'status': task.status,
+                'done': done.strftime('%Y-%m-%d') if done else None,
+                'parent': task.parentId or None,
+            }
+        for task_id in list(self.tasks.keys()):
+            if task_id in seen:
+                continue
+            old = self.tasks.pop(task_id)
+            # 已完成任务超出本次获取窗口只是不再返回，并非被删除
+            done = old.get('done')
+            if old.get('status') == 2 and done and not (
+                window_start.strftime('%Y-%m-%d') <= done <= window_end.strftime('%Y-%m-%d')
+            ):
+                continue
+            self.removed_ids.add(task_id)
+            affected.update(old.get('keys', []))
+            if old.get('parent'):
+                self.previous_parents.add(old['parent'])
+        return affected
+
+    def track(self, key: str, fp: str) -> bool:
+        """
+        追踪一个额外的依赖（如某天的习惯打卡），返回其是否发生变化
+
+        参数:
+            key: 依赖键
+            fp: 当前指纹
+
+        返回:
+            指纹与上次不同（包括首次出现）时返回 True
+        """
+        if self.extras.get(key) == fp:
+            return False
+        self.extras[key] = fp
+        return True
+
+    def task_keys(self) -> Set[str]:
+        """
+        返回当前所有任务参与的摘要键
+        """
+        keys: Set[str] = set()
+        for entry in self.tasks.values():
+            keys.update(entry.get('keys', []))
+        return keys
+
+    def save(self):
+        """
+        保存索引到状态文件
+        """
+        save_json(self.path, {
+            'tasks': self.tasks,
+            'extras': self.extras,
+            'sections': self.sections,
+        })
+
+
+def task_summary_keys(start_dt: Optional[datetime], end_dt: Optional[datetime],
+                      window: Tuple[datetime, datetime]) -> List[str]:
+    """
+    计算一个时间区间在窗口内参与的摘要键
+
+    与 Exporter._task_in_range 的判定保持一致：
+    只有开始时间的任务视为一直持续，只有截止时间的任务视为一直存在到截止日。
+    日摘要和月摘要限制在窗口内，周摘要包含与窗口相交的完整周。
+
+    参数:
+        start_dt: 任务处理后的开始时间
+        end_dt: 任务处理后的截止时间
+        window: 时间窗口 (start, end)
+
+    返回:
+        摘要键列表
+    """
+    if not start_dt and not end_dt:
+        return []
+    window_first = window[0].date()
+    window_last = window[1].date()
+    # 周摘要覆盖与窗口相交的完整周
+    week_first = window_first - timedelta(days=window_first.weekday())
+    week_last = window_last + timedelta(days=6 - window_last.weekday())
+    first = max(week_first, start_dt.date()) if start_dt else week_first
+    last = min(week_last, end_dt.date()) if end_dt else week_last
+    keys: Set[str] = set()
+    day = first
+    while day <= last:
+        keys.add(weekly_key(day))
+        if window_first <= day <= window_last:
+            keys.add(daily_key(day))
+            keys.add(monthly_key(day))
+        day += timedelta(days=1)
+    return sorted(keys)
@@ -0,0 +1,133 @@
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from Types import Task
+
+
+class TaskHierarchy:
+    """
+    任务层级索引
+
+    每次运行构建一次，记录任务的父子关系（同时参考 childIds 和 parentId），
+    用于：
+    1. 查找子任务、父任务和祖先任务
+    2. 将任务的变化传播到父任务、祖先任务和直接子任务的笔记
+    3. 以嵌套列表的形式渲染深层任务树（按节点缓存渲染结果）
+    """
+
+    def __init__(self, tasks: Iterable[Task]):
+        """
+        初始化任务层级索引
+
+        参数:
+            tasks: 全部任务（待办和已完成）
+        """
+        self.tasks: Dict[str, Task] = {task.id: task for task in tasks if task.id}
+        self.parents: Dict[str, str] = {}
+        self.children: Dict[str, List[str]] = {}
+        for task in self.tasks.values():
+            for child_id in task.childIds or []:
+                if child_id in self.tasks:
+                    self._link(task.id, child_id)
+        for task in self.tasks.values():
+            if task.parentId and task.parentId in self.tasks:
+                self._link(task.parentId, task.id)
+        self._heights: Dict[str, int] = {}
+        self._outlines: Dict[str, List[str]] = {}
+
+    def _link(self, parent_id: str, child_id: str):
+        if parent_id == child_id or self.parents.get(child_id):
+            return
+        self.parents[child_id] = parent_id
+        self.children.setdefault(parent_id, []).append(child_id)
+
+    def get(self, task_id: Optional[str]) -> Optional[Task]:
+        """
+        按ID获取任务
+        """
+        return self.tasks.get(task_id) if task_id else None
+
+    def child_tasks(self, task_id: str) -> List[Task]:
+        """
+        获取任务的直接子任务（保持 childIds 中的顺序）
+        """
+        return [self.tasks[child_id] for child_id in self.children.get(task_id, [])]
+
+    def ancestors(self, task_id: str) -> List[str]:
+        """
+        获取任务的所有祖先任务ID（由近到远）
+
+        参数:
+            task_id: 任务ID
+
+        返回:
+            祖先任务ID列表，遇到循环引用时停止
+        """
+        result = []
+        seen = {task_id}
+        current = self.parents.get(task_id)
+        while current and current not in seen:
+            result.append(current)
+            seen.add(current)
+            current = self.parents.get(current)
+        return result
+
+    def height(self, task_id: str) -> int:
+        """
+        获取以任务为根的子树高度（叶子任务为 0）
+        """
+        if task_id in self._heights:
+            return self._heights[task_id]
+        # 先占位，防止循环引用导致无限递归
+        self._heights[task_id] = 0
+        children = self.children.get(task_id, [])
+        height = 1 + max((self.height(child_id) for child_id in children), default=-1)
+        self._heights[task_id] = height
+        return height
+
+    def propagate_dirty(self, changed_ids: Iterable[str], extra_ids: Iterable[str] = ()) -> Set[str]:
+        """
+        计算需要重新渲染笔记的任务集合
+
+        任务笔记中包含父任务表格、子任务表格和任务层级，因此一个任务变化后：
+        1. 任务自身需要重新渲染
+        2. 父任务和所有祖先任务需要重新渲染（子任务表格、任务层级）
+        3. 直接子任务需要重新渲染（父任务表格）
+
+        参数:
+            changed_ids: 新增、修改或删除的任务ID
+            extra_ids: 额外需要作为起点传播的任务ID（如被删除或移动任务原来的父任务）
+
+        返回:
+            当前存在且需要重新渲染的任务ID集合
+        """
+        dirty: Set[str] = set()
+        for task_id in list(changed_ids) + list(extra_ids):
+            if not task_id:
+                continue
+            dirty.add(task_id)
+            dirty.update(self.ancestors(task_id))
+            dirty.update(self.children.get(task_id, []))
+        return {task_id for task_id in dirty if task_id in self.tasks}
+
+    def outline_lines(self, task_id: str, line_fn: Callable[[Task], str]) -> List[str]:
+        """
+        以嵌套列表的形式渲染任务子树
+
+        每个节点的渲染结果都会被缓存，父任务直接复用子任务已渲染的行，
+        因此整棵树在一次运行中只会被遍历一次。
+
+        参数:
+            task_id: 子树根任务ID
+            line_fn: 渲染单个任务行的函数
+
+        返回:
+            Markdown 列表行（不含换行符）
+        """
+        if task_id in self._outlines:
+            return self._outlines[task_id]
+        # 先占位，防止循环引用导致无限递归
+        self._outlines[task_id] = []
+        lines = [line_fn(self.tasks[task_id])]
+        for child_id in self.children.get(task_id, []):
+            lines.extend(f"\t{line}" for line in self.outline_lines(child_id, line_fn))
+        self._outlines[task_id] = lines
+        return lines
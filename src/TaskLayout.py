@@ -0,0 +1,185 @@
+import os
+import re
+from datetime import datetime
+from typing import Dict, Optional, TYPE_CHECKING
+from Types import Task, parse_api_time
+
+if TYPE_CHECKING:
+    from ExportRegistry import ExportRegistry
+
+# 任务笔记目录的分片方式：不分片、按清单、按创建月份、按任务 ID 前缀
+SHARDING_SCHEMES = ('flat', 'project', 'month', 'prefix')
+
+# Obsidian 和常见文件系统不允许出现在文件夹名中的字符
+_UNSAFE_CHARS = re.compile(r'[\\/:*?"<>|#^\[\]]')
+
+
+def read_front_matter(path: str) -> Dict[str, str]:
+    """
+    读取任务笔记的 Front Matter（只读取文件开头的 --- 块）
+
+    参数:
+        path: 笔记路径
+
+    返回:
+        字段名 -> 字符串值，没有 Front Matter 时返回空字典
+    """
+    fields = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        if f.readline().strip() != '---':
+            return fields
+        for line in f:
+            if line.strip() == '---':
+                break
+            key, sep, value = line.partition(':')
+            if sep:
+                fields[key.strip()] = value.strip()
+    return fields
+
+
+def safe_name(name: Optional[str], fallback: str) -> str:
+    """
+    把清单名称等转换为可用作文件或文件夹名的字符串，结果为空时使用 fallback
+    """
+    return _UNSAFE_CHARS.sub('_', name or '').strip(' .') or fallback
+
+
+class TaskLayout:
+    """
+    任务笔记的目录布局
+
+    任务很多时单个目录中的文件数会拖慢文件系统查找、Obsidian 的索引和同步客户端，
+    可通过 TASKS_SHARDING 把任务笔记分散到子目录中：
+    - flat（默认）：全部放在任务目录下
+    - project：按清单名称分目录
+    - month：按任务创建月份（YYYY-MM）分目录
+    - prefix：按任务 ID 前 TASKS_SHARD_PREFIX_LEN（默认 2）个字符分目录
+
+    文件名始终为 <任务ID>.md，摘要和项目索引中的 [[<任务ID>|标题]] 链接不受目录变化影响。
+    """
+
+    def __init__(self, tasks_dir: str, project_names: Optional[Dict[str, str]] = None,
+                 scheme: Optional[str] = None, prefix_len: Optional[int] = None):
+        """
+        参数:
+            tasks_dir: 任务目录
+            project_names: 清单 ID -> 清单名称（按清单分片时使用）
+            scheme: 分片方式，默认读取环境变量 TASKS_SHARDING
+            prefix_len: 前缀分片的长度，默认读取环境变量 TASKS_SHARD_PREFIX_LEN
+        """
+        self.tasks_dir = tasks_dir
+        self.project_names = project_names or {}
+        scheme = (scheme or os.getenv('TASKS_SHARDING', 'flat')).lower()
+        if scheme not in SHARDING_SCHEMES:
+            print(f"未知的任务分片方式 {scheme}，使用 flat")
+            scheme = 'flat'
+        self.scheme = scheme
+        self.prefix_len = max(prefix_len or int(os.getenv('TASKS_SHARD_PREFIX_LEN', '2')), 1)
+
+    @classmethod
+    def from_key(cls, tasks_dir: str, key: str, project_names: Optional[Dict[str, str]] = None) -> 'TaskLayout':
+        """
+        按登记表中记录的布局标识（见 key）构建布局
+        """
+        scheme, _, prefix_len = key.partition(':')
+        return cls(tasks_dir, project_names, scheme, int(prefix_len) if prefix_len.isdigit() else None)
+
+    @property
+    def key(self) -> str:
+        """
+        布局标识，记录在已导出文件登记表中，变化时触发迁移
+        """
+        return f"prefix:{self.prefix_len}" if self.scheme == 'prefix' else self.scheme
+
+    def _project_folder(self, project_id: Optional[str]) -> str:
+        return safe_name(self.project_names.get(project_id or ''), project_id or '未分类')
+
+    def shard(self, task_id: str, project_id: Optional[str], created: Optional[datetime]) -> str:
+        """
+        计算任务所在的子目录（相对于任务目录，flat 时为空字符串）
+
+        参数:
+            task_id: 任务 ID
+            project_id: 清单 ID
+            created: 创建时间（北京时间）
+        """
+        if self.scheme == 'project':
+            return self._project_folder(project_id)
+        if self.scheme == 'month':
+            return created.strftime('%Y-%m') if created else '未知月份'
+        if self.scheme == 'prefix':
+            return task_id[:self.prefix_len]
+        return ''
+
+    def path(self, task_id: str, project_id: Optional[str] = None, created: Optional[datetime] = None) -> str:
+        """
+        返回任务笔记的绝对路径
+        """
+        return os.path.join(self.tasks_dir, self.shard(task_id, project_id, created), f"{task_id}.md")
+
+    def task_path(self, task: Task) -> str:
+        """
+        返回任务对象对应笔记的绝对路径
+        """
+        created = None
+        if self.scheme == 'month' and task.createdTime:
+            created = parse_api_time(task.createdTime)
+        return self.path(task.id, task.projectId, created)
+
+    def note_path(self, path: str) -> str:
+        """
+        根据已有笔记的 Front Matter 计算其在当前布局下的路径（用于迁移本次没有获取到的任务）
+        """
+        task_id = os.path.splitext(os.path.basename(path))[0]
+        if self.scheme in ('flat', 'prefix'):
+            return self.path(task_id)
+        fields = read_front_matter(path)
+        created = None
+        if fields.get('created_time'):
+            try:
+                created = datetime.strptime(fields['created_time'], '%Y-%m-%d %H:%M:%S')
+            except ValueError:
+                pass
+        return self.path(task_id, fields.get('project_id'), created)
+
+    def migrate(self, registry: "ExportRegistry") -> int:
+        """
+        把已有笔记迁移到当前布局（布局与登记表中记录的不同时执行，可重复执行）
+
+        已登记的笔记按登记的路径定位；登记表建立之前导出、仍在任务目录顶层的笔记只在迁移时遍历一次顶层目录。
+        移动后立即更新登记表中的路径并按批保存，中途中断后再次执行只会处理尚未移动的笔记。
+
+        参数:
+            registry: 已导出文件登记表
+
+        返回:
+            移动的笔记数量
+        """
+        paths = {task_id: registry.get(task_id) for task_id in registry.tasks}
+        with os.scandir(self.tasks_dir) as entries:
+            for entry in entries:
+                task_id, ext = os.path.splitext(entry.name)
+                if ext == '.md' and entry.is_file() and task_id not in paths:
+                    paths[task_id] = entry.path
+        moved = 0
+        emptied = set()
+        for task_id, path in paths.items():
+            if not os.path.exists(path):
+                registry.forget(task_id)
+                continue
+            target = self.note_path(path)
+            if target != path:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(path, target)
+                emptied.add(os.path.dirname(path))
+                moved += 1
+            registry.record(task_id, target)
+            if moved and moved % 500 == 0:
+                registry.save()
+        # 清理迁移后变空的旧分片目录
+        for directory in emptied:
+            if directory != self.tasks_dir and not os.listdir(directory):
+                os.rmdir(directory)
+        registry.layout = self.key
+        registry.save()
+        return moved
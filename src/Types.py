@@ -1,341 +1,403 @@
-class Tag:
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    import orjson  # 可选依赖：安装后解码原始响应更快
+except ImportError:
+    orjson = None
+
+
+def parse_api_time(value: Optional[str]) -> Optional[datetime]:
     """
-    标签类，表示滴答清单中的一个标签
-    
-    包含标签的所有属性，如名称、颜色等，并提供序列化方法
+    将接口返回的 ISO 8601 时间字符串转换为北京时间的 datetime 对象（不含时区）
+
+    参数:
+        value: ISO 格式的时间字符串，例如 '2023-01-01T12:00:00.000+0000'
+
+    返回:
+        转换后的 datetime 对象，如果输入为空则返回 None
+    """
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    # 转换为北京时间（UTC+8）
+    return (dt + timedelta(hours=8)).replace(tzinfo=None)
+
+
+class Field:
+    """
+    数据模型的字段声明
+
+    解码时按声明补齐缺省值、修正类型，时间字段额外预解析为北京时间的 datetime，
+    保存在 _processed_<字段名> 属性中（字段为空时为 None），渲染时不必再重复解析。
+    """
+
+    __slots__ = ('kind', 'default', 'time')
+
+    def __init__(self, kind: Optional[type] = None, default: Any = None, time: bool = False):
+        """
+        参数:
+            kind: 字段类型（str、int、float、bool、list、dict），None 表示不检查类型
+            default: 缺省值；可变的缺省值传入工厂函数（如 list）
+            time: 是否为 ISO 8601 时间字段
+        """
+        self.kind = kind
+        self.default = default
+        self.time = time
+
+
+def _coerce(value: Any, kind: type) -> Any:
+    """
+    把字段值转换为声明的类型，无法转换时抛出 ValueError/TypeError
+    """
+    if kind is bool and isinstance(value, str):
+        # 部分字段以字符串形式返回布尔值（如习惯的 recordEnable）
+        return value.lower() == 'true'
+    if kind in (list, dict) or (kind is str and not isinstance(value, (int, float))):
+        raise TypeError(f"期望 {kind.__name__}，实际为 {type(value).__name__}")
+    return kind(value)
+
+
+class Model:
+    """
+    数据模型基类
+
+    子类在 SCHEMA 中声明字段，解码时一次完成：
+    1. 缺失或为 null 的字段使用缺省值
+    2. 类型不符的字段按声明转换（如字符串形式的数字），无法转换时使用缺省值
+    3. 时间字段预解析为 _processed_<字段名>
+    4. 未声明的字段原样保留为属性，接口新增字段不会丢失
     """
-    def __init__(self, task_dict=None):
+
+    SCHEMA: Dict[str, Field] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 预先编译字段声明，解码时只需遍历需要处理的字段
+        cls._defaults = {name: None if callable(f.default) else f.default for name, f in cls.SCHEMA.items()}
+        cls._factories = [(name, f.default) for name, f in cls.SCHEMA.items() if callable(f.default)]
+        cls._typed = [(name, f.kind, f.default) for name, f in cls.SCHEMA.items() if f.kind is not None]
+        cls._times = [(name, f"_processed_{name}") for name, f in cls.SCHEMA.items() if f.time]
+
+    def __init__(self, data: Optional[dict] = None):
         """
-        初始化标签对象
-        
         参数:
-            task_dict: 包含标签属性的字典，如果提供则用其初始化标签对象
+            data: 接口返回的字典，不提供时所有字段为缺省值
         """
+        self._decode(data or {})
+
+    @classmethod
+    def decode(cls, data: dict) -> "Model":
+        """
+        把接口返回的字典解码为模型对象
+        """
+        obj = cls.__new__(cls)
+        obj._decode(data)
+        return obj
+
+    @classmethod
+    def decode_many(cls, raw: Union[bytes, str, List[dict]]) -> List["Model"]:
+        """
+        把原始响应（JSON 数组的字节或字符串，或已解析的列表）解码为模型对象列表，空元素会被跳过
+
+        安装了 orjson 时用 orjson 解析，否则使用标准库 json。
+        """
+        if isinstance(raw, (bytes, bytearray, memoryview, str)):
+            raw = orjson.loads(raw) if orjson else json.loads(raw)
+        decode = cls.decode
+        return [decode(item) for item in raw or [] if item]
+
+    def _decode(self, data: dict):
+        d = self.__dict__
+        d.update(self._defaults)
+        for name, factory in self._factories:
+            d[name] = factory()
+        d.update(data)
+        for name, kind, default in self._typed:
+            value = d[name]
+            if value is None:
+                d[name] = default() if callable(default) else default
+            elif type(value) is not kind and not (kind is float and type(value) is int):
+                try:
+                    d[name] = _coerce(value, kind)
+                except (TypeError, ValueError):
+                    d[name] = default() if callable(default) else default
+        for name, processed in self._times:
+            d[processed] = parse_api_time(d[name])
+        self._post_decode()
+
+    def _post_decode(self):
+        """
+        解码完成后的模型特定处理，子类按需覆盖
+        """
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        将对象转换为字典，过滤掉值为None的属性
+
+        返回:
+            dict: 包含对象非空属性的字典
+        """
+        return {key: value for key, value in self.__dict__.items() if value is not None}
+
+
+class Tag(Model):
+    """
+    标签类，表示滴答清单中的一个标签
+
+    包含标签的所有属性，如名称、颜色等，并提供序列化方法
+    """
+    SCHEMA = {
         # 标签名称
-        self.name = None
+        'name': Field(str),
         # 原始名称（未经处理的名称）
-        self.rawName = None
+        'rawName': Field(str),
         # 标签标签（可能用于显示）
-        self.label = None
+        'label': Field(str),
         # 排序顺序
-        self.sortOrder = None
+        'sortOrder': Field(int),
         # 排序类型
-        self.sortType = None
+        'sortType': Field(str),
         # 标签颜色
-        self.color = None
+        'color': Field(str),
         # 标签的ETag（用于缓存和并发控制）
-        self.etag = None
+        'etag': Field(str),
         # 标签类型
-        self.type = None
-        
-        # 如果提供了字典，则更新对象的属性       
-        if task_dict:
-            self.__dict__.update(task_dict)
-    
-    def to_dict(self):
-        """
-        将标签对象转换为字典，过滤掉值为None的属性
-        
-        返回:
-            dict: 包含标签非空属性的字典
-        """
-        return {key: value for key, value in self.__dict__.items() if value is not None}        
+        'type': Field(int),
+    }
+
 
-class Project:
+class Project(Model):
     """
     项目类，表示滴答清单中的一个项目（清单）
-    
+
     包含项目的所有属性，如名称、颜色、权限等，并提供序列化方法
     """
-    def __init__(self, task_dict=None):
-        """
-        初始化项目对象
-        
-        参数:
-            task_dict: 包含项目属性的字典，如果提供则用其初始化项目对象
-        """
+    SCHEMA = {
         # 项目ID
-        self.id: str = ''
+        'id': Field(str, ''),
         # 项目名称
-        self.name: str = ''
+        'name': Field(str, ''),
         # 是否为项目所有者
-        self.isOwner = None
+        'isOwner': Field(bool),
         # 项目颜色
-        self.color = None
+        'color': Field(str),
         # 排序顺序
-        self.sortOrder = None
+        'sortOrder': Field(int),
         # 排序选项
-        self.sortOption = None
+        'sortOption': Field(dict),
         # 排序类型
-        self.sortType = None
+        'sortType': Field(str),
         # 用户数量
-        self.userCount = None
+        'userCount': Field(int),
         # 项目的ETag（用于缓存和并发控制）
-        self.etag = None
+        'etag': Field(str),
         # 最后修改时间
-        self.modifiedTime = None
+        'modifiedTime': Field(str),
         # 是否在所有项目中显示
-        self.inAll = None
+        'inAll': Field(bool),
         # 显示类型
-        self.showType = None
+        'showType': Field(),
         # 是否静音通知
-        self.muted = None
+        'muted': Field(bool),
         # 提醒类型
-        self.reminderType = None
+        'reminderType': Field(),
         # 是否已关闭
-        self.closed = None
+        'closed': Field(bool),
         # 是否已转移
-        self.transferred = None
+        'transferred': Field(),
         # 组ID
-        self.groupId = None
+        'groupId': Field(str),
         # 视图模式
-        self.viewMode = None
+        'viewMode': Field(str),
         # 通知选项
-        self.notificationOptions = None
+        'notificationOptions': Field(),
         # 团队ID
-        self.teamId = None
+        'teamId': Field(str),
         # 权限
-        self.permission = None
+        'permission': Field(str),
         # 项目类型
-        self.kind = None
+        'kind': Field(str),
         # 时间线
-        self.timeline = None
+        'timeline': Field(),
         # 是否需要审核
-        self.needAudit = None
+        'needAudit': Field(bool),
         # 条形码是否需要审核
-        self.barcodeNeedAudit = None
+        'barcodeNeedAudit': Field(bool),
         # 是否对团队开放
-        self.openToTeam = None
+        'openToTeam': Field(bool),
         # 团队成员权限
-        self.teamMemberPermission = None
+        'teamMemberPermission': Field(),
         # 来源
-        self.source = None
+        'source': Field(int),
+    }
 
-        # 如果提供了字典，则更新对象的属性
-        if task_dict:
-            self.__dict__.update(task_dict)
 
-    def to_dict(self):
-        """
-        将项目对象转换为字典，过滤掉值为None的属性
-        
-        返回:
-            dict: 包含项目非空属性的字典
-        """
-        # 返回一个字典，过滤掉值为 None 的属性
-        return {key: value for key, value in self.__dict__.items() if value is not None}
-
-class Task:
+class Task(Model):
     """
     任务类，表示滴答清单中的一个任务
-    
-    包含任务的所有属性，如标题、截止日期、优先级等，并提供序列化方法
+
+    包含任务的所有属性，如标题、截止日期、优先级等，并提供序列化方法。
+    startDate、dueDate、completedTime 解码时预解析为 _processed_startDate 等属性（北京时间），
+    全天任务的 _processed_dueDate 已减去一天（接口返回的是结束日期的次日零点）。
     """
-    def __init__(self, task_dict=None):
-        """
-        初始化任务对象
-        
-        参数:
-            task_dict: 包含任务属性的字典，如果提供则用其初始化任务对象
-        """
+    SCHEMA = {
         # 任务唯一标识符（字符串格式，如"681473bbf92b2938d3ab5d45"）
-        self.id = None  
-        
+        'id': Field(str),
         # 任务标题（字符串，必填字段）
-        self.title = None  
-        
+        'title': Field(str),
         # 所属项目ID（字符串，如"6778eeb7c71c710000000114"表示特定项目）
-        self.projectId = None  
-        
+        'projectId': Field(str),
         # 开始时间（ISO 8601格式字符串，如"2025-05-21T16:00:00.000+0000"）
-        self.startDate = None  
-        
+        'startDate': Field(str, time=True),
         # 子任务列表（数组，存储子任务对象，默认空数组）
-        self.items = []
-        
-        # 提醒时间列表（数组，存储提醒时间点，默认空数组）
-        self.reminders = None  
-        
-        # 排除的重复日期（数组，存储重复任务中跳过的时间点，默认空数组）
-        self.exDate = None  
-        
+        'items': Field(list, list),
+        # 提醒时间列表（数组，存储提醒时间点）
+        'reminders': Field(list),
+        # 排除的重复日期（数组，存储重复任务中跳过的时间点）
+        'exDate': Field(list),
         # 截止时间（ISO 8601格式字符串，可为None表示无截止时间）
-        self.dueDate = None  
-        
-        # 优先级（整数1-5，5最高，0表示无优先级）
-        self.priority = None  
-        
+        'dueDate': Field(str, time=True),
+        # 优先级（整数：0=无，1=低，3=中，5=高）
+        'priority': Field(int, 0),
         # 是否为全天任务（布尔值，True表示全天任务）
-        self.isAllDay = None  
-        
+        'isAllDay': Field(bool),
         # 重复规则（字符串，如"RRULE:FREQ=DAILY"，None表示不重复）
-        self.repeatFlag = None  
-        
+        'repeatFlag': Field(str),
+        # 重复任务第一次的开始时间（ISO 8601格式字符串，COUNT 规则从这里开始计数）
+        'repeatFirstDate': Field(str, time=True),
         # 进度百分比（整数0-100，0表示未开始）
-        self.progress = None  
-        
+        'progress': Field(int),
         # 任务负责人（用户ID，None表示无人负责）
-        self.assignee = None  
-        
+        'assignee': Field(),
         # 排序权重（数值越小越靠前，通常为大负数）
-        self.sortOrder = None  
-        
+        'sortOrder': Field(int),
         # 是否为浮动时间（布尔值，True表示忽略时区）
-        self.isFloating = None  
-        
+        'isFloating': Field(bool),
         # 任务状态（整数：0=未完成，2=已完成，-1=已放弃）
-        self.status = None  
-        
-        # 任务类型扩展字段（保留字段，通常为None）
-        self.kind = None  
-        
+        'status': Field(int),
+        # 任务类型扩展字段（如 TEXT、CHECKLIST、NOTE）
+        'kind': Field(str),
         # 创建时间（ISO 8601格式字符串）
-        self.createdTime = None  
-        
+        'createdTime': Field(str),
         # 最后修改时间（ISO 8601格式字符串）
-        self.modifiedTime = None  
-
+        'modifiedTime': Field(str),
         # 任务完成时间（ISO 8601格式字符串）
-        self.completedTime = None
-        
+        'completedTime': Field(str, time=True),
         # 标签列表（数组，存储字符串类型的标签）
-        self.tags = None  
-        
+        'tags': Field(list),
         # 时区标识（字符串，如"Asia/Hong_Kong"）
-        self.timeZone = None  
-        
+        'timeZone': Field(str),
         # 任务描述内容（字符串，可为空）
-        self.content = None  
-
-        self.desc = None
+        'content': Field(str),
+        # 清单类任务的描述
+        'desc': Field(str),
+        # 子任务ID列表
+        'childIds': Field(list, list),
+        # 父任务ID
+        'parentId': Field(str, ''),
+    }
 
-        self.childIds = []
+    def _post_decode(self):
+        # 全天任务的 dueDate 是结束日期的次日零点，减一天得到实际的结束日期
+        due = self._processed_dueDate
+        if due and self.isAllDay and self.startDate != self.dueDate:
+            self._processed_dueDate = due - timedelta(days=1)
 
-        self.parentId = ''
 
-        # 如果有输入字典，覆盖对应字段
-        if task_dict:
-            self.__dict__.update(task_dict)
-    
-    def to_dict(self):
-        """
-        将任务对象转换为字典，过滤掉值为None的属性
-        
-        返回:
-            dict: 包含任务非空属性的字典
-        """
-        return {key: value for key, value in self.__dict__.items() if value is not None}        
-
-class Habit:
+class Habit(Model):
     """
     习惯类，表示滴答清单中的一个习惯
     包含习惯的所有属性，如名称、颜色、打卡次数、提醒等，并提供序列化方法
     """
-    def __init__(self, habit_dict=None):
-        """
-        初始化习惯对象
-        参数:
-            habit_dict: 包含习惯属性的字典，如果提供则用其初始化习惯对象
-        """
+    SCHEMA = {
         # 习惯ID
-        self.id = None
+        'id': Field(str),
         # 习惯名称
-        self.name = None
+        'name': Field(str),
         # 图标资源名
-        self.iconRes = None
+        'iconRes': Field(str),
         # 习惯颜色
-        self.color = None
+        'color': Field(str),
         # 排序顺序
-        self.sortOrder = None
+        'sortOrder': Field(int),
         # 状态（0=启用，1=归档）
-        self.status = None
+        'status': Field(int),
         # 鼓励语
-        self.encouragement = None
+        'encouragement': Field(str),
         # 总打卡次数
-        self.totalCheckIns = None
+        'totalCheckIns': Field(int),
         # 创建时间（ISO 8601字符串）
-        self.createdTime = None
+        'createdTime': Field(str),
         # 修改时间（ISO 8601字符串）
-        self.modifiedTime = None
+        'modifiedTime': Field(str),
         # 归档时间（ISO 8601字符串）
-        self.archivedTime = None
+        'archivedTime': Field(str),
         # 类型（如 Boolean）
-        self.type = None
+        'type': Field(str),
         # 目标值
-        self.goal = None
+        'goal': Field(float),
         # 步长
-        self.step = None
+        'step': Field(float),
         # 单位
-        self.unit = None
+        'unit': Field(str),
         # etag
-        self.etag = None
+        'etag': Field(str),
         # 重复规则（如 RRULE:FREQ=WEEKLY...）
-        self.repeatRule = None
+        'repeatRule': Field(str),
         # 提醒时间列表
-        self.reminders = None
-        # 是否启用记录（字符串 'True'/'False'）
-        self.recordEnable = None
+        'reminders': Field(list),
+        # 是否启用记录（接口可能返回字符串 'True'/'False'）
+        'recordEnable': Field(bool),
         # 分区ID
-        self.sectionId = None
+        'sectionId': Field(str),
         # 目标天数
-        self.targetDays = None
+        'targetDays': Field(int),
         # 目标开始日期（如 20250403）
-        self.targetStartDate = None
+        'targetStartDate': Field(int),
         # 已完成周期数
-        self.completedCycles = None
+        'completedCycles': Field(int),
         # 排除日期
-        self.exDates = None
+        'exDates': Field(list),
         # 风格（如 1）
-        self.style = None
-        # 如果提供了字典，则更新对象的属性
-        if habit_dict:
-            self.__dict__.update(habit_dict)
-    
-    def to_dict(self):
-        """
-        将习惯对象转换为字典，过滤掉值为None的属性
-        返回:
-            dict: 包含习惯非空属性的字典
-        """
-        return {key: value for key, value in self.__dict__.items() if value is not None}
+        'style': Field(int),
+    }
+
 
-class MemosResource:
+class MemosResource(Model):
     """
     Memos 资源类，对应 MemosResource 类型
     """
-    def __init__(self, resource_dict=None):
-        self.name = None  # 资源名称
-        self.externalLink = None  # 外部链接
-        self.type = None  # 资源类型
-        self.uid = None  # 用户ID
-        self.id = None  # 资源ID（字符串）
-        self.filename = None  # 文件名
-        self.size = None  # 文件大小（数字）
-        if resource_dict:
-            self.__dict__.update(resource_dict)
+    SCHEMA = {
+        'name': Field(str),  # 资源名称
+        'externalLink': Field(str),  # 外部链接
+        'type': Field(str),  # 资源类型
+        'uid': Field(str),  # 用户ID
+        'id': Field(),  # 资源ID（字符串或数字）
+        'filename': Field(str),  # 文件名
+        'size': Field(int),  # 文件大小（数字）
+    }
 
-    def to_dict(self):
-        return {key: value for key, value in self.__dict__.items() if value is not None}
 
-class MemosRecord:
+class MemosRecord(Model):
     """
     Memos 记录类，对应 MemosRecord 类型
     """
-    def __init__(self, record_dict=None):
-        self.rowStatus = None  # "ARCHIVED" | "ACTIVE" | "NORMAL"
-        self.updatedTs = None  # 更新时间戳
-        self.createdTs = None  # 创建时间戳
-        self.createdAt = None  # 创建时间字符串
-        self.updatedAt = None  # 更新时间字符串
-        self.content = None  # 内容
-        self.resourceList = []  # 资源列表（MemosResource 实例列表）
-        if record_dict:
-            # 资源列表需要特殊处理
-            if 'resourceList' in record_dict and record_dict['resourceList']:
-                self.resourceList = [MemosResource(r) for r in record_dict['resourceList']]
-                record_dict = dict(record_dict)
-                record_dict.pop('resourceList')
-            self.__dict__.update(record_dict)
+    SCHEMA = {
+        'rowStatus': Field(str),  # "ARCHIVED" | "ACTIVE" | "NORMAL"
+        'updatedTs': Field(int),  # 更新时间戳
+        'createdTs': Field(int),  # 创建时间戳
+        'createdAt': Field(str),  # 创建时间字符串
+        'updatedAt': Field(str),  # 更新时间字符串
+        'content': Field(str),  # 内容
+        'resourceList': Field(list, list),  # 资源列表（MemosResource 实例列表）
+    }
+
+    def _post_decode(self):
+        # 资源列表解码为 MemosResource
+        self.resourceList = [r if isinstance(r, MemosResource) else MemosResource.decode(r)
+                             for r in self.resourceList if r]
 
     def to_dict(self):
         d = {key: value for key, value in self.__dict__.items() if value is not None and key != 'resourceList'}
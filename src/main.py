@@ -0,0 +1,249 @@
+import os
+import sys
+import traceback
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+from dotenv import load_dotenv
+
+# 加载 .env 文件（整个流水线只加载一次配置）
+load_dotenv()
+
+from ChangeProbe import ChangeProbe
+from Pipeline import Pipeline
+from RunLock import RunLock
+from StateStore import get_output_dir, get_state_dir
+
+if TYPE_CHECKING:
+    from Accounts import Account, SharedHttpPool
+
+
+def build_pipeline(force: bool = False, max_workers: int = 4, from_snapshot: bool = False,
+                   account: Optional["Account"] = None, http: Optional["SharedHttpPool"] = None) -> Pipeline:
+    """
+    构建滴答清单和 Memos 的导出流水线
+
+    阶段及依赖关系：
+
+        fetch_dida  -> render_tasks -> render_summaries -> write_dida
+        fetch_memos -> render_memos -----------------------> write_memos
+
+    两条链路并发执行；写入数据集和搜索索引的两个阶段共享 SQLite 文件，因此 write_memos 在 write_dida 结束后执行。
+
+    from_snapshot 为 True 时从状态目录中最近一次保存的原始响应快照（SNAPSHOT_ENABLED=true 时保存）回放，
+    不发起任何网络请求，并重新渲染全部笔记和摘要，用于修改模板或修复渲染后离线重新生成。
+
+    指定 account 时使用该账号的输出目录和凭据（见 Accounts），请求通过共享连接池 http 发起；
+    否则从环境变量读取单个账号的配置。
+
+    导出模块在获取阶段才导入：未到下次探测时间的空跑不加载它们（及 requests 等依赖）。
+
+    参数:
+        force: 是否跳过变化探测，强制完整导出
+        max_workers: 最大并发阶段数
+        from_snapshot: 是否从快照离线重新渲染
+        account: 多账号模式下的账号
+        http: 多账号共享的连接池
+
+    返回:
+        Pipeline 实例
+    """
+    now = datetime.now()
+    output_dir = account.output_dir if account else get_output_dir()
+    session = http.for_account(account) if account and http else None
+
+    def make_client():
+        from Dida365Client import Dida365Client
+        # 账号的 Token 保存在其状态目录中，不读写 .env
+        return Dida365Client(account.username, account.password, session=session, token_file=account.token_file)
+
+    def probe_due(name: str) -> bool:
+        # 与 fetch_data 中的判断相同，提前判断以免空跑时导入导出模块
+        probe = ChangeProbe(get_state_dir(output_dir), name) if ChangeProbe.enabled() and not force else None
+        if probe and not probe.due(now):
+            print(f"未到下次探测时间（{probe.next_probe_at}），跳过{'滴答清单' if name == 'dida365' else ' Memos '}导出")
+            return False
+        return True
+
+    dida_snapshot = memos_snapshot = None
+    if from_snapshot:
+        from Snapshot import Snapshot, SnapshotClient
+        state_dir = get_state_dir(output_dir)
+        dida_snapshot = Snapshot.latest(state_dir, 'dida365')
+        memos_snapshot = Snapshot.latest(state_dir, 'memos')
+        for name, snapshot in (('滴答清单', dida_snapshot), ('Memos', memos_snapshot)):
+            print(f"{name}快照：{snapshot.path if snapshot else '无'}")
+    memos_enabled = bool(account.memos_api if account else os.getenv('MEMOS_API')) or memos_snapshot is not None
+    memos_config = None
+
+    def fetch_dida(results):
+        if from_snapshot and dida_snapshot is None:
+            return None
+        if not from_snapshot and (account and not account.has_dida365 or not probe_due('dida365')):
+            return None
+        import Dida365Exporter
+        if not from_snapshot:
+            return Dida365Exporter.fetch_data(now, force, output_dir, client_factory=make_client if account else None)
+        # 使用录制快照时的导出窗口，而不是按当前环境变量重新计算
+        window = dida_snapshot.meta.get('window')
+        window = tuple(datetime.fromisoformat(value) for value in window) if window else None
+        return Dida365Exporter.fetch_data(dida_snapshot.time, True, output_dir, client=SnapshotClient(dida_snapshot),
+                                          window=window)
+
+    def fetch_memos(results):
+        nonlocal memos_config
+        if not memos_enabled or (from_snapshot and memos_snapshot is None):
+            return None
+        if not from_snapshot and not probe_due('memos'):
+            return None
+        import MemosExporter
+        if account:
+            memos_config = MemosExporter.get_config(output_dir, account.memos_api, account.memos_token, session)
+        else:
+            memos_config = MemosExporter.get_config(output_dir)
+        return MemosExporter.fetch_data(memos_config, now, force, snapshot=memos_snapshot)
+
+    def render_tasks(results):
+        import Dida365Exporter
+        data = results['fetch_dida']
+        exporter = Dida365Exporter.Exporter(data['projects'], data['todo_tasks'], data['completed_tasks'],
+                                            output_dir=output_dir, window=data['window'], rebuild=from_snapshot,
+                                            deleted_ids=data['deleted_ids'])
+        exporter.export_project_tasks()
+        return exporter
+
+    def render_summaries(results):
+        data = results['fetch_dida']
+        exporter = results['render_tasks']
+        exporter.export_changed_summaries(data['date'], data['habits'], data['checkins'], data['window'])
+        return exporter
+
+    def render_memos(results):
+        import MemosExporter
+        memos, _ = results['fetch_memos']
+        return MemosExporter.export_memos_notes(memos, memos_config, replay=from_snapshot)
+
+    def write_dida(results):
+        import Dida365Exporter
+        data = results['fetch_dida']
+        exporter = results['render_summaries']
+        if from_snapshot:
+            # 回放只重新渲染笔记；数据集和搜索索引是增量状态，旧快照会删除之后的记录、用旧内容覆盖新内容
+            exporter.export_analytics(data['date'])
+            return True
+        exporter.export_dataset(data['habits'], data['checkins'])
+        exporter.export_analytics(data['date'])
+        exporter.export_search_index(data['client'])
+        Dida365Exporter.record_run(data, exporter)
+        return True
+
+    def write_memos(results):
+        import MemosExporter
+        memos, probe = results['fetch_memos']
+        if from_snapshot:
+            return True
+        MemosExporter.export_memos_dataset(memos, output_dir, results['render_memos'])
+        MemosExporter.export_memos_search_index(memos, output_dir, results['render_memos'])
+        MemosExporter.record_run(memos, probe, now)
+        return True
+
+    pipeline = Pipeline(max_workers)
+    pipeline.add('fetch_dida', fetch_dida)
+    pipeline.add('fetch_memos', fetch_memos)
+    pipeline.add('render_tasks', render_tasks, requires=['fetch_dida'])
+    pipeline.add('render_summaries', render_summaries, requires=['fetch_dida', 'render_tasks'])
+    pipeline.add('render_memos', render_memos, requires=['fetch_memos'])
+    pipeline.add('write_dida', write_dida, requires=['render_summaries'])
+    pipeline.add('write_memos', write_memos, requires=['render_memos'], after=['write_dida'])
+    return pipeline
+
+
+def run(force: bool = False, max_workers: int = 4, from_snapshot: bool = False,
+        account: Optional["Account"] = None, http: Optional["SharedHttpPool"] = None) -> bool:
+    """
+    执行一次完整的导出流水线并输出各阶段耗时
+
+    已有其他导出进程在运行时直接返回（视为成功，不重复请求和写入）。
+
+    返回:
+        所有阶段都没有失败时返回 True
+    """
+    output_dir = account.output_dir if account else get_output_dir()
+    label = f"账号 {account.name}：" if account else ""
+    lock = RunLock(get_state_dir(output_dir))
+    if not lock.acquire():
+        print(f"{label}已有导出进程在运行，跳过本次运行")
+        return True
+    try:
+        pipeline = build_pipeline(force, max_workers, from_snapshot, account, http)
+        ok = pipeline.run()
+        print(f"{label}\n{pipeline.report()}" if label else pipeline.report())
+        return ok
+    finally:
+        lock.release()
+
+
+def run_accounts(path: str, force: bool = False, max_workers: int = 4, from_snapshot: bool = False) -> bool:
+    """
+    在同一进程中并发导出配置文件中的所有账号
+
+    所有账号共享一个有上限的 HTTP 连接池（max_connections），每个账号独立限速（rate_limit），
+    连接池名额不足时按账号轮流分配，请求很多的大账号不会让其他账号一直等待；
+    每个账号的状态、运行锁和登录 Token 都保存在各自的输出目录中。
+
+    参数:
+        path: 多账号配置文件（格式见 accounts.example.json）
+        force: 是否跳过变化探测，强制完整导出
+        max_workers: 每个账号流水线的最大并发阶段数
+        from_snapshot: 是否从各账号的快照离线重新渲染
+
+    返回:
+        所有账号都没有失败时返回 True
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from Accounts import load_accounts, SharedHttpPool
+    config = load_accounts(path)
+    accounts = config['accounts']
+    if not accounts:
+        print(f"配置文件中没有账号: {path}")
+        return True
+    http = SharedHttpPool(config['max_connections'])
+    print(f"共 {len(accounts)} 个账号，同时导出 {config['concurrency']} 个，共享连接数 {config['max_connections']}")
+
+    def run_account(account: "Account") -> bool:
+        try:
+            return run(force, max_workers, from_snapshot, account, http)
+        except Exception:
+            print(f"账号 {account.name} 导出失败：")
+            traceback.print_exc()
+            return False
+
+    try:
+        with ThreadPoolExecutor(config['concurrency']) as executor:
+            results = list(executor.map(run_account, accounts))
+    finally:
+        http.close()
+    for account, ok in zip(accounts, results):
+        print(f"账号 {account.name}：{'完成' if ok else '失败'}")
+    return all(results)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="滴答清单与 Memos 导出（单进程流水线）")
+    parser.add_argument('--force', action='store_true', help="跳过变化探测，强制完整导出")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('PIPELINE_WORKERS', '4')),
+                        help="最大并发阶段数（默认 PIPELINE_WORKERS 或 4）")
+    parser.add_argument('--from-snapshot', action='store_true',
+                        help="从最近一次保存的原始响应快照离线重新渲染全部笔记（不发起网络请求）")
+    parser.add_argument('--accounts', default=os.getenv('ACCOUNTS_FILE'),
+                        help="多账号配置文件（默认 ACCOUNTS_FILE），指定时并发导出其中的所有账号")
+    args = parser.parse_args()
+    if args.accounts:
+        ok = run_accounts(args.accounts, args.force, args.workers, args.from_snapshot)
+    else:
+        ok = run(args.force, args.workers, args.from_snapshot)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
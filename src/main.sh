@@ -1,8 +1,5 @@
 #!/bin/sh
 # 加载容器启动时的所有环境变量
 export $(cat /proc/1/environ | tr '\0' '\n' | xargs)
-# 执行 Dida365 导出脚本
-/usr/local/bin/python3 /app/src/Dida365Exporter.py
-
-# 执行 Memos 导出脚本
-/usr/local/bin/python3 /app/src/MemosExporter.py
\ No newline at end of file
+# 在同一个进程中执行滴答清单和 Memos 导出（互不依赖的阶段并发执行，单个阶段失败不影响其他阶段）
+/usr/local/bin/python3 /app/src/main.py